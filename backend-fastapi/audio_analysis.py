@@ -0,0 +1,284 @@
+"""
+Travai Backend - Audio analytics for finished recordings
+
+Runs inside the audio analysis process pool, so it depends only on NumPy
+and the standard library and jobs never need the FastAPI app (a spawned
+worker may still re-import the parent's __main__; see RecordingAnalyzer).
+Recordings are read in fixed-size chunks (WAV natively, anything else
+decoded to PCM by ffmpeg) and reduced with vectorized per-frame operations,
+so memory stays flat however long the recording is.
+"""
+
+import shutil
+import subprocess
+import wave
+from typing import Any, Dict, Iterator
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# 16-bit PCM full scale; samples at or beyond CLIP_LEVEL count as clipped
+FULL_SCALE = 32768.0
+CLIP_LEVEL = 32767
+# Sample rate recordings are decoded to when ffmpeg is used
+DECODE_SAMPLE_RATE = 16000
+# Floor for dBFS values, reported instead of -inf for digital silence
+MIN_DBFS = -120.0
+
+
+def available() -> bool:
+    return np is not None
+
+
+def pcm_chunks(path: str, chunk_seconds: float, channels: int = 1) -> Iterator[Any]:
+    """
+    Yield (samples, sample_rate) chunks of int16 PCM shaped (n, channels)
+
+    16-bit WAV files are read directly; other formats (Ogg/Opus, MP4 from
+    egress) are decoded by an ffmpeg subprocess. With channels=1 the
+    recording is mixed down to mono.
+    """
+    if path.lower().endswith(".wav"):
+        with wave.open(path, "rb") as wav:
+            if wav.getsampwidth() == 2:
+                yield from _wav_chunks(wav, chunk_seconds, channels)
+                return
+    yield from _ffmpeg_chunks(path, chunk_seconds, channels)
+
+
+def _wav_chunks(wav: wave.Wave_read, chunk_seconds: float, channels: int) -> Iterator[Any]:
+    sample_rate = wav.getframerate()
+    file_channels = wav.getnchannels()
+    chunk_frames = max(int(sample_rate * chunk_seconds), 1)
+    while True:
+        data = wav.readframes(chunk_frames)
+        if not data:
+            return
+        samples = np.frombuffer(data, dtype="<i2").reshape(-1, file_channels)
+        yield _match_channels(samples, channels), sample_rate
+
+
+def _ffmpeg_chunks(path: str, chunk_seconds: float, channels: int) -> Iterator[Any]:
+    if shutil.which("ffmpeg") is None:
+        raise RuntimeError(f"ffmpeg is required to decode {path}")
+    process = subprocess.Popen(
+        [
+            "ffmpeg", "-nostdin", "-v", "error", "-i", path,
+            "-f", "s16le", "-acodec", "pcm_s16le", "-ac", str(channels), "-ar", str(DECODE_SAMPLE_RATE), "-",
+        ],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    chunk_bytes = max(int(DECODE_SAMPLE_RATE * chunk_seconds), 1) * 2 * channels
+    try:
+        while True:
+            data = process.stdout.read(chunk_bytes)
+            if not data:
+                break
+            data = data[:len(data) - len(data) % (2 * channels)]
+            yield np.frombuffer(data, dtype="<i2").reshape(-1, channels), DECODE_SAMPLE_RATE
+    finally:
+        process.stdout.close()
+        stderr = process.stderr.read().decode(errors="replace").strip()
+        process.stderr.close()
+        if process.wait() != 0:
+            raise RuntimeError(f"ffmpeg failed on {path}: {stderr[-500:]}")
+
+
+def _match_channels(samples: Any, channels: int) -> Any:
+    if samples.shape[1] == channels:
+        return samples
+    if channels == 1:
+        return samples.mean(axis=1, dtype=np.float32).astype(np.int16).reshape(-1, 1)
+    return np.repeat(samples[:, :1], channels, axis=1)
+
+
+def framed(chunks: Iterator[Any], frame_ms: float) -> Iterator[Any]:
+    """
+    Regroup PCM chunks into whole frames: yields (frames, sample_rate)
+
+    `frames` is a float32 array shaped (n_frames, frame_len, channels).
+    Samples left over at the end of a chunk are carried into the next one;
+    a final partial frame is dropped.
+    """
+    carry = None
+    for samples, sample_rate in chunks:
+        if carry is not None and len(carry):
+            samples = np.concatenate([carry, samples])
+        frame_len = max(int(sample_rate * frame_ms / 1000), 1)
+        usable = len(samples) - len(samples) % frame_len
+        carry = samples[usable:]
+        if usable:
+            frames = samples[:usable].astype(np.float32).reshape(-1, frame_len, samples.shape[1])
+            yield frames, sample_rate
+
+
+def to_dbfs(value: Any) -> Any:
+    """Amplitude (0..FULL_SCALE) to dBFS, floored at MIN_DBFS"""
+    return np.maximum(20 * np.log10(np.maximum(value, 1e-9) / FULL_SCALE), MIN_DBFS)
+
+
+def analyze_recording(path: str, frame_ms: float = 20.0, silence_dbfs: float = -50.0, chunk_seconds: float = 10.0) -> Dict[str, Any]:
+    """
+    Loudness, silence and clipping of a recording (mixed to mono)
+
+    Per frame of `frame_ms`, RMS is computed with one vectorized pass;
+    frames whose RMS is below `silence_dbfs` count as silent. Clipping is
+    the number of samples at full scale.
+    """
+    if np is None:
+        raise RuntimeError("numpy is required for audio analytics")
+
+    samples = 0
+    sum_squares = 0.0
+    peak = 0.0
+    clipped = 0
+    frames = 0
+    silent_frames = 0
+    sample_rate = 0
+
+    for chunk, sample_rate in framed(pcm_chunks(path, chunk_seconds), frame_ms):
+        chunk = chunk[:, :, 0]
+        squares = chunk * chunk
+        frame_rms = np.sqrt(squares.mean(axis=1))
+        magnitudes = np.abs(chunk)
+
+        samples += chunk.size
+        sum_squares += float(squares.sum(dtype=np.float64))
+        peak = max(peak, float(magnitudes.max()))
+        clipped += int(np.count_nonzero(magnitudes >= CLIP_LEVEL))
+        frames += len(frame_rms)
+        silent_frames += int(np.count_nonzero(to_dbfs(frame_rms) < silence_dbfs))
+
+    rms = (sum_squares / samples) ** 0.5 if samples else 0.0
+    return {
+        "duration_s": round(samples / sample_rate, 3) if sample_rate else 0.0,
+        "sample_rate": sample_rate,
+        "rms_dbfs": round(float(to_dbfs(rms)), 2),
+        "peak_dbfs": round(float(to_dbfs(peak)), 2) + 0.0,  # no "-0.0" at full scale
+        "silence_ratio": round(silent_frames / frames, 4) if frames else 1.0,
+        "clipped_samples": clipped,
+        "clipping_ratio": round(clipped / samples, 6) if samples else 0.0,
+        "frames": frames,
+    }
+
+
+def frame_levels(path: str, channels: int, frame_ms: float, chunk_seconds: float) -> Any:
+    """Per-frame RMS level in dBFS, shaped (n_frames, channels)"""
+    parts = []
+    for frames, _ in framed(pcm_chunks(path, chunk_seconds, channels), frame_ms):
+        parts.append(to_dbfs(np.sqrt((frames * frames).mean(axis=1))).astype(np.float32))
+    return np.concatenate(parts) if parts else np.zeros((0, channels), dtype=np.float32)
+
+
+def _runs(mask: Any) -> Any:
+    """Start and end (exclusive) frame indexes of each run of True"""
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def speech_segments(
+    levels: Any, frame_ms: float, threshold_dbfs: float, noise_margin_db: float,
+    min_speech_ms: float, min_silence_ms: float,
+) -> Any:
+    """
+    Energy-based voice activity: (starts, ends) of speech in seconds
+
+    A frame is speech when it is louder than both `threshold_dbfs` and the
+    track's noise floor (10th percentile level) plus `noise_margin_db`.
+    Pauses shorter than `min_silence_ms` are bridged, so a sentence with
+    breaths stays one turn, then bursts shorter than `min_speech_ms` are
+    dropped.
+    """
+    if not len(levels):
+        return np.zeros(0), np.zeros(0)
+    threshold = max(threshold_dbfs, float(np.percentile(levels, 10)) + noise_margin_db)
+    starts, ends = _runs(levels > threshold)
+
+    if len(starts) > 1:
+        keep = (starts[1:] - ends[:-1]) * frame_ms >= min_silence_ms
+        starts = np.concatenate((starts[:1], starts[1:][keep]))
+        ends = np.concatenate((ends[:-1][keep], ends[-1:]))
+
+    long_enough = (ends - starts) * frame_ms >= min_speech_ms
+    frame_s = frame_ms / 1000
+    return starts[long_enough] * frame_s, ends[long_enough] * frame_s
+
+
+def response_latencies(user_starts: Any, user_ends: Any, agent_starts: Any, agent_ends: Any) -> Dict[str, Any]:
+    """
+    Align user and agent speech into turns
+
+    A user turn is answered when the agent starts speaking after the user
+    stops and before the user speaks again; the gap is the response
+    latency. Agent speech that starts while the user is still talking is
+    counted as an overlap (barge-in).
+    """
+    next_user_start = np.append(user_starts[1:], np.inf)
+    index = np.searchsorted(agent_starts, user_ends, side="left")
+    found = index < len(agent_starts)
+    response = np.full(len(user_ends), np.inf)
+    response[found] = agent_starts[index[found]]
+    answered = response < next_user_start
+
+    speaking = np.searchsorted(user_starts, agent_starts, side="right") - 1
+    inside = speaking >= 0
+    overlaps = int(np.count_nonzero(agent_starts[inside] < user_ends[speaking[inside]]))
+
+    return {
+        "latencies": response[answered] - user_ends[answered],
+        "turn_ends": user_ends[answered],
+        "unanswered": int(np.count_nonzero(~answered)),
+        "overlaps": overlaps,
+    }
+
+
+def analyze_turn_taking(
+    user: Any, agent: Any, frame_ms: float = 20.0, threshold_dbfs: float = -45.0,
+    noise_margin_db: float = 10.0, min_speech_ms: float = 120.0, min_silence_ms: float = 400.0,
+    chunk_seconds: float = 10.0,
+) -> Dict[str, Any]:
+    """
+    Agent response latency after the user stops speaking
+
+    `user` and `agent` are (path, channel, offset_s): the recording, the
+    channel holding that speaker (None to mix a per-track file down to
+    mono) and when the recording started relative to the other one. A
+    dual-channel recording passes the same path for both and is read once.
+    """
+    if np is None:
+        raise RuntimeError("numpy is required for turn-taking analysis")
+
+    vad = (frame_ms, threshold_dbfs, noise_margin_db, min_speech_ms, min_silence_ms)
+    (user_path, user_channel, user_offset), (agent_path, agent_channel, agent_offset) = user, agent
+    if user_path == agent_path and user_channel is not None and agent_channel is not None:
+        levels = frame_levels(user_path, 2, frame_ms, chunk_seconds)
+        user_levels, agent_levels = levels[:, user_channel], levels[:, agent_channel]
+    else:
+        user_levels = frame_levels(user_path, 1, frame_ms, chunk_seconds)[:, 0]
+        agent_levels = frame_levels(agent_path, 1, frame_ms, chunk_seconds)[:, 0]
+
+    user_starts, user_ends = (times + user_offset for times in speech_segments(user_levels, *vad))
+    agent_starts, agent_ends = (times + agent_offset for times in speech_segments(agent_levels, *vad))
+    turns = response_latencies(user_starts, user_ends, agent_starts, agent_ends)
+    latencies_ms = turns["latencies"] * 1000
+
+    summary: Dict[str, Any] = {
+        "turns": len(latencies_ms),
+        "unanswered": turns["unanswered"],
+        "overlaps": turns["overlaps"],
+        "user_speech_s": round(float((user_ends - user_starts).sum()), 3),
+        "agent_speech_s": round(float((agent_ends - agent_starts).sum()), 3),
+    }
+    if len(latencies_ms):
+        worst = int(np.argmax(latencies_ms))
+        summary.update(
+            mean_ms=round(float(latencies_ms.mean()), 1),
+            p50_ms=round(float(np.percentile(latencies_ms, 50)), 1),
+            p95_ms=round(float(np.percentile(latencies_ms, 95)), 1),
+            worst_ms=round(float(latencies_ms[worst]), 1),
+            worst_turn_at_s=round(float(turns["turn_ends"][worst]), 3),
+        )
+    return summary
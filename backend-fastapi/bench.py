@@ -0,0 +1,496 @@
+"""
+Travai Backend - Load and micro-benchmarks
+
+Drives /api/token and /api/webhooks/livekit through the ASGI app in-process
+and over a real uvicorn socket, using a synthetic but reproducible stream of
+LiveKit webhook events, and micro-benchmarks the hot helpers (webhook
+signature verification, JWT signing, JSON parsing and rendering). Results are written as
+JSON so runs can be diffed across commits.
+
+Usage:
+    pip install httpx
+    python bench.py --output bench.json
+    python bench.py --concurrency 1,16,64 --requests 5000 --skip-uvicorn
+    python bench.py --record-events events.jsonl   # save the synthetic stream
+    python bench.py --events events.jsonl          # replay a recorded stream
+"""
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import hmac
+import itertools
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+BENCH_API_KEY = "APIbench"
+BENCH_API_SECRET = "bench-secret-0123456789abcdef0123456789abcdef"
+BENCH_WEBHOOK_SECRET = "bench-webhook-secret"
+
+_workdir = tempfile.mkdtemp(prefix="travai-bench-")
+BENCH_ENV = {
+    "LIVEKIT_API_KEY": BENCH_API_KEY,
+    "LIVEKIT_API_SECRET": BENCH_API_SECRET,
+    "LIVEKIT_WEBHOOK_SECRET": BENCH_WEBHOOK_SECRET,
+    "WEBHOOK_AUTH_SCHEME": "livekit",
+    "WEBHOOK_QUEUE_PATH": os.path.join(_workdir, "webhook_queue.db"),
+    "EVENT_LOG_DIR": os.path.join(_workdir, "event_log"),
+    "LOG_LEVEL": "WARNING",
+    "RATE_LIMIT_ENABLED": "false",
+}
+os.environ.update(BENCH_ENV)
+
+import httpx  # noqa: E402
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+
+import main  # noqa: E402
+
+
+# Synthetic Event Streams
+
+def synthetic_events(rooms: int, seed: int = 7) -> List[Dict[str, Any]]:
+    """
+    Deterministic LiveKit event stream for `rooms` onboarding sessions
+
+    Each session is a user and an agent joining, publishing audio, some
+    mute/unmute churn, leaving, and the room finishing. Sessions are
+    interleaved the way concurrent rooms would be.
+    """
+    rng = random.Random(seed)
+    sessions = []
+    for r in range(rooms):
+        room = {"sid": f"RM_{r:06d}", "name": f"onboarding-{r:06d}"}
+        user = {"sid": f"PA_u{r:06d}", "identity": f"user_{r}", "name": f"user_{r}"}
+        agent = {"sid": f"PA_a{r:06d}", "identity": f"agent_{r}", "name": "onboarding-assistant"}
+        events = [
+            {"event": "room_started", "room": room},
+            {"event": "participant_joined", "room": room, "participant": user},
+            {"event": "participant_joined", "room": room, "participant": agent},
+        ]
+        for participant in (user, agent):
+            track = {"sid": f"TR_{participant['sid']}", "type": "AUDIO", "source": "MICROPHONE"}
+            events.append({"event": "track_published", "room": room, "participant": participant, "track": track})
+        for _ in range(rng.randint(0, 6)):
+            participant = rng.choice((user, agent))
+            track = {"sid": f"TR_{participant['sid']}", "type": "AUDIO", "source": "MICROPHONE"}
+            events.append({"event": "track_unpublished", "room": room, "participant": participant, "track": track})
+            events.append({"event": "track_published", "room": room, "participant": participant, "track": track})
+        events += [
+            {"event": "participant_left", "room": room, "participant": user},
+            {"event": "participant_left", "room": room, "participant": agent},
+            {"event": "room_finished", "room": {**room, "duration": rng.randint(30, 900)}},
+        ]
+        sessions.append(events)
+
+    stream = []
+    while sessions:
+        session = rng.choice(sessions)
+        stream.append(session.pop(0))
+        if not session:
+            sessions.remove(session)
+
+    base = 1_730_000_000
+    for i, event in enumerate(stream):
+        event["id"] = f"EV_{seed:04d}{i:08d}"
+        event["createdAt"] = str(base + i)
+    return stream
+
+
+def large_egress_event() -> Dict[str, Any]:
+    """A recording_finished payload with a long segment list, for JSON parsing"""
+    return {
+        "event": "recording_finished",
+        "id": "EV_large",
+        "egressInfo": {
+            "egressId": "EG_bench",
+            "roomName": "onboarding-000000",
+            "file": {"location": "/recordings/onboarding-000000.ogg", "size": "48213312"},
+            "segmentResults": [
+                {"filename": f"segment_{i:05d}.ts", "duration": "2000000000", "size": "384512", "startTime": str(i)}
+                for i in range(2000)
+            ],
+        },
+    }
+
+
+def load_events(path: str) -> List[Dict[str, Any]]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def save_events(path: str, events: List[Dict[str, Any]]):
+    with open(path, "w") as f:
+        for event in events:
+            f.write(json.dumps(event, separators=(",", ":")) + "\n")
+
+
+def sign_webhook(body: bytes) -> str:
+    """LiveKit-style Authorization token: an HS256 JWT carrying the body's SHA-256"""
+    now = int(time.time())
+    claims = {
+        "iss": BENCH_API_KEY,
+        "nbf": now,
+        "exp": now + 300,
+        "sha256": base64.b64encode(hashlib.sha256(body).digest()).decode(),
+    }
+    header = main._b64url(json.dumps({"alg": "HS256", "typ": "JWT"}).encode())
+    payload = main._b64url(json.dumps(claims, separators=(",", ":")).encode())
+    signature = hmac.new(BENCH_API_SECRET.encode(), f"{header}.{payload}".encode(), hashlib.sha256).digest()
+    return f"{header}.{payload}.{main._b64url(signature)}"
+
+
+def sign_webhook_hmac(body: bytes) -> str:
+    return "sha256=" + hmac.new(BENCH_WEBHOOK_SECRET.encode(), body, hashlib.sha256).hexdigest()
+
+
+# Statistics
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(q * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+def summarize(latencies: List[float], elapsed: float, errors: Dict[int, int]) -> Dict[str, Any]:
+    """Latency and throughput of one run; runs with error responses are marked invalid"""
+    latencies = sorted(latencies)
+    to_ms = lambda seconds: round(seconds * 1000, 3)
+    return {
+        "valid": not errors,
+        "requests": len(latencies),
+        "errors": sum(errors.values()),
+        "error_statuses": {str(status): count for status, count in sorted(errors.items())},
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": to_ms(percentile(latencies, 0.50)),
+        "p95_ms": to_ms(percentile(latencies, 0.95)),
+        "p99_ms": to_ms(percentile(latencies, 0.99)),
+        "max_ms": to_ms(latencies[-1]) if latencies else 0.0,
+    }
+
+
+def micro(fn: Callable[[], Any], min_seconds: float = 0.5) -> Dict[str, Any]:
+    """Time `fn` in growing batches until a batch takes at least `min_seconds`"""
+    fn()
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_seconds:
+            break
+        # Jump close to the target once the batch is long enough to extrapolate from
+        number = int(number * 1.2 * min_seconds / elapsed) + 1 if elapsed > 0.01 else number * 10
+    return {
+        "iterations": number,
+        "ns_per_op": round(elapsed / number * 1e9, 1),
+        "ops_per_s": round(number / elapsed, 1),
+    }
+
+
+# Request Scenarios
+
+RequestFactory = Callable[[int], Dict[str, Any]]
+
+TOKEN_SIGNERS = ("sdk", "fast")
+
+# Run IDs keep token identities and webhook event IDs unique across every
+# scenario, level and server in one invocation
+_run_ids = itertools.count()
+
+
+def token_requests(run_id: int, unique: bool) -> RequestFactory:
+    """Token requests with a fresh identity each time (cold) or from a small set (cache hits)"""
+    def make(i: int) -> Dict[str, Any]:
+        n = i if unique else i % 32
+        participant = f"user_{run_id}_{n}" if unique else f"user_{n}"
+        return {
+            "method": "POST",
+            "url": "/api/token",
+            "json": {"room_name": f"onboarding-{n % 1000:06d}", "participant_name": participant},
+        }
+    return make
+
+
+def webhook_requests(events: List[Dict[str, Any]], run_id: int) -> RequestFactory:
+    """Signed webhook deliveries; event IDs are made unique per run so dedup does not kick in"""
+    def make(i: int) -> Dict[str, Any]:
+        event = dict(events[i % len(events)])
+        event["id"] = f"{event['id']}_{run_id}_{i}"
+        body = json.dumps(event, separators=(",", ":")).encode()
+        return {
+            "method": "POST",
+            "url": "/api/webhooks/livekit",
+            "content": body,
+            "headers": {"Content-Type": "application/json", "Authorization": sign_webhook(body)},
+        }
+    return make
+
+
+async def drive(client: httpx.AsyncClient, make_request: RequestFactory, total: int, concurrency: int) -> Dict[str, Any]:
+    # Build request bodies up front so signing/serialization is not timed
+    prepared = [make_request(i) for i in range(total)]
+    latencies: List[float] = []
+    errors: Dict[int, int] = {}
+    cursor = iter(prepared)
+
+    async def worker():
+        for request in cursor:
+            started = time.perf_counter()
+            response = await client.request(**request)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors[response.status_code] = errors.get(response.status_code, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, time.perf_counter() - started, errors)
+
+
+async def wait_for_drain(timeout: float = 60.0) -> Optional[float]:
+    """Seconds until the in-process webhook queue is empty, or None on timeout"""
+    started = time.perf_counter()
+    while time.perf_counter() - started < timeout:
+        depth = main.webhook_queue.depth()
+        if depth["pending"] == 0 and depth["inflight"] == 0:
+            return round(time.perf_counter() - started, 3)
+        await asyncio.sleep(0.01)
+    return None
+
+
+def scenarios_for(signer: str, events: List[Dict[str, Any]], shared: bool) -> Dict[str, Callable[[int], RequestFactory]]:
+    """
+    Cold token requests for one TOKEN_SIGNER; with `shared`, also the
+    scenarios that don't depend on the signer (cache hits and webhooks)
+    """
+    scenarios = {f"token_cold_{signer}": lambda run: token_requests(run, unique=True)}
+    if shared:
+        scenarios["token_cached"] = lambda run: token_requests(run, unique=False)
+        scenarios["webhook"] = lambda run: webhook_requests(events, run)
+    return scenarios
+
+
+async def run_scenarios(
+    client: httpx.AsyncClient,
+    scenarios: Dict[str, Callable[[int], RequestFactory]],
+    levels: List[int],
+    total: int,
+    in_process: bool,
+) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    for name, factory in scenarios.items():
+        results[name] = {}
+        for concurrency in levels:
+            stats = await drive(client, factory(next(_run_ids)), total, concurrency)
+            if name == "webhook" and in_process:
+                stats["drain_s"] = await wait_for_drain()
+            results[name][f"c{concurrency}"] = stats
+    return results
+
+
+async def bench_asgi(events: List[Dict[str, Any]], levels: List[int], total: int) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    default_signer = main.TOKEN_SIGNER
+    await main.app.router.startup()
+    try:
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for signer in TOKEN_SIGNERS:
+                main.TOKEN_SIGNER = signer
+                scenarios = scenarios_for(signer, events, shared=signer == TOKEN_SIGNERS[-1])
+                results.update(await run_scenarios(client, scenarios, levels, total, in_process=True))
+        return results
+    finally:
+        main.TOKEN_SIGNER = default_signer
+        await main.app.router.shutdown()
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def bench_uvicorn(events: List[Dict[str, Any]], levels: List[int], total: int) -> Dict[str, Any]:
+    """One server per TOKEN_SIGNER, since the signer is read at startup"""
+    results: Dict[str, Any] = {}
+    for signer in TOKEN_SIGNERS:
+        scenarios = scenarios_for(signer, events, shared=signer == TOKEN_SIGNERS[-1])
+        results.update(await bench_uvicorn_server(signer, scenarios, levels, total))
+    return results
+
+
+async def bench_uvicorn_server(
+    signer: str,
+    scenarios: Dict[str, Callable[[int], RequestFactory]],
+    levels: List[int],
+    total: int,
+) -> Dict[str, Any]:
+    port = _free_port()
+    env = {
+        **os.environ,
+        **BENCH_ENV,
+        "TOKEN_SIGNER": signer,
+        "WEBHOOK_QUEUE_PATH": os.path.join(_workdir, f"webhook_queue_uvicorn_{signer}.db"),
+        "EVENT_LOG_DIR": os.path.join(_workdir, f"event_log_uvicorn_{signer}"),
+    }
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning", "--no-access-log"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        limits = httpx.Limits(max_connections=max(levels), max_keepalive_connections=max(levels))
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+            for _ in range(200):
+                try:
+                    if (await client.get("/health")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    await asyncio.sleep(0.05)
+            else:
+                raise RuntimeError("uvicorn did not start")
+            return await run_scenarios(client, scenarios, levels, total, in_process=False)
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+# Micro-benchmarks
+
+def bench_micro(events: List[Dict[str, Any]]) -> Dict[str, Any]:
+    small_body = json.dumps(events[0], separators=(",", ":")).encode()
+    large_body = json.dumps(large_egress_event(), separators=(",", ":")).encode()
+    small_header = sign_webhook_hmac(small_body)
+    large_header = sign_webhook_hmac(large_body)
+    token = sign_webhook(small_body)
+    cold = main.WebhookTokenVerifier(BENCH_API_KEY, BENCH_API_SECRET, 60, cache_size=0)
+    cached = main.WebhookTokenVerifier(BENCH_API_KEY, BENCH_API_SECRET, 60, cache_size=16)
+    signer = main.FastTokenSigner(BENCH_API_KEY, BENCH_API_SECRET)
+    token_response = main.TokenResponse(token=token, url=main.LIVEKIT_URL)
+
+    def verify_token(verifier):
+        digest = base64.b64encode(hashlib.sha256(small_body).digest()).decode()
+        return verifier.verify(token, digest)
+
+    return {
+        "verify_webhook_signature_small": micro(lambda: main.verify_webhook_signature(small_body, small_header)),
+        "verify_webhook_signature_large": micro(lambda: main.verify_webhook_signature(large_body, large_header)),
+        "verify_webhook_token_cold": micro(lambda: verify_token(cold)),
+        "verify_webhook_token_cached": micro(lambda: verify_token(cached)),
+        "sign_token_sdk": micro(lambda: _sign_with_sdk()),
+        "sign_token_fast": micro(
+            lambda: signer.sign("onboarding-000001", "user_1", None, main.TOKEN_TTL_SECONDS)
+        ),
+        "json_loads_small": micro(lambda: json.loads(small_body)),
+        "json_loads_large": micro(lambda: json.loads(large_body)),
+        "backend_loads_small": micro(lambda: main.json_loads(small_body)),
+        "backend_loads_large": micro(lambda: main.json_loads(large_body)),
+        "render_token_response_encoder": micro(lambda: JSONResponse(jsonable_encoder(token_response)).body),
+        "render_token_response_direct": micro(lambda: main.model_response(token_response).body),
+    }
+
+
+def _sign_with_sdk():
+    signer = main.TOKEN_SIGNER
+    main.TOKEN_SIGNER = "sdk"
+    try:
+        return main.create_access_token("onboarding-000001", "user_1")
+    finally:
+        main.TOKEN_SIGNER = signer
+
+
+# Entry Point
+
+def invalid_runs(results: Dict[str, Any]) -> List[str]:
+    """Paths like asgi.token_cold_sdk.c32 of load runs that got error responses"""
+    return [
+        f"{mode}.{scenario}.{level}"
+        for mode in ("asgi", "uvicorn")
+        for scenario, runs in results.get(mode, {}).items()
+        for level, stats in runs.items()
+        if not stats["valid"]
+    ]
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL,
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Travai backend benchmarks")
+    parser.add_argument("--concurrency", default="1,8,32,128", help="comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=2000, help="requests per scenario and level")
+    parser.add_argument("--rooms", type=int, default=200, help="rooms in the synthetic event stream")
+    parser.add_argument("--seed", type=int, default=7, help="seed for the synthetic event stream")
+    parser.add_argument("--events", help="replay a recorded JSONL event stream instead of generating one")
+    parser.add_argument("--record-events", help="write the synthetic event stream to this JSONL file and exit")
+    parser.add_argument("--skip-asgi", action="store_true")
+    parser.add_argument("--skip-uvicorn", action="store_true")
+    parser.add_argument("--skip-micro", action="store_true")
+    parser.add_argument("--output", help="write results to this file instead of stdout")
+    args = parser.parse_args()
+
+    events = load_events(args.events) if args.events else synthetic_events(args.rooms, args.seed)
+    if args.record_events:
+        save_events(args.record_events, events)
+        return
+
+    levels = [int(level) for level in args.concurrency.split(",")]
+    results: Dict[str, Any] = {
+        "meta": {
+            "revision": git_revision(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "token_signers": list(TOKEN_SIGNERS),
+            "json_backend": main.JSON_BACKEND,
+            "requests": args.requests,
+            "concurrency": levels,
+            "events": len(events),
+            "event_source": args.events or f"synthetic(rooms={args.rooms}, seed={args.seed})",
+        }
+    }
+
+    if not args.skip_micro:
+        results["micro"] = bench_micro(events)
+    if not args.skip_asgi:
+        results["asgi"] = asyncio.run(bench_asgi(events, levels, args.requests))
+    if not args.skip_uvicorn:
+        results["uvicorn"] = asyncio.run(bench_uvicorn(events, levels, args.requests))
+
+    invalid = invalid_runs(results)
+    results["meta"]["invalid_runs"] = invalid
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    if invalid:
+        sys.exit(f"{len(invalid)} benchmark runs had error responses: {', '.join(invalid)}")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -7,29 +7,80 @@ This server handles:
 3. Voice agent integration
 """
 
-from fastapi import FastAPI, HTTPException, Header, Request
+from fastapi import Depends, FastAPI, HTTPException, Header, Request, WebSocket
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
+from typing import Optional, Dict, Any, Awaitable, Callable, Iterator, List, Mapping, Tuple
+from collections import OrderedDict, deque
+import asyncio
+import bisect
+import concurrent.futures
+import logging
+import math
+import multiprocessing
 import os
-from datetime import datetime
+import queue
+import sqlite3
+import sys
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta
+import base64
+import dataclasses
+import functools
 import hashlib
 import hmac
 import json
+import re
+import secrets
 
 from livekit import api
 
-# Initialize FastAPI app
-app = FastAPI(title="Travai Backend", version="1.0.0")
+import audio_analysis
 
-# CORS configuration - update origins in production
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # Update with your mobile app's domain in production
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# JSON Backend
+# orjson when installed; JSON_BACKEND=json forces the stdlib
+JSON_BACKEND = "orjson" if orjson is not None and os.getenv("JSON_BACKEND", "orjson") == "orjson" else "json"
+
+if JSON_BACKEND == "orjson":
+    json_loads = orjson.loads
+
+    def json_dumps(obj: Any, default: Optional[Callable[[Any], Any]] = None) -> bytes:
+        return orjson.dumps(obj, default=default, option=orjson.OPT_NON_STR_KEYS)
+else:
+    json_loads = json.loads
+
+    def json_dumps(obj: Any, default: Optional[Callable[[Any], Any]] = None) -> bytes:
+        return json.dumps(obj, default=default, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with the configured JSON backend"""
+
+    def render(self, content: Any) -> bytes:
+        return json_dumps(content)
+
+
+def model_response(model: BaseModel) -> Response:
+    """
+    Render a Pydantic model straight to JSON bytes
+
+    Returning the model from a route makes FastAPI convert it to a dict and
+    then encode that; model_dump_json() does it in one pass.
+    """
+    return Response(content=model.model_dump_json(), media_type="application/json")
+
+
+# Initialize FastAPI app
+app = FastAPI(title="Travai Backend", version="1.0.0", default_response_class=FastJSONResponse)
 
 # LiveKit Configuration
 LIVEKIT_API_KEY = os.getenv("LIVEKIT_API_KEY", "")
@@ -39,6 +90,440 @@ LIVEKIT_URL = os.getenv("LIVEKIT_URL", "wss://your-project.livekit.cloud")
 # Webhook secret for validating LiveKit webhooks
 WEBHOOK_SECRET = os.getenv("LIVEKIT_WEBHOOK_SECRET", "")
 
+# Webhook authentication: "livekit" (JWT in Authorization, signed with the API
+# secret), "hmac" (legacy "sha256=<hex>" header using LIVEKIT_WEBHOOK_SECRET) or "none"
+WEBHOOK_AUTH_SCHEME = os.getenv("WEBHOOK_AUTH_SCHEME", "livekit").lower()
+WEBHOOK_TOKEN_LEEWAY = int(os.getenv("WEBHOOK_TOKEN_LEEWAY", "60"))
+WEBHOOK_TOKEN_CACHE_SIZE = int(os.getenv("WEBHOOK_TOKEN_CACHE_SIZE", "4096"))
+
+# Largest webhook body accepted, in bytes
+WEBHOOK_MAX_BODY_BYTES = int(os.getenv("WEBHOOK_MAX_BODY_BYTES", str(1024 * 1024)))
+
+# Token signing thread pool
+SIGNING_POOL_MIN_WORKERS = int(os.getenv("SIGNING_POOL_MIN_WORKERS", "2"))
+SIGNING_POOL_MAX_WORKERS = int(os.getenv("SIGNING_POOL_MAX_WORKERS", str(min(32, (os.cpu_count() or 1) * 2))))
+SIGNING_POOL_MAX_QUEUE = int(os.getenv("SIGNING_POOL_MAX_QUEUE", "256"))
+SIGNING_POOL_TARGET_WAIT = float(os.getenv("SIGNING_POOL_TARGET_WAIT", "0.02"))
+SIGNING_RETRY_AFTER = int(os.getenv("SIGNING_RETRY_AFTER", "1"))
+
+# Rate limiting for token endpoints (rates are tokens per second)
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+RATE_LIMIT_IP_RATE = float(os.getenv("RATE_LIMIT_IP_RATE", "10"))
+RATE_LIMIT_IP_BURST = float(os.getenv("RATE_LIMIT_IP_BURST", "40"))
+RATE_LIMIT_PARTICIPANT_RATE = float(os.getenv("RATE_LIMIT_PARTICIPANT_RATE", "0.5"))
+RATE_LIMIT_PARTICIPANT_BURST = float(os.getenv("RATE_LIMIT_PARTICIPANT_BURST", "5"))
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+RATE_LIMIT_TRUST_FORWARDED = os.getenv("RATE_LIMIT_TRUST_FORWARDED", "false").lower() == "true"
+# SQLite file shared by all workers on a host; empty keeps buckets per worker
+RATE_LIMIT_SHARED_PATH = os.getenv("RATE_LIMIT_SHARED_PATH", "")
+# Longest the event loop waits for the shared file's write lock before letting the request through
+RATE_LIMIT_SHARED_TIMEOUT = float(os.getenv("RATE_LIMIT_SHARED_TIMEOUT", "0.01"))
+# Largest token request body read by the limiter, in bytes
+RATE_LIMIT_MAX_BODY_BYTES = int(os.getenv("RATE_LIMIT_MAX_BODY_BYTES", "65536"))
+
+# Durable webhook queue configuration
+WEBHOOK_QUEUE_PATH = os.getenv("WEBHOOK_QUEUE_PATH", "webhook_queue.db")
+WEBHOOK_QUEUE_BATCH_SIZE = int(os.getenv("WEBHOOK_QUEUE_BATCH_SIZE", "100"))
+WEBHOOK_MAX_ATTEMPTS = int(os.getenv("WEBHOOK_MAX_ATTEMPTS", "5"))
+WEBHOOK_RETRY_DELAY = float(os.getenv("WEBHOOK_RETRY_DELAY", "1.0"))
+WEBHOOK_HANDLER_TIMEOUT = float(os.getenv("WEBHOOK_HANDLER_TIMEOUT", "10.0"))
+
+# Webhook execution lanes: events are sharded by room, ordered within a lane
+WEBHOOK_LANES = int(os.getenv("WEBHOOK_LANES", "8"))
+WEBHOOK_LANE_QUEUE_SIZE = int(os.getenv("WEBHOOK_LANE_QUEUE_SIZE", "1000"))
+
+# Webhook dedup configuration (empty path keeps the index in memory only)
+WEBHOOK_DEDUP_TTL = float(os.getenv("WEBHOOK_DEDUP_TTL", "3600"))
+WEBHOOK_DEDUP_SIZE = int(os.getenv("WEBHOOK_DEDUP_SIZE", "100000"))
+WEBHOOK_DEDUP_PATH = os.getenv("WEBHOOK_DEDUP_PATH", "")
+
+# Append-only event log with compacted room-index snapshots (empty dir disables it)
+EVENT_LOG_DIR = os.getenv("EVENT_LOG_DIR", "event_log")
+EVENT_LOG_SEGMENT_BYTES = int(os.getenv("EVENT_LOG_SEGMENT_BYTES", str(64 * 1024 * 1024)))
+EVENT_LOG_SNAPSHOT_EVERY = int(os.getenv("EVENT_LOG_SNAPSHOT_EVERY", "10000"))
+EVENT_LOG_FSYNC = os.getenv("EVENT_LOG_FSYNC", "false").lower() == "true"
+
+# Onboarding room allocation
+ONBOARDING_ROOM_PREFIX = os.getenv("ONBOARDING_ROOM_PREFIX", "onboarding")
+ONBOARDING_ROOM_CAPACITY = int(os.getenv("ONBOARDING_ROOM_CAPACITY", "1"))
+ONBOARDING_FREE_POOL_SIZE = int(os.getenv("ONBOARDING_FREE_POOL_SIZE", "1000"))
+
+# Bearer token for dashboard routes (room index, event stream, loop stacks);
+# empty leaves them disabled, since they expose identities and raw webhook bodies
+DASHBOARD_TOKEN = os.getenv("DASHBOARD_TOKEN", "")
+
+# Live event stream fan-out (/api/events/stream)
+EVENT_STREAM_MAX_SUBSCRIBERS = int(os.getenv("EVENT_STREAM_MAX_SUBSCRIBERS", "100"))
+EVENT_STREAM_BUFFER = int(os.getenv("EVENT_STREAM_BUFFER", "1000"))
+EVENT_STREAM_KEEPALIVE = float(os.getenv("EVENT_STREAM_KEEPALIVE", "15"))
+
+# Session-duration analytics: sketch accuracy and how many windows are kept
+SESSION_STATS_ACCURACY = float(os.getenv("SESSION_STATS_ACCURACY", "0.01"))
+SESSION_STATS_HOURS = int(os.getenv("SESSION_STATS_HOURS", "48"))
+SESSION_STATS_DAYS = int(os.getenv("SESSION_STATS_DAYS", "30"))
+
+# Audio analytics of finished recordings (needs numpy; ffmpeg for non-WAV files)
+AUDIO_ANALYSIS_ENABLED = os.getenv("AUDIO_ANALYSIS_ENABLED", "true").lower() == "true"
+AUDIO_ANALYSIS_WORKERS = int(os.getenv("AUDIO_ANALYSIS_WORKERS", "2"))
+AUDIO_ANALYSIS_MAX_PENDING = int(os.getenv("AUDIO_ANALYSIS_MAX_PENDING", "32"))
+AUDIO_ANALYSIS_MAX_ROOMS = int(os.getenv("AUDIO_ANALYSIS_MAX_ROOMS", "10000"))
+# Directory relative recording locations are resolved against
+AUDIO_RECORDINGS_DIR = os.getenv("AUDIO_RECORDINGS_DIR", "")
+AUDIO_FRAME_MS = float(os.getenv("AUDIO_FRAME_MS", "20"))
+AUDIO_SILENCE_DBFS = float(os.getenv("AUDIO_SILENCE_DBFS", "-50"))
+AUDIO_CHUNK_SECONDS = float(os.getenv("AUDIO_CHUNK_SECONDS", "10"))
+
+# Turn-taking latency: how agents are recognised and energy VAD tuning
+TURN_ANALYSIS_ENABLED = os.getenv("TURN_ANALYSIS_ENABLED", "true").lower() == "true"
+AGENT_IDENTITY_PREFIX = os.getenv("AGENT_IDENTITY_PREFIX", "agent")
+VAD_THRESHOLD_DBFS = float(os.getenv("VAD_THRESHOLD_DBFS", "-45"))
+VAD_NOISE_MARGIN_DB = float(os.getenv("VAD_NOISE_MARGIN_DB", "10"))
+VAD_MIN_SPEECH_MS = float(os.getenv("VAD_MIN_SPEECH_MS", "120"))
+VAD_MIN_SILENCE_MS = float(os.getenv("VAD_MIN_SILENCE_MS", "400"))
+
+# Readiness probe thresholds
+READINESS_PROBE_INTERVAL = float(os.getenv("READINESS_PROBE_INTERVAL", "1.0"))
+READINESS_MAX_LOOP_LAG = float(os.getenv("READINESS_MAX_LOOP_LAG", "0.5"))
+READINESS_MAX_QUEUE_DEPTH = int(os.getenv("READINESS_MAX_QUEUE_DEPTH", "10000"))
+READINESS_MAX_LANE_FILL = float(os.getenv("READINESS_MAX_LANE_FILL", "0.9"))
+
+# Event loop monitor
+LOOP_MONITOR_INTERVAL = float(os.getenv("LOOP_MONITOR_INTERVAL", "0.1"))
+LOOP_BLOCKED_THRESHOLD = float(os.getenv("LOOP_BLOCKED_THRESHOLD", "0.1"))
+SLOW_REQUEST_THRESHOLD = float(os.getenv("SLOW_REQUEST_THRESHOLD", "1.0"))
+LOOP_MONITOR_MAX_REPORTS = int(os.getenv("LOOP_MONITOR_MAX_REPORTS", "50"))
+
+# Token lifetime and cache configuration
+TOKEN_TTL_SECONDS = int(os.getenv("LIVEKIT_TOKEN_TTL", "21600"))
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+TOKEN_CACHE_MIN_TTL = int(os.getenv("TOKEN_CACHE_MIN_TTL", "600"))
+TOKEN_BATCH_MAX = int(os.getenv("TOKEN_BATCH_MAX", "1000"))
+TOKEN_BATCH_MAX_BODY_BYTES = int(os.getenv("TOKEN_BATCH_MAX_BODY_BYTES", str(1024 * 1024)))
+
+# Token signer: "sdk" (livekit.api.AccessToken) or "fast" (in-tree HS256 signer)
+TOKEN_SIGNER = os.getenv("TOKEN_SIGNER", "sdk").lower()
+
+# Grants given to every participant token
+DEFAULT_GRANTS = {
+    "room_join": True,
+    "can_publish": True,
+    "can_subscribe": True,
+    "can_publish_data": True,
+}
+
+
+# Logging configuration
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_BATCH_SIZE = int(os.getenv("LOG_BATCH_SIZE", "256"))
+# Comma-separated event=rate pairs; sampled events are logged at roughly that rate
+LOG_SAMPLE_RATES = os.getenv("LOG_SAMPLE_RATES", "track_published=0.1,track_unpublished=0.1")
+
+
+# Structured Logging
+
+class JsonLineFormatter(logging.Formatter):
+    """Formats a record as one JSON object, merging in its `fields` extra"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            entry.update(fields)
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json_dumps(entry, default=str).decode()
+
+
+class EventSampler(logging.Filter):
+    """Keeps one in every N records for high-volume events (by the `event` field)"""
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.every = {event: (round(1 / rate) if rate > 0 else 0) for event, rate in rates.items()}
+        self.counts: Dict[str, int] = {}
+        self.sampled_out = 0
+
+    @staticmethod
+    def parse_rates(spec: str) -> Dict[str, float]:
+        rates = {}
+        for pair in spec.split(","):
+            if "=" in pair:
+                event, rate = pair.split("=", 1)
+                rates[event.strip()] = float(rate)
+        return rates
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        event = (getattr(record, "fields", None) or {}).get("event")
+        every = self.every.get(event)
+        if every is None or record.levelno > logging.INFO:
+            return True
+        count = self.counts.get(event, 0)
+        self.counts[event] = count + 1
+        if every and count % every == 0:
+            return True
+        self.sampled_out += 1
+        return False
+
+
+class BatchingQueueHandler(logging.Handler):
+    """
+    Logging handler that never blocks the caller
+
+    `emit` only puts the record on a bounded queue; a daemon thread formats
+    and writes records in batches of up to `batch_size` lines per write.
+    When the queue is full the record is dropped and counted instead of
+    stalling the event loop on a full stdout pipe. `flush` waits for the
+    records queued so far; `close` stops the thread for good and is left
+    to logging's own shutdown at interpreter exit.
+    """
+
+    def __init__(self, stream, queue_size: int, batch_size: int):
+        super().__init__()
+        self.stream = stream
+        self.batch_size = batch_size
+        self.dropped = 0
+        self.written = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        running = True
+        while running:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if None in batch:
+                running = False
+                batch = [record for record in batch if record is not None]
+            flushed = [record for record in batch if isinstance(record, threading.Event)]
+
+            lines = []
+            for record in batch:
+                if isinstance(record, threading.Event):
+                    continue
+                try:
+                    lines.append(self.format(record))
+                except Exception:
+                    self.dropped += 1
+            if lines:
+                try:
+                    self.stream.write("\n".join(lines) + "\n")
+                    self.stream.flush()
+                    self.written += len(lines)
+                except Exception:
+                    self.dropped += len(lines)
+            for marker in flushed:
+                marker.set()
+
+    def stats(self) -> Dict[str, int]:
+        return {"queued": self._queue.qsize(), "written": self.written, "dropped": self.dropped}
+
+    def flush(self, timeout: float = 2.0):
+        """Wait until the records queued before this call have been written"""
+        if not self._thread.is_alive():
+            return
+        marker = threading.Event()
+        try:
+            self._queue.put(marker, timeout=timeout)
+        except queue.Full:
+            return
+        marker.wait(timeout)
+
+    def close(self):
+        if self._thread.is_alive():
+            try:
+                self._queue.put(None, timeout=1.0)
+            except queue.Full:
+                pass
+            self._thread.join(timeout=2.0)
+        super().close()
+
+
+log_sampler = EventSampler(EventSampler.parse_rates(LOG_SAMPLE_RATES))
+log_handler = BatchingQueueHandler(sys.stdout, LOG_QUEUE_SIZE, LOG_BATCH_SIZE)
+log_handler.setFormatter(JsonLineFormatter())
+log_handler.addFilter(log_sampler)
+
+logger = logging.getLogger("travai")
+logger.setLevel(LOG_LEVEL)
+logger.addHandler(log_handler)
+logger.propagate = False
+
+
+def log_event(level: int, msg: str, **fields: Any):
+    """Log a structured message; `fields` become top-level JSON keys"""
+    logger.log(level, msg, extra={"fields": fields})
+
+
+# Metrics
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape_label_value(str(v))}"' for k, v in labels) + "}"
+
+
+class MetricsRegistry:
+    """
+    Per-worker counters, histograms and scrape-time gauges in Prometheus text format
+
+    Updates are plain dict/list increments made from the event loop, with
+    no locks on the hot path. Each worker process keeps its own registry;
+    Prometheus aggregates across workers. Gauges are read from callbacks
+    only when /metrics is scraped.
+    """
+
+    def __init__(self):
+        self._help: Dict[str, Tuple[str, str]] = {}
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self._gauges: Dict[str, Callable[[], List[Tuple[Labels, float]]]] = {}
+
+    def counter(self, name: str, help_text: str):
+        self._help[name] = ("counter", help_text)
+        self._counters[name] = {}
+
+    def histogram(self, name: str, help_text: str):
+        self._help[name] = ("histogram", help_text)
+        self._histograms[name] = {}
+
+    def gauge(self, name: str, help_text: str, collect: Callable[[], List[Tuple[Labels, float]]]):
+        self._help[name] = ("gauge", help_text)
+        self._gauges[name] = collect
+
+    def inc(self, name: str, labels: Labels = (), value: float = 1):
+        series = self._counters[name]
+        series[labels] = series.get(labels, 0) + value
+
+    def observe(self, name: str, value: float, labels: Labels = ()):
+        series = self._histograms[name]
+        histogram = series.get(labels)
+        if histogram is None:
+            histogram = series[labels] = Histogram(LATENCY_BUCKETS)
+        histogram.observe(value)
+
+    def render(self) -> str:
+        lines = []
+        for name, (kind, help_text) in self._help.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            if kind == "counter":
+                for labels, value in list(self._counters[name].items()):
+                    lines.append(f"{name}{_format_labels(labels)} {value}")
+            elif kind == "histogram":
+                for labels, histogram in list(self._histograms[name].items()):
+                    cumulative = 0
+                    for bound, count in zip(histogram.bounds + (float("inf"),), histogram.counts):
+                        cumulative += count
+                        le = "+Inf" if bound == float("inf") else repr(bound)
+                        lines.append(f"{name}_bucket{_format_labels(labels + (('le', le),))} {cumulative}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+            else:
+                try:
+                    samples = self._gauges[name]()
+                except Exception:
+                    samples = []
+                for labels, value in samples:
+                    lines.append(f"{name}{_format_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+metrics.counter("http_requests_total", "HTTP requests by route, method and status")
+metrics.counter("http_request_errors_total", "HTTP requests that returned a 5xx status")
+metrics.histogram("http_request_duration_seconds", "HTTP request latency by route")
+metrics.histogram("webhook_handler_duration_seconds", "Webhook handler latency by event type and handler")
+metrics.counter("webhook_handler_failures_total", "Webhook handler errors and timeouts by event type")
+metrics.histogram("token_sign_duration_seconds", "Time spent signing one LiveKit token")
+metrics.histogram("event_loop_lag_seconds", "Event loop scheduling lag seen by the loop monitor ticker")
+metrics.counter("event_loop_blocked_total", "Times the event loop was blocked longer than LOOP_BLOCKED_THRESHOLD")
+metrics.counter("rate_limited_total", "Requests rejected with 429 by the rate limiter, by bucket scope")
+metrics.counter("rate_limit_fail_open_total", "Requests let through because the shared rate limit store was busy, by bucket scope")
+metrics.counter("slow_requests_total", "Requests still running after SLOW_REQUEST_THRESHOLD, by route")
+metrics.counter("webhook_payload_parses_total", "Webhook bodies fully decoded by a handler, by event type")
+
+
+# Long-lived streaming responses are not reported as slow requests
+STREAMING_PATHS = {"/api/events/stream"}
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request count, errors and latency per route template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = [500]
+        request_id = loop_monitor.request_started(scope) if scope["path"] not in STREAMING_PATHS else None
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            loop_monitor.request_finished(request_id)
+            route = scope.get("route")
+            if route is not None:
+                path = route.path
+            else:
+                # Answered before routing, e.g. by the rate limiter
+                path = scope["path"] if scope["path"] in RATE_LIMITED_PATHS else "unmatched"
+            labels = (("route", path), ("method", scope["method"]))
+            metrics.observe("http_request_duration_seconds", time.perf_counter() - started, labels)
+            metrics.inc("http_requests_total", labels + (("status", str(status[0])),))
+            if status[0] >= 500:
+                metrics.inc("http_request_errors_total", labels)
+
 
 # Pydantic Models
 class TokenRequest(BaseModel):
@@ -52,12 +537,2159 @@ class TokenResponse(BaseModel):
     url: str
 
 
+class BatchTokenRequest(BaseModel):
+    # Entries are validated one by one in the route so a malformed entry
+    # fails only itself; the body is size-capped before it is decoded
+    requests: List[Any] = Field(max_length=TOKEN_BATCH_MAX)
+
+
+class BatchTokenResult(BaseModel):
+    token: Optional[str] = None
+    error: Optional[str] = None
+
+
+class BatchTokenResponse(BaseModel):
+    url: str
+    results: List[BatchTokenResult]
+
+
+class OnboardingSessionRequest(BaseModel):
+    user_id: str
+    metadata: Optional[str] = None
+
+
+class OnboardingSessionResponse(BaseModel):
+    room_name: str
+    token: str
+    url: str
+
+
 class WebhookEvent(BaseModel):
     event: str
     room: Optional[Dict[str, Any]] = None
     participant: Optional[Dict[str, Any]] = None
 
 
+# Token Cache
+
+class TokenCache:
+    """
+    Process-local LRU cache of signed LiveKit tokens
+
+    Clients retry /api/token on every reconnect, so the same
+    (room, participant, metadata, grants) tuple is signed over and over.
+    Entries are handed back only while they have at least `min_ttl`
+    seconds of validity left; anything older is dropped on access.
+    """
+
+    def __init__(self, max_size: int, min_ttl: int):
+        self.max_size = max_size
+        self.min_ttl = min_ttl
+        self._entries: "OrderedDict[Tuple, Tuple[str, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(room_name: str, participant_name: str, metadata: Optional[str], grants: Dict[str, bool]) -> Tuple:
+        metadata_hash = hashlib.sha256(metadata.encode()).hexdigest() if metadata else ""
+        return (room_name, participant_name, metadata_hash, tuple(sorted(grants.items())))
+
+    def get(self, key: Tuple) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        jwt_token, expires_at = entry
+        if expires_at - time.time() < self.min_ttl:
+            del self._entries[key]
+            self.evictions += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return jwt_token
+
+    def put(self, key: Tuple, jwt_token: str, expires_at: float):
+        if self.max_size <= 0:
+            return
+        self._entries[key] = (jwt_token, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+token_cache = TokenCache(TOKEN_CACHE_SIZE, TOKEN_CACHE_MIN_TTL)
+
+
+# Fast Token Signer
+
+def _b64url(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _snake_to_lower_camel(name: str) -> str:
+    first, *rest = name.split("_")
+    return "".join([first.lower(), *map(str.title, rest)])
+
+
+class FastTokenSigner:
+    """
+    In-tree HS256 signer producing the same JWT as api.AccessToken.to_jwt()
+
+    Skips the AccessToken/VideoGrants object graph and the generic JWT
+    encoder: the header segment is encoded once, the grant claims are
+    templated from the SDK's VideoGrants defaults, and each token copies a
+    precomputed HMAC-SHA256 key context instead of re-keying.
+    """
+
+    def __init__(self, api_key: str, api_secret: str):
+        self.api_key = api_key
+        self._mac = hmac.new(api_secret.encode(), digestmod=hashlib.sha256)
+        header = json.dumps({"alg": "HS256", "typ": "JWT"}, separators=(",", ":"), sort_keys=True)
+        self._header_segment = _b64url(header.encode()) + "."
+
+        grants = api.VideoGrants(room="", **DEFAULT_GRANTS)
+        self._video_template = {
+            _snake_to_lower_camel(k): v for k, v in dataclasses.asdict(grants).items()
+        }
+        self._sip_template = None
+        if hasattr(api, "SIPGrants"):
+            self._sip_template = {
+                _snake_to_lower_camel(k): v for k, v in dataclasses.asdict(api.SIPGrants()).items()
+            }
+
+    def sign(self, room_name: str, participant_name: str, metadata: Optional[str], ttl: int, now: Optional[int] = None) -> str:
+        if not participant_name or not room_name:
+            raise ValueError("identity and room must be set when joining a room")
+
+        if now is None:
+            now = int(time.time())
+
+        video = dict(self._video_template)
+        video["room"] = room_name
+
+        # AccessToken carries the identity in `sub`; its `identity` claim stays empty
+        claims: Dict[str, Any] = {"identity": "", "name": participant_name, "video": video}
+        if self._sip_template is not None:
+            claims["sip"] = dict(self._sip_template)
+        claims["metadata"] = metadata or ""
+        claims["sha256"] = ""
+        claims["sub"] = participant_name
+        claims["iss"] = self.api_key
+        claims["nbf"] = now
+        claims["exp"] = now + ttl
+
+        # Same encoding as PyJWT (ASCII-escaped), so non-ASCII names sign identically
+        signing_input = self._header_segment + _b64url(json.dumps(claims, separators=(",", ":")).encode())
+        mac = self._mac.copy()
+        mac.update(signing_input.encode())
+        return signing_input + "." + _b64url(mac.digest())
+
+
+_fast_signer: Optional[FastTokenSigner] = None
+
+
+def get_fast_signer() -> FastTokenSigner:
+    """Return the shared fast signer, rebuilding it if credentials changed"""
+    global _fast_signer
+    if _fast_signer is None or _fast_signer.api_key != LIVEKIT_API_KEY:
+        _fast_signer = FastTokenSigner(LIVEKIT_API_KEY, LIVEKIT_API_SECRET)
+    return _fast_signer
+
+
+# Webhook Token Verification
+
+def _b64url_decode(segment: str) -> bytes:
+    return base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+
+
+class WebhookTokenVerifier:
+    """
+    Verifies LiveKit's webhook Authorization JWT
+
+    LiveKit signs each delivery with an HS256 JWT issued by the API key
+    whose `sha256` claim is the base64 SHA-256 of the body. The HMAC key
+    context is precomputed, and tokens that already verified are cached
+    with their claim and expiry; LiveKit reuses the token when it retries a
+    delivery, so a retry costs a dict lookup plus the body hash.
+    """
+
+    def __init__(self, api_key: str, api_secret: str, leeway: int, cache_size: int):
+        self.api_key = api_key
+        self.leeway = leeway
+        self.cache_size = cache_size
+        self.cache_hits = 0
+        self._mac = hmac.new(api_secret.encode(), digestmod=hashlib.sha256)
+        self._verified: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+
+    def verify(self, auth_header: str, body_sha256: str) -> bool:
+        token = auth_header[7:] if auth_header.startswith("Bearer ") else auth_header
+        now = time.time()
+
+        entry = self._verified.get(token)
+        if entry is not None:
+            claim, expires_at = entry
+            if expires_at and now > expires_at + self.leeway:
+                del self._verified[token]
+                return False
+            self.cache_hits += 1
+            return hmac.compare_digest(claim, body_sha256)
+
+        claims = self._decode(token, now)
+        if claims is None:
+            return False
+
+        claim = str(claims.get("sha256", ""))
+        self._verified[token] = (claim, float(claims.get("exp") or 0))
+        if len(self._verified) > self.cache_size:
+            self._verified.popitem(last=False)
+        return hmac.compare_digest(claim, body_sha256)
+
+    def _decode(self, token: str, now: float) -> Optional[Dict[str, Any]]:
+        try:
+            header_segment, payload_segment, signature_segment = token.split(".")
+            if json_loads(_b64url_decode(header_segment)).get("alg") != "HS256":
+                return None
+
+            mac = self._mac.copy()
+            mac.update(f"{header_segment}.{payload_segment}".encode())
+            if not hmac.compare_digest(mac.digest(), _b64url_decode(signature_segment)):
+                return None
+
+            claims = json_loads(_b64url_decode(payload_segment))
+        except (ValueError, TypeError, AttributeError):
+            return None
+
+        if claims.get("iss") != self.api_key:
+            return None
+        if claims.get("exp") and now > claims["exp"] + self.leeway:
+            return None
+        if claims.get("nbf") and now < claims["nbf"] - self.leeway:
+            return None
+        return claims
+
+
+_webhook_token_verifier: Optional[WebhookTokenVerifier] = None
+
+
+def get_webhook_token_verifier() -> WebhookTokenVerifier:
+    """Return the shared webhook token verifier, rebuilding it if credentials changed"""
+    global _webhook_token_verifier
+    if _webhook_token_verifier is None or _webhook_token_verifier.api_key != LIVEKIT_API_KEY:
+        _webhook_token_verifier = WebhookTokenVerifier(
+            LIVEKIT_API_KEY, LIVEKIT_API_SECRET, WEBHOOK_TOKEN_LEEWAY, WEBHOOK_TOKEN_CACHE_SIZE
+        )
+    return _webhook_token_verifier
+
+
+# Token Signing Pool
+
+class SigningPoolSaturated(Exception):
+    """Raised when the signing pool's wait queue is full"""
+
+
+class AdaptiveSigningPool:
+    """
+    Bounded thread pool that keeps token signing off the event loop
+
+    At most `limit` jobs run at once; up to `max_queue` more wait on the
+    loop, and anything beyond that is rejected with SigningPoolSaturated
+    so the route can answer 503 instead of piling up. `limit` moves between
+    `min_workers` and `max_workers` based on an EWMA of how long jobs wait
+    for a slot: it grows while waits exceed `target_wait` and shrinks when
+    the pool is mostly idle.
+    """
+
+    def __init__(self, min_workers: int, max_workers: int, max_queue: int, target_wait: float):
+        self.min_workers = max(1, min_workers)
+        self.max_workers = max(self.min_workers, max_workers)
+        self.max_queue = max_queue
+        self.target_wait = target_wait
+        self.limit = self.min_workers
+        self.running = 0
+        self.rejected = 0
+        self.completed = 0
+        self.avg_wait = 0.0
+        self._waiters: deque = deque()
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="token-signer"
+        )
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        queued_at = time.perf_counter()
+        await self._acquire()
+        self._adapt(time.perf_counter() - queued_at)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self.completed += 1
+            self._release()
+
+    async def _acquire(self):
+        if self.running < self.limit and not self._waiters:
+            self.running += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            self.rejected += 1
+            raise SigningPoolSaturated(f"Token signing queue is full ({self.max_queue} waiting)")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            # The releasing job hands its slot over, so `running` already counts us
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self._release()
+            else:
+                self._waiters.remove(waiter)
+            raise
+
+    def _release(self):
+        if self.running <= self.limit:
+            while self._waiters:
+                waiter = self._waiters.popleft()
+                if not waiter.done():
+                    waiter.set_result(None)
+                    return
+        self.running -= 1
+
+    def _adapt(self, wait: float):
+        self.avg_wait = 0.9 * self.avg_wait + 0.1 * wait
+        if self.avg_wait > self.target_wait and self.limit < self.max_workers:
+            self.limit += 1
+            # Hand the new slot to a waiter right away
+            while self._waiters and self.running < self.limit:
+                waiter = self._waiters.popleft()
+                if not waiter.done():
+                    self.running += 1
+                    waiter.set_result(None)
+        elif self.avg_wait < self.target_wait / 4 and self.limit > self.min_workers and self.running < self.limit // 2:
+            self.limit -= 1
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "running": self.running,
+            "waiting": self.waiting,
+            "max_queue": self.max_queue,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_wait_ms": round(self.avg_wait * 1000, 3),
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+signing_pool: Optional[AdaptiveSigningPool] = None
+
+
+def signing_unavailable(e: SigningPoolSaturated) -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail=str(e),
+        headers={"Retry-After": str(SIGNING_RETRY_AFTER)},
+    )
+
+
+@app.on_event("startup")
+async def start_signing_pool():
+    """Create the signing pool; each lifespan gets its own executor"""
+    global signing_pool
+    signing_pool = AdaptiveSigningPool(
+        SIGNING_POOL_MIN_WORKERS, SIGNING_POOL_MAX_WORKERS, SIGNING_POOL_MAX_QUEUE, SIGNING_POOL_TARGET_WAIT
+    )
+
+
+@app.on_event("shutdown")
+async def stop_signing_pool():
+    """Release the signing threads"""
+    if signing_pool is not None:
+        signing_pool.shutdown()
+
+
+# Rate Limiting
+
+class TokenBucketLimiter:
+    """
+    Per-key token buckets with lazy refill, in an LRU-capped table
+
+    A bucket is just [tokens, updated_at]; it is refilled from the elapsed
+    time when it is next checked, so there is no background work. The
+    least recently used keys are dropped once `max_keys` is exceeded (a
+    dropped key simply starts again with a full bucket).
+    """
+
+    def __init__(self, rate: float, burst: float, max_keys: int):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, List[float]]" = OrderedDict()
+
+    def allow(self, key: str) -> Tuple[bool, float]:
+        """Take one token for `key`; returns (allowed, seconds until a token is available)"""
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [self.burst, now]
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            return True, 0.0
+        return False, (1 - bucket[0]) / self.rate if self.rate > 0 else 60.0
+
+
+class SqliteTokenBucketLimiter:
+    """
+    Token buckets in a SQLite file shared by all workers on a host
+
+    Same contract as TokenBucketLimiter. Each check is one short
+    IMMEDIATE transaction on the event loop, so the wait for the write lock
+    is capped at `timeout`; when another worker holds it longer (or the file
+    errors), the request is let through and counted as failing open rather
+    than stalling the loop or answering 500. Idle buckets are purged every
+    few thousand calls.
+    """
+
+    def __init__(self, path: str, scope: str, rate: float, burst: float, timeout: float):
+        self.scope = scope
+        self.rate = rate
+        self.burst = burst
+        self.failed_open = 0
+        self._calls = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=timeout)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=OFF")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limit_buckets "
+            "(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+
+    def allow(self, key: str) -> Tuple[bool, float]:
+        key = f"{self.scope}:{key}"
+        now = time.time()
+        with self._lock:
+            try:
+                allowed, tokens = self._take(key, now)
+            except sqlite3.Error as e:
+                self.failed_open += 1
+                metrics.inc("rate_limit_fail_open_total", (("scope", self.scope),))
+                log_event(logging.WARNING, "Rate limit store unavailable, allowing request", scope=self.scope, error=str(e))
+                return True, 0.0
+        if allowed:
+            return True, 0.0
+        return False, (1 - tokens) / self.rate if self.rate > 0 else 60.0
+
+    def _take(self, key: str, now: float) -> Tuple[bool, float]:
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = self._conn.execute(
+                "SELECT tokens, updated_at FROM rate_limit_buckets WHERE key = ?", (key,)
+            ).fetchone()
+            tokens = self.burst if row is None else min(self.burst, row[0] + (now - row[1]) * self.rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._conn.execute(
+                "INSERT OR REPLACE INTO rate_limit_buckets (key, tokens, updated_at) VALUES (?, ?, ?)",
+                (key, tokens, now),
+            )
+            self._calls += 1
+            if self._calls % 5000 == 0 and self.rate > 0:
+                self._conn.execute(
+                    "DELETE FROM rate_limit_buckets WHERE updated_at < ?",
+                    (now - self.burst / self.rate * 2,),
+                )
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+        return allowed, tokens
+
+
+def make_limiter(scope: str, rate: float, burst: float):
+    if RATE_LIMIT_SHARED_PATH:
+        return SqliteTokenBucketLimiter(RATE_LIMIT_SHARED_PATH, scope, rate, burst, RATE_LIMIT_SHARED_TIMEOUT)
+    return TokenBucketLimiter(rate, burst, RATE_LIMIT_MAX_KEYS)
+
+
+ip_limiter = make_limiter("ip", RATE_LIMIT_IP_RATE, RATE_LIMIT_IP_BURST)
+participant_limiter = make_limiter("participant", RATE_LIMIT_PARTICIPANT_RATE, RATE_LIMIT_PARTICIPANT_BURST)
+
+# Paths that are rate limited, and the JSON field naming the participant (if any).
+# Batch entries are charged to their participants one by one in the route.
+RATE_LIMITED_PATHS = {
+    "/api/token": b"participant_name",
+    "/api/onboarding/session": b"user_id",
+    "/api/tokens:batch": None,
+}
+
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware answering 429 for token endpoints before any validation
+
+    The client-address bucket is checked from the connection scope alone.
+    The participant bucket reads the request body (413 beyond
+    RATE_LIMIT_MAX_BODY_BYTES) and picks the participant field out with a
+    regex instead of parsing JSON; the body is then replayed to the app
+    unchanged. The bucket must be the identity that gets signed, so a
+    repeated field is rejected with 400, and a body with \\u escapes (the
+    only way to spell the field name or value differently) is decoded.
+    """
+
+    _TOO_MANY = b'{"detail":"Rate limit exceeded"}'
+    _TOO_LARGE = b'{"detail":"Request body too large"}'
+    _DUPLICATE = b'{"detail":"Duplicate participant field"}'
+
+    def __init__(self, app):
+        self.app = app
+        self.ip_limiter = ip_limiter
+        self.participant_limiter = participant_limiter
+        self._field_patterns = {
+            field: re.compile(rb'"' + field + rb'"\s*:\s*"((?:[^"\\]|\\.)*)"')
+            for field in RATE_LIMITED_PATHS.values() if field
+        }
+
+    async def __call__(self, scope, receive, send):
+        if (
+            not RATE_LIMIT_ENABLED
+            or scope["type"] != "http"
+            or scope["method"] != "POST"
+            or scope["path"] not in RATE_LIMITED_PATHS
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        allowed, retry_after = self.ip_limiter.allow(self._client_address(scope))
+        if not allowed:
+            await self._reject(send, "ip", retry_after)
+            return
+
+        field = RATE_LIMITED_PATHS[scope["path"]]
+        if field is None:
+            await self.app(scope, receive, send)
+            return
+
+        body = await self._read_body(scope, receive, RATE_LIMIT_MAX_BODY_BYTES)
+        if body is None:
+            await self._respond(send, 413, self._TOO_LARGE)
+            return
+        try:
+            participant = self._participant(field, body)
+        except ValueError:
+            await self._respond(send, 400, self._DUPLICATE)
+            return
+        if participant is not None:
+            allowed, retry_after = self.participant_limiter.allow(participant)
+            if not allowed:
+                await self._reject(send, "participant", retry_after)
+                return
+
+        replayed = False
+
+        async def replay():
+            nonlocal replayed
+            if not replayed:
+                replayed = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        await self.app(scope, replay, send)
+
+    def _participant(self, field: bytes, body: bytes) -> Optional[str]:
+        """The participant the app will see, None if absent; ValueError when the field repeats"""
+        if b"\\u" in body:
+            # Decode exactly as the route will: escapes resolved, last duplicate wins
+            try:
+                value = json_loads(body).get(field.decode())
+            except (ValueError, AttributeError):
+                return None  # The route answers 422
+            return value if isinstance(value, str) else None
+        matches = self._field_patterns[field].findall(body)
+        if len(matches) > 1:
+            raise ValueError("duplicate participant field")
+        if not matches:
+            return None
+        try:
+            return json_loads(b'"' + matches[0] + b'"')
+        except ValueError:
+            return matches[0].decode(errors="replace")
+
+    @staticmethod
+    def _client_address(scope) -> str:
+        if RATE_LIMIT_TRUST_FORWARDED:
+            for name, value in scope.get("headers", []):
+                if name == b"x-forwarded-for":
+                    return value.split(b",")[0].strip().decode(errors="replace")
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    @staticmethod
+    async def _read_body(scope, receive, limit: int) -> Optional[bytes]:
+        """The request body, or None as soon as it is known to exceed `limit`"""
+        for name, value in scope.get("headers", []):
+            if name == b"content-length" and value.isdigit() and int(value) > limit:
+                return None
+        chunks = []
+        size = 0
+        while True:
+            message = await receive()
+            if message["type"] != "http.request":
+                # Client went away; the app sees whatever arrived
+                return b"".join(chunks)
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if size > limit:
+                return None
+            chunks.append(chunk)
+            if not message.get("more_body", False):
+                return b"".join(chunks)
+
+    async def _reject(self, send, scope_name: str, retry_after: float):
+        metrics.inc("rate_limited_total", (("scope", scope_name),))
+        await self._respond(send, 429, self._TOO_MANY, [(b"retry-after", str(max(1, int(retry_after + 0.999))).encode())])
+
+    @staticmethod
+    async def _respond(send, status: int, body: bytes, headers: Optional[List[Tuple[bytes, bytes]]] = None):
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                *(headers or []),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+# Middleware, innermost first: 429/413 answers from the rate limiter still
+# pass through the metrics and CORS layers
+app.add_middleware(RateLimitMiddleware)
+app.add_middleware(MetricsMiddleware)
+
+# CORS configuration - update origins in production
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],  # Update with your mobile app's domain in production
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+
+# Webhook Queue
+
+class WebhookQueue:
+    """
+    Durable local queue of verified webhook bodies backed by SQLite (WAL)
+
+    The webhook route appends the raw body and acknowledges LiveKit right
+    away; `drain_webhook_queue` applies events to the handlers afterwards.
+    Fetched rows are marked 'inflight' and deleted only once their handlers
+    succeed. Anything still in flight when the process dies goes back to
+    'pending' on restart (at-least-once). Rows that keep failing are parked
+    as 'dead'.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS webhook_events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                body BLOB NOT NULL,
+                received_at REAL NOT NULL,
+                available_at REAL NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                status TEXT NOT NULL DEFAULT 'pending',
+                last_error TEXT
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_webhook_events_pending "
+            "ON webhook_events (status, available_at, id)"
+        )
+        # Events that were being handled when the process stopped
+        self._conn.execute("UPDATE webhook_events SET status = 'pending' WHERE status = 'inflight'")
+        self.wakeup = asyncio.Event()
+
+    def enqueue(self, body: bytes) -> int:
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO webhook_events (body, received_at, available_at) VALUES (?, ?, ?)",
+                (body, now, now),
+            )
+        self.wakeup.set()
+        return cursor.lastrowid
+
+    def fetch(self, limit: int) -> List[Tuple[int, bytes, int]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, body, attempts FROM webhook_events "
+                "WHERE status = 'pending' AND available_at <= ? ORDER BY id LIMIT ?",
+                (time.time(), limit),
+            ).fetchall()
+            if rows:
+                self._conn.executemany(
+                    "UPDATE webhook_events SET status = 'inflight' WHERE id = ?",
+                    [(row[0],) for row in rows],
+                )
+            return rows
+
+    def ack(self, event_id: int):
+        with self._lock:
+            self._conn.execute("DELETE FROM webhook_events WHERE id = ?", (event_id,))
+
+    def bury(self, event_id: int, attempts: int, error: str):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE webhook_events SET attempts = ?, status = 'dead', last_error = ? WHERE id = ?",
+                (attempts, error, event_id),
+            )
+
+    def depth(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*) FROM webhook_events GROUP BY status"
+            ).fetchall()
+        counts = {"pending": 0, "inflight": 0, "dead": 0}
+        counts.update(dict(rows))
+        return counts
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# Webhook Dedup
+
+_EVENT_ID_PATTERN = re.compile(rb'"id"\s*:\s*"(EV_[^"]+)"')
+
+
+class WebhookDeduplicator:
+    """
+    Time-bounded index of webhook event IDs that have already been accepted
+
+    LiveKit redelivers events it did not see acknowledged. The key is the
+    event `id` picked out of the raw body with a regex (no JSON parsing),
+    or a SHA-256 of the body when there is none. Keys live for `ttl`
+    seconds in an insertion-ordered dict capped at `max_size`, optionally
+    mirrored to SQLite so the window survives restarts. Keys that age out
+    of the dict are deleted from SQLite in the same write as the new key,
+    so the table stays as small as the in-memory window.
+    """
+
+    def __init__(self, ttl: float, max_size: int, path: str = ""):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.duplicates = 0
+        self._seen: "OrderedDict[str, float]" = OrderedDict()
+        self._conn = None
+
+        if path:
+            self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS webhook_dedup (key TEXT PRIMARY KEY, seen_at REAL NOT NULL)"
+            )
+            cutoff = time.time() - ttl
+            self._conn.execute("DELETE FROM webhook_dedup WHERE seen_at < ?", (cutoff,))
+            rows = self._conn.execute(
+                "SELECT key, seen_at FROM webhook_dedup ORDER BY seen_at DESC LIMIT ?", (max_size,)
+            ).fetchall()
+            for key, seen_at in reversed(rows):
+                self._seen[key] = seen_at
+
+    @staticmethod
+    def event_key(body: bytes) -> str:
+        match = _EVENT_ID_PATTERN.search(body)
+        if match:
+            return match.group(1).decode()
+        return "sha256:" + hashlib.sha256(body).hexdigest()
+
+    def _expire(self, now: float) -> List[str]:
+        cutoff = now - self.ttl
+        expired = []
+        while self._seen:
+            key, seen_at = next(iter(self._seen.items()))
+            if seen_at >= cutoff and len(self._seen) <= self.max_size:
+                break
+            self._seen.popitem(last=False)
+            expired.append(key)
+        return expired
+
+    def is_duplicate(self, key: str) -> bool:
+        seen_at = self._seen.get(key)
+        if seen_at is not None and seen_at >= time.time() - self.ttl:
+            self.duplicates += 1
+            return True
+        return False
+
+    def add(self, key: str):
+        now = time.time()
+        self._seen.pop(key, None)
+        self._seen[key] = now
+        expired = self._expire(now)
+        if self._conn is not None:
+            self._conn.execute("BEGIN")
+            try:
+                if expired:
+                    self._conn.executemany("DELETE FROM webhook_dedup WHERE key = ?", [(k,) for k in expired])
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO webhook_dedup (key, seen_at) VALUES (?, ?)", (key, now)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "tracked": len(self._seen),
+            "duplicates_suppressed": self.duplicates,
+            "ttl_seconds": self.ttl,
+            "persistent": self._conn is not None,
+        }
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+
+
+webhook_queue: Optional[WebhookQueue] = None
+webhook_dedup: Optional[WebhookDeduplicator] = None
+webhook_executor: Optional["KeyedExecutor"] = None
+_webhook_consumer: Optional[asyncio.Task] = None
+
+
+@app.on_event("startup")
+async def start_webhook_consumer():
+    """Rebuild state from the event log, open the webhook queue and start draining"""
+    global webhook_queue, webhook_dedup, webhook_executor, _webhook_consumer
+    open_event_log()
+    webhook_queue = WebhookQueue(WEBHOOK_QUEUE_PATH)
+    webhook_dedup = WebhookDeduplicator(WEBHOOK_DEDUP_TTL, WEBHOOK_DEDUP_SIZE, WEBHOOK_DEDUP_PATH)
+    webhook_executor = KeyedExecutor(WEBHOOK_LANES, WEBHOOK_LANE_QUEUE_SIZE)
+    webhook_executor.start()
+    _webhook_consumer = asyncio.create_task(drain_webhook_queue())
+    _webhook_consumer.add_done_callback(report_consumer_exit)
+
+
+def report_consumer_exit(task: asyncio.Task):
+    if not task.cancelled() and task.exception() is not None:
+        log_event(logging.CRITICAL, "Webhook queue consumer stopped", error=repr(task.exception()))
+
+
+@app.on_event("shutdown")
+async def stop_webhook_consumer():
+    """Stop the consumer; undelivered events stay in the queue for the next start"""
+    try:
+        if _webhook_consumer is not None:
+            _webhook_consumer.cancel()
+            await _webhook_consumer
+    except asyncio.CancelledError:
+        pass
+    except Exception as e:
+        # A consumer that died must not skip the rest of the teardown
+        log_event(logging.ERROR, "Webhook queue consumer had failed", error=repr(e))
+    finally:
+        if webhook_executor is not None:
+            await webhook_executor.stop()
+        if webhook_queue is not None:
+            webhook_queue.close()
+        if webhook_dedup is not None:
+            webhook_dedup.close()
+        close_event_log()
+
+
+# Room State Index
+
+class TrackState:
+    __slots__ = ("sid", "type", "source", "name", "muted", "published_at")
+
+    def __init__(self, sid: str, type: str = "", source: str = "", name: str = "", muted: bool = False, published_at: float = 0.0):
+        self.sid = sid
+        self.type = type
+        self.source = source
+        self.name = name
+        self.muted = muted
+        self.published_at = published_at
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+
+class ParticipantState:
+    __slots__ = ("sid", "identity", "name", "joined_at", "tracks")
+
+    def __init__(self, sid: str, identity: str = "", name: str = "", joined_at: float = 0.0):
+        self.sid = sid
+        self.identity = identity
+        self.name = name
+        self.joined_at = joined_at
+        self.tracks: Dict[str, TrackState] = {}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "sid": self.sid,
+            "identity": self.identity,
+            "name": self.name,
+            "joined_at": self.joined_at,
+            "tracks": [track.to_dict() for track in self.tracks.values()],
+        }
+
+
+class RoomState:
+    __slots__ = ("sid", "name", "started_at", "participants")
+
+    def __init__(self, sid: str, name: str, started_at: float = 0.0):
+        self.sid = sid
+        self.name = name
+        self.started_at = started_at
+        self.participants: Dict[str, ParticipantState] = {}
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "sid": self.sid,
+            "name": self.name,
+            "started_at": self.started_at,
+            "num_participants": len(self.participants),
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**self.summary(), "participants": [p.to_dict() for p in self.participants.values()]}
+
+
+def event_timestamp(payload: Mapping[str, Any]) -> float:
+    """When LiveKit emitted an event (its `createdAt`), so redeliveries and replays keep their time"""
+    try:
+        return float(payload.get("createdAt") or time.time())
+    except (TypeError, ValueError):
+        return time.time()
+
+
+class RoomIndex:
+    """
+    In-process view of live rooms, participants and published tracks
+
+    Maintained from webhook events so dashboards can ask "who is in which
+    room" without polling LiveKit's RoomService. Rooms are keyed by name,
+    participants and tracks by sid. Events that arrive before their room's
+    room_started create the room on the fly. Timestamps come from the
+    event's `createdAt`, so replaying the event log rebuilds them as they were.
+    """
+
+    EVENTS = (
+        "room_started", "room_finished", "participant_joined",
+        "participant_left", "track_published", "track_unpublished",
+    )
+
+    def __init__(self):
+        self.rooms: Dict[str, RoomState] = {}
+
+    def apply(self, payload: Mapping[str, Any]) -> bool:
+        """Apply one webhook event; returns False for events the index ignores"""
+        event_type = payload.get("event")
+        if event_type not in self.EVENTS:
+            return False
+        getattr(self, event_type)(payload)
+        return True
+
+    def _room(self, payload: Mapping[str, Any], now: float) -> Optional[RoomState]:
+        name = payload_field(payload, "room", "name")
+        if not name:
+            return None
+        state = self.rooms.get(name)
+        if state is None:
+            state = RoomState(payload_field(payload, "room", "sid", ""), name, now)
+            self.rooms[name] = state
+        elif not state.sid:
+            state.sid = payload_field(payload, "room", "sid", "")
+        return state
+
+    def _participant(self, payload: Mapping[str, Any], now: float) -> Optional[ParticipantState]:
+        room = self._room(payload, now)
+        sid = payload_field(payload, "participant", "sid")
+        if room is None or not sid:
+            return None
+        state = room.participants.get(sid)
+        if state is None:
+            state = ParticipantState(
+                sid, payload_field(payload, "participant", "identity", ""), payload_field(payload, "participant", "name", ""), now
+            )
+            room.participants[sid] = state
+        return state
+
+    def room_started(self, payload: Mapping[str, Any]):
+        self._room(payload, event_timestamp(payload))
+
+    def room_finished(self, payload: Mapping[str, Any]):
+        self.rooms.pop(payload_field(payload, "room", "name"), None)
+
+    def participant_joined(self, payload: Mapping[str, Any]):
+        self._participant(payload, event_timestamp(payload))
+
+    def participant_left(self, payload: Mapping[str, Any]):
+        room = self.rooms.get(payload_field(payload, "room", "name"))
+        if room is not None:
+            room.participants.pop(payload_field(payload, "participant", "sid"), None)
+
+    def track_published(self, payload: Mapping[str, Any]):
+        now = event_timestamp(payload)
+        participant = self._participant(payload, now)
+        sid = payload_field(payload, "track", "sid")
+        if participant is not None and sid:
+            participant.tracks[sid] = TrackState(
+                sid,
+                payload_field(payload, "track", "type", ""),
+                payload_field(payload, "track", "source", ""),
+                payload_field(payload, "track", "name", ""),
+                bool(payload_field(payload, "track", "muted", False)),
+                now,
+            )
+
+    def track_unpublished(self, payload: Mapping[str, Any]):
+        room = self.rooms.get(payload_field(payload, "room", "name"))
+        participant_sid = payload_field(payload, "participant", "sid")
+        if room is not None and participant_sid in room.participants:
+            room.participants[participant_sid].tracks.pop(payload_field(payload, "track", "sid"), None)
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        return [room.to_dict() for room in self.rooms.values()]
+
+    def restore(self, rooms: List[Dict[str, Any]]):
+        self.rooms = {}
+        for room in rooms:
+            room_state = RoomState(room["sid"], room["name"], room["started_at"])
+            for participant in room["participants"]:
+                participant_state = ParticipantState(
+                    participant["sid"], participant["identity"], participant["name"], participant["joined_at"]
+                )
+                for track in participant["tracks"]:
+                    participant_state.tracks[track["sid"]] = TrackState(**track)
+                room_state.participants[participant_state.sid] = participant_state
+            self.rooms[room_state.name] = room_state
+
+
+room_index = RoomIndex()
+
+
+# Event Log
+
+class EventLog:
+    """
+    Segmented append-only log of webhook bodies, with compacted snapshots
+
+    Records are one JSON body per line; a record's sequence number is the
+    first sequence in its segment's file name plus its line. Segments roll
+    over at `segment_bytes` and at every snapshot, so all segments before a
+    snapshot are immutable. A snapshot stores the room index (latest state
+    per room and participant) as of a sequence number; once it is on disk
+    the segments it covers are deleted. Recovery loads the newest snapshot
+    and replays only the tail, so startup time is bounded by
+    `snapshot_every`, not by history.
+    """
+
+    def __init__(self, directory: str, segment_bytes: int, snapshot_every: int, fsync: bool = False):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.snapshot_every = snapshot_every
+        self.fsync = fsync
+        self.next_seq = 1
+        self.snapshot_seq = 0
+        self.since_snapshot = 0
+        self.replayed = 0
+        self.snapshotting = False
+        self._segment = None
+        self._segment_size = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _segments(self) -> List[Tuple[int, str]]:
+        names = [name for name in os.listdir(self.directory) if name.endswith(".log")]
+        return sorted((int(name[:-4]), os.path.join(self.directory, name)) for name in names)
+
+    def _snapshots(self) -> List[Tuple[int, str]]:
+        names = [
+            name for name in os.listdir(self.directory)
+            if name.startswith("snapshot-") and name.endswith(".json")
+        ]
+        return sorted((int(name[9:-5]), os.path.join(self.directory, name)) for name in names)
+
+    def recover(self, restore: Callable[[Any], None], apply: Callable[[bytes], None]) -> int:
+        """Load the newest snapshot, replay records after it and open a fresh segment"""
+        snapshots = self._snapshots()
+        if snapshots:
+            self.snapshot_seq, path = snapshots[-1]
+            with open(path, "rb") as f:
+                restore(json_loads(f.read())["state"])
+        self.next_seq = self.snapshot_seq + 1
+
+        for first_seq, path in self._segments():
+            with open(path, "rb+") as f:
+                seq = first_seq
+                offset = 0
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        # Torn write from a crash: drop the partial record
+                        f.truncate(offset)
+                        break
+                    offset += len(line)
+                    if seq > self.snapshot_seq:
+                        apply(line)
+                        self.replayed += 1
+                    seq += 1
+            self.next_seq = max(self.next_seq, seq)
+
+        self.since_snapshot = self.next_seq - 1 - self.snapshot_seq
+        self._roll()
+        return self.replayed
+
+    def _roll(self):
+        if self._segment is not None:
+            self._segment.close()
+        path = os.path.join(self.directory, f"{self.next_seq:016d}.log")
+        self._segment = open(path, "ab")
+        self._segment_size = 0
+
+    def append(self, body: bytes) -> int:
+        # Newlines can only be insignificant whitespace in JSON
+        record = bytes(body).replace(b"\n", b" ").replace(b"\r", b" ") + b"\n"
+        if self._segment_size and self._segment_size + len(record) > self.segment_bytes:
+            self._roll()
+        self._segment.write(record)
+        self._segment_size += len(record)
+        seq = self.next_seq
+        self.next_seq += 1
+        self.since_snapshot += 1
+        return seq
+
+    def flush(self):
+        self._segment.flush()
+        if self.fsync:
+            os.fsync(self._segment.fileno())
+
+    def snapshot_due(self) -> bool:
+        return not self.snapshotting and self.since_snapshot >= self.snapshot_every
+
+    def begin_snapshot(self) -> int:
+        """Seal the current segment; the state captured now is as of the returned sequence"""
+        self.flush()
+        seq = self.next_seq - 1
+        self._roll()
+        self.snapshotting = True
+        self.since_snapshot = 0
+        return seq
+
+    def write_snapshot(self, seq: int, state: Any):
+        """Persist a snapshot and compact; safe to run off the event loop"""
+        try:
+            path = os.path.join(self.directory, f"snapshot-{seq:016d}.json")
+            with open(path + ".tmp", "wb") as f:
+                f.write(json_dumps({"seq": seq, "state": state}))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(path + ".tmp", path)
+            self.snapshot_seq = seq
+
+            for snapshot_seq, snapshot_path in self._snapshots():
+                if snapshot_seq < seq:
+                    os.remove(snapshot_path)
+            segments = self._segments()
+            for (first_seq, segment_path), (next_first, _) in zip(segments, segments[1:]):
+                if next_first - 1 <= seq:
+                    os.remove(segment_path)
+        finally:
+            self.snapshotting = False
+
+    def stats(self) -> Dict[str, Any]:
+        segments = self._segments()
+        return {
+            "directory": self.directory,
+            "segments": len(segments),
+            "bytes": sum(os.path.getsize(path) for _, path in segments),
+            "last_seq": self.next_seq - 1,
+            "snapshot_seq": self.snapshot_seq,
+            "since_snapshot": self.since_snapshot,
+            "replayed_at_startup": self.replayed,
+        }
+
+    def close(self):
+        if self._segment is not None:
+            self.flush()
+            self._segment.close()
+            self._segment = None
+
+
+event_log: Optional[EventLog] = None
+event_log_error: Optional[str] = None
+
+
+def replay_event(line: bytes):
+    """Re-apply one logged event to the room index"""
+    event = WebhookEventView(line)
+    try:
+        if event.event in RoomIndex.EVENTS:
+            room_index.apply(event)
+    except ValueError as e:
+        log_event(logging.WARNING, "Skipping undecodable event log record", error=str(e))
+
+
+def disable_event_log(message: str, error: Exception):
+    """
+    Stop logging events after a recovery or write failure
+
+    The files are left as they are for inspection. The room index carries
+    on from live events, but a log with a gap could not be replayed into
+    the same state, so nothing more is appended until the next start.
+    """
+    global event_log, event_log_error
+    log_event(logging.ERROR, message, error=repr(error))
+    event_log_error = f"{message}: {error!r}"
+    log, event_log = event_log, None
+    if log is not None:
+        try:
+            log.close()
+        except OSError:
+            pass
+
+
+def open_event_log():
+    """Open the event log and rebuild the room index from its snapshot and tail"""
+    global event_log, event_log_error
+    if not EVENT_LOG_DIR:
+        return
+    started = time.perf_counter()
+    event_log_error = None
+    try:
+        event_log = EventLog(EVENT_LOG_DIR, EVENT_LOG_SEGMENT_BYTES, EVENT_LOG_SNAPSHOT_EVERY, EVENT_LOG_FSYNC)
+        replayed = event_log.recover(room_index.restore, replay_event)
+    except Exception as e:
+        # A half-restored index is worse than an empty one
+        room_index.restore([])
+        disable_event_log("Error recovering event log", e)
+        return
+    log_event(
+        logging.INFO, "Event log recovered",
+        snapshot_seq=event_log.snapshot_seq, replayed=replayed, rooms=len(room_index.rooms),
+        elapsed_ms=round((time.perf_counter() - started) * 1000, 3),
+    )
+
+
+async def snapshot_event_log():
+    """Capture the room index now and write it out on a worker thread"""
+    log = event_log
+    try:
+        seq = log.begin_snapshot()
+    except OSError as e:
+        disable_event_log("Error sealing event log segment", e)
+        return
+    state = room_index.snapshot()
+    try:
+        await asyncio.to_thread(log.write_snapshot, seq, state)
+    except OSError as e:
+        log_event(logging.ERROR, "Error writing event log snapshot", error=str(e))
+
+
+def close_event_log():
+    """Take a final snapshot so the next start replays nothing, then close"""
+    if event_log is None:
+        return
+    if event_log.since_snapshot:
+        try:
+            event_log.write_snapshot(event_log.begin_snapshot(), room_index.snapshot())
+        except OSError as e:
+            log_event(logging.ERROR, "Error writing event log snapshot", error=str(e))
+    event_log.close()
+
+
+# Event Stream
+
+class StreamFrame:
+    """
+    One event as sent to stream subscribers, encoded at most once per form
+
+    The data is the webhook body as received, so nothing is re-serialized;
+    the SSE and text forms are built on first use and shared by every
+    subscriber.
+    """
+
+    __slots__ = ("seq", "event", "room", "data", "_sse", "_text")
+
+    def __init__(self, seq: int, event: str, room: str, data: bytes):
+        self.seq = seq
+        self.event = event
+        self.room = room
+        self.data = data
+        self._sse: Optional[bytes] = None
+        self._text: Optional[str] = None
+
+    @property
+    def sse(self) -> bytes:
+        if self._sse is None:
+            self._sse = b"id: %d\nevent: %s\ndata: %s\n\n" % (self.seq, self.event.encode(), self.data)
+        return self._sse
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = self.data.decode()
+        return self._text
+
+
+class StreamSubscriber:
+    """
+    One attached dashboard: its filters and a bounded ring buffer of frames
+
+    When the buffer is full, the "drop" policy discards the oldest frame and
+    later tells the client how many it missed; the "coalesce" policy
+    discards the whole backlog and sends a snapshot of the current room
+    state instead, so a slow client catches up in one message.
+    """
+
+    __slots__ = ("rooms", "events", "policy", "buffer", "wakeup", "dropped", "missed", "lagged")
+
+    def __init__(self, rooms: set, events: set, policy: str, buffer_size: int):
+        self.rooms = rooms
+        self.events = events
+        self.policy = policy
+        self.buffer: deque = deque(maxlen=buffer_size)
+        self.wakeup = asyncio.Event()
+        self.dropped = 0
+        self.missed = 0
+        self.lagged = False
+
+    def wants(self, event: str, room: str) -> bool:
+        return (not self.rooms or room in self.rooms) and (not self.events or event in self.events)
+
+    def offer(self, frame: StreamFrame):
+        if len(self.buffer) == self.buffer.maxlen:
+            if self.policy == "coalesce":
+                self.dropped += len(self.buffer)
+                self.buffer.clear()
+                self.lagged = True
+            else:
+                self.dropped += 1
+                self.missed += 1
+        self.buffer.append(frame)
+        self.wakeup.set()
+
+    async def pull(self, timeout: float) -> Tuple[List[Dict[str, Any]], List[StreamFrame]]:
+        """Wait up to `timeout` for frames; returns control messages and frames, both possibly empty"""
+        if not self.buffer and not self.lagged:
+            self.wakeup.clear()
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                return [], []
+
+        control: List[Dict[str, Any]] = []
+        if self.lagged:
+            self.lagged = False
+            control.append({"event": "stream.snapshot", "rooms": room_index_view(self.rooms)})
+        if self.missed:
+            control.append({"event": "stream.dropped", "count": self.missed})
+            self.missed = 0
+        frames = list(self.buffer)
+        self.buffer.clear()
+        return control, frames
+
+
+class EventBroadcaster:
+    """
+    Fans processed webhook events out to stream subscribers
+
+    Publishing builds one StreamFrame per event, and only when someone is
+    subscribed; each subscriber costs a filter check and a deque append.
+    """
+
+    def __init__(self, max_subscribers: int, buffer_size: int):
+        self.max_subscribers = max_subscribers
+        self.buffer_size = buffer_size
+        self.subscribers: set = set()
+        self.seq = 0
+
+    def subscribe(self, rooms: set, events: set, policy: str) -> Optional[StreamSubscriber]:
+        if len(self.subscribers) >= self.max_subscribers:
+            return None
+        subscriber = StreamSubscriber(rooms, events, policy, self.buffer_size)
+        self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: StreamSubscriber):
+        self.subscribers.discard(subscriber)
+
+    def publish(self, event: "WebhookEventView"):
+        self.seq += 1
+        if not self.subscribers:
+            return
+        event_type = event.event or ""
+        room = event.routing_key
+        frame = None
+        for subscriber in self.subscribers:
+            if subscriber.wants(event_type, room):
+                if frame is None:
+                    data = bytes(event.body).replace(b"\n", b" ").replace(b"\r", b" ")
+                    frame = StreamFrame(self.seq, event_type, room, data)
+                subscriber.offer(frame)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "subscribers": len(self.subscribers),
+            "max_subscribers": self.max_subscribers,
+            "published": self.seq,
+            "dropped": sum(subscriber.dropped for subscriber in self.subscribers),
+        }
+
+
+def room_index_view(rooms: set) -> List[Dict[str, Any]]:
+    """Current state of the given rooms (all rooms when empty)"""
+    if not rooms:
+        return room_index.snapshot()
+    return [room_index.rooms[name].to_dict() for name in rooms if name in room_index.rooms]
+
+
+def sse_message(message: Dict[str, Any]) -> bytes:
+    return b"event: %s\ndata: %s\n\n" % (message["event"].encode(), json_dumps(message))
+
+
+event_broadcaster = EventBroadcaster(EVENT_STREAM_MAX_SUBSCRIBERS, EVENT_STREAM_BUFFER)
+
+
+# Onboarding Room Allocator
+
+class OnboardingRoomAllocator:
+    """
+    Hands out onboarding rooms so users don't all share one LiveKit room
+
+    Each room seats up to `capacity` users (1 = a private room per user).
+    A user asking again while their room is live gets the same room back.
+    participant_left only releases the user's assignment: the room may
+    still hold their agent session, so its seat is not handed to anyone
+    else. Rooms are recycled once LiveKit reports them finished, into a
+    free pool that is drawn from before minting new names.
+    """
+
+    def __init__(self, prefix: str, capacity: int, pool_size: int):
+        self.prefix = prefix
+        self.capacity = max(capacity, 1)
+        self.pool_size = pool_size
+        self.assignments: Dict[str, str] = {}
+        self.members: Dict[str, set] = {}
+        self.open_rooms: "OrderedDict[str, None]" = OrderedDict()
+        self.free_pool: deque = deque()
+        self.rooms_created = 0
+        self.rooms_reused = 0
+
+    def allocate(self, user_id: str) -> str:
+        room_name = self.assignments.get(user_id)
+        if room_name is not None:
+            return room_name
+
+        if self.open_rooms:
+            room_name = next(iter(self.open_rooms))
+        elif self.free_pool:
+            room_name = self.free_pool.popleft()
+            self.rooms_reused += 1
+        else:
+            room_name = f"{self.prefix}-{secrets.token_hex(8)}"
+            self.rooms_created += 1
+
+        members = self.members.setdefault(room_name, set())
+        members.add(user_id)
+        self.assignments[user_id] = room_name
+        if len(members) < self.capacity:
+            self.open_rooms[room_name] = None
+        else:
+            self.open_rooms.pop(room_name, None)
+        return room_name
+
+    def participant_left(self, room_name: Optional[str], identity: Optional[str]):
+        members = self.members.get(room_name)
+        if members is None or identity not in members:
+            return
+        if self.assignments.get(identity) == room_name:
+            del self.assignments[identity]
+
+    def room_finished(self, room_name: Optional[str]):
+        members = self.members.pop(room_name, None)
+        if members is None:
+            return
+        for user_id in members:
+            if self.assignments.get(user_id) == room_name:
+                del self.assignments[user_id]
+        self.open_rooms.pop(room_name, None)
+        if len(self.free_pool) < self.pool_size:
+            self.free_pool.append(room_name)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active_rooms": len(self.members),
+            "open_rooms": len(self.open_rooms),
+            "free_pool": len(self.free_pool),
+            "seated_users": len(self.assignments),
+            "rooms_created": self.rooms_created,
+            "rooms_reused": self.rooms_reused,
+        }
+
+
+onboarding_allocator = OnboardingRoomAllocator(
+    ONBOARDING_ROOM_PREFIX, ONBOARDING_ROOM_CAPACITY, ONBOARDING_FREE_POOL_SIZE
+)
+
+
+# Session Analytics
+
+class DDSketch:
+    """
+    Streaming quantile sketch with relative-error guarantees (DDSketch)
+
+    Values land in logarithmic buckets of ratio gamma = (1 + a) / (1 - a),
+    so any quantile is returned within a relative error `a`. Sketches with
+    the same accuracy merge by adding bucket counts. At most `max_bins`
+    buckets are kept; past that the lowest ones are folded together, which
+    only affects the lowest quantiles.
+    """
+
+    __slots__ = ("gamma", "_log_gamma", "max_bins", "bins", "zeros", "count", "total", "min", "max")
+
+    def __init__(self, accuracy: float = 0.01, max_bins: int = 2048):
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.max_bins = max_bins
+        self.bins: Dict[int, int] = {}
+        self.zeros = 0
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def add(self, value: float):
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if value <= 0:
+            self.zeros += 1
+            return
+        index = math.ceil(math.log(value) / self._log_gamma)
+        self.bins[index] = self.bins.get(index, 0) + 1
+        if len(self.bins) > self.max_bins:
+            self._collapse()
+
+    def merge(self, other: "DDSketch"):
+        for index, count in other.bins.items():
+            self.bins[index] = self.bins.get(index, 0) + count
+        self.zeros += other.zeros
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        if len(self.bins) > self.max_bins:
+            self._collapse()
+
+    def _collapse(self):
+        indexes = sorted(self.bins)
+        excess = len(indexes) - self.max_bins
+        folded = sum(self.bins.pop(index) for index in indexes[:excess + 1])
+        self.bins[indexes[excess]] = folded
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if seen > rank:
+                value = 2 * self.gamma ** index / (self.gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean": round(self.total / self.count, 3) if self.count else 0.0,
+            "min": round(self.min, 3) if self.count else 0.0,
+            "max": round(self.max, 3),
+            "p50": round(self.quantile(0.5), 3),
+            "p90": round(self.quantile(0.9), 3),
+            "p99": round(self.quantile(0.99), 3),
+        }
+
+
+class SessionAnalytics:
+    """
+    Session durations from room_finished, over tumbling hourly and daily windows
+
+    Each window holds one DDSketch per session kind ("onboarding" for rooms
+    named with ONBOARDING_ROOM_PREFIX, "other" otherwise). Only the latest
+    `hours` hourly and `days` daily windows are kept, so memory stays
+    constant however many sessions run. Ranges are answered by merging the
+    retained sketches, never by scanning history. Sessions are bucketed by
+    when the room finished, and an event ID already recorded (the latest
+    `max_event_ids` are remembered) is not counted again when the queue
+    redelivers it.
+    """
+
+    GRANULARITIES = {"hour": 3600, "day": 86400}
+
+    def __init__(self, accuracy: float, hours: int, days: int, onboarding_prefix: str, max_event_ids: int):
+        self.accuracy = accuracy
+        self.onboarding_prefix = onboarding_prefix
+        self.retention = {"hour": max(hours, 1), "day": max(days, 1)}
+        self.windows: Dict[str, Dict[int, Dict[str, DDSketch]]] = {
+            granularity: {} for granularity in self.GRANULARITIES
+        }
+        self.max_event_ids = max_event_ids
+        self.event_ids: "OrderedDict[str, None]" = OrderedDict()
+        self.duplicates = 0
+
+    def kind(self, room_name: Optional[str]) -> str:
+        return "onboarding" if (room_name or "").startswith(self.onboarding_prefix) else "other"
+
+    def record(self, room_name: Optional[str], duration: float, ended_at: float, event_id: Optional[str] = None):
+        if event_id:
+            if event_id in self.event_ids:
+                self.duplicates += 1
+                return
+            self.event_ids[event_id] = None
+            if len(self.event_ids) > self.max_event_ids:
+                self.event_ids.popitem(last=False)
+
+        kind = self.kind(room_name)
+        for granularity, width in self.GRANULARITIES.items():
+            windows = self.windows[granularity]
+            start = int(ended_at // width * width)
+            sketches = windows.get(start)
+            if sketches is None:
+                if len(windows) >= self.retention[granularity]:
+                    oldest = min(windows)
+                    if start < oldest:
+                        continue  # older than anything retained
+                    del windows[oldest]
+                sketches = windows[start] = {}
+            sketch = sketches.get(kind)
+            if sketch is None:
+                sketch = sketches[kind] = DDSketch(self.accuracy)
+            sketch.add(duration)
+
+    def report(self, granularity: str, kind: Optional[str] = None, limit: Optional[int] = None) -> Dict[str, Any]:
+        windows = self.windows[granularity]
+        starts = sorted(windows)[-limit:] if limit else sorted(windows)
+        overall = DDSketch(self.accuracy)
+        rows = []
+        for start in starts:
+            merged = DDSketch(self.accuracy)
+            for sketch_kind, sketch in windows[start].items():
+                if kind is None or sketch_kind == kind:
+                    merged.merge(sketch)
+            overall.merge(merged)
+            rows.append({
+                "start": datetime.utcfromtimestamp(start).isoformat() + "Z",
+                **merged.summary(),
+            })
+        return {
+            "window": granularity,
+            "kind": kind or "all",
+            "accuracy": self.accuracy,
+            "windows": rows,
+            "total": overall.summary(),
+        }
+
+
+def session_duration(payload: Mapping[str, Any], ended_at: float) -> Optional[float]:
+    """
+    Length in seconds of the session a room_finished event closes
+
+    Uses the room's `duration` when LiveKit sends one, else the time from
+    its `creationTime` to `ended_at`.
+    """
+    room = payload.get("room") or {}
+    try:
+        if room.get("duration"):
+            return float(room["duration"])
+        if room.get("creationTime"):
+            return max(ended_at - float(room["creationTime"]), 0.0)
+    except (TypeError, ValueError):
+        pass
+    return None
+
+
+session_analytics = SessionAnalytics(
+    SESSION_STATS_ACCURACY, SESSION_STATS_HOURS, SESSION_STATS_DAYS, ONBOARDING_ROOM_PREFIX, WEBHOOK_DEDUP_SIZE
+)
+
+
+# Recording Analytics
+
+class RecordingAnalyzer:
+    """
+    Runs CPU-heavy analysis of finished recordings on a process pool
+
+    `submit` never blocks: it starts a task and returns, or refuses when
+    `max_pending` jobs are already queued or running. At most `workers` jobs
+    run at once, each in its own process, so the GIL and the event loop are
+    never held by the analysis. Workers are spawned rather than forked, since
+    this process runs logging, signing and monitor threads whose locks a
+    fork could copy mid-use. A spawned worker imports audio_analysis for the
+    job and, like any spawn child, re-imports the parent's `__main__`; under
+    `python main.py` that is this module, whose module-level setup runs
+    again in the worker but which starts no server outside its `__main__`
+    guard. Results are kept per room (LRU, capped at `max_rooms`), one entry
+    per recording and kind of analysis.
+    """
+
+    def __init__(self, workers: int, max_pending: int, max_rooms: int):
+        self.workers = max(workers, 1)
+        self.max_pending = max_pending
+        self.max_rooms = max_rooms
+        self.results: "OrderedDict[str, Dict[str, Dict[str, Any]]]" = OrderedDict()
+        self.pending = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self._executor: Optional[concurrent.futures.ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._tasks: set = set()
+
+    def submit(self, room_name: str, recording: str, kind: str, fn: Callable[..., Dict[str, Any]], *args) -> bool:
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            return False
+        if self._executor is None:
+            self._executor = concurrent.futures.ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+            self._slots = asyncio.Semaphore(self.workers)
+        self.pending += 1
+        task = asyncio.create_task(self._run(room_name, recording, kind, fn, args))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return True
+
+    async def _run(self, room_name: str, recording: str, kind: str, fn: Callable[..., Dict[str, Any]], args: tuple):
+        started = time.perf_counter()
+        try:
+            async with self._slots:
+                result = await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+            self.completed += 1
+            entry = {"status": "ok", **result}
+        except Exception as e:
+            self.failed += 1
+            log_event(logging.WARNING, "Recording analysis failed", room=room_name, kind=kind, error=str(e))
+            entry = {"status": "error", "error": str(e)}
+        finally:
+            self.pending -= 1
+
+        entry.update(recording=recording, analyzed_at=time.time(), elapsed_s=round(time.perf_counter() - started, 3))
+        recordings = self.results.pop(room_name, None) or {}
+        recordings.setdefault(recording, {})[kind] = entry
+        self.results[room_name] = recordings
+        while len(self.results) > self.max_rooms:
+            self.results.popitem(last=False)
+
+    def get(self, room_name: str) -> Optional[Dict[str, Dict[str, Any]]]:
+        return self.results.get(room_name)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "pending": self.pending,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "rooms": len(self.results),
+        }
+
+    async def shutdown(self):
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._executor is not None:
+            # Jobs already running finish; waiting happens off the event loop
+            await asyncio.to_thread(functools.partial(self._executor.shutdown, wait=True, cancel_futures=True))
+            self._executor = None
+
+
+def schedule_analysis(room_name: str, recording: str, kind: str, fn: Callable[..., Dict[str, Any]], *args):
+    if not recording_analyzer.submit(room_name, recording, kind, fn, *args):
+        log_event(logging.WARNING, "Recording analysis queue full, skipping", room=room_name, kind=kind, recording=recording)
+
+
+class TurnTakingTracker:
+    """
+    Works out which recordings hold the user's and the agent's speech
+
+    A room composite recorded with audioMixing DUAL_CHANNEL_AGENT carries
+    the agent on the left channel and everyone else on the right, so it is
+    analyzed on its own. Per-track egress files are matched to a role
+    through the track's publisher: agents have participant kind AGENT or an
+    identity starting with `agent_prefix`. Roles are learned when the
+    participant joins, so track_published only peeks at sids; recordings
+    are held per room until a user and an agent recording have both
+    finished. All tables are LRU-capped at `max_entries`.
+    """
+
+    def __init__(self, agent_prefix: str, max_entries: int):
+        self.agent_prefix = agent_prefix
+        self.max_entries = max_entries
+        self.participant_roles: "OrderedDict[str, str]" = OrderedDict()
+        self.track_roles: "OrderedDict[str, str]" = OrderedDict()
+        self.pending: "OrderedDict[str, Dict[str, Tuple[str, str, float]]]" = OrderedDict()
+
+    def role(self, payload: Mapping[str, Any]) -> str:
+        participant = payload.get("participant") or {}
+        is_agent = participant.get("kind") in ("AGENT", 4) or str(participant.get("identity", "")).startswith(self.agent_prefix)
+        return "agent" if is_agent else "user"
+
+    def _remember(self, table: "OrderedDict[str, str]", key: str, role: str):
+        table[key] = role
+        table.move_to_end(key)
+        while len(table) > self.max_entries:
+            table.popitem(last=False)
+
+    def participant_joined(self, payload: Mapping[str, Any]):
+        sid = payload_field(payload, "participant", "sid")
+        if sid:
+            self._remember(self.participant_roles, sid, self.role(payload))
+
+    def track_published(self, payload: Mapping[str, Any]):
+        sid = payload_field(payload, "track", "sid")
+        if sid and payload_field(payload, "track", "type") in ("AUDIO", 0):
+            role = self.participant_roles.get(payload_field(payload, "participant", "sid")) or self.role(payload)
+            self._remember(self.track_roles, sid, role)
+
+    def recording_finished(self, room_name: str, recording: str, egress: Dict[str, Any], path: str) -> Optional[Tuple[str, tuple, tuple]]:
+        """Return (recording key, user source, agent source) once a session can be analyzed"""
+        if (egress.get("roomComposite") or {}).get("audioMixing") == "DUAL_CHANNEL_AGENT":
+            return recording, (path, 1, 0.0), (path, 0, 0.0)
+
+        role = self.track_roles.get((egress.get("track") or {}).get("trackId"))
+        if role is None:
+            return None
+        try:
+            started_at = int(egress.get("startedAt") or 0) / 1e9
+        except (TypeError, ValueError):
+            started_at = 0.0
+        recordings = self.pending.pop(room_name, None) or {}
+        recordings[role] = (recording, path, started_at)
+        if len(recordings) < 2:
+            self.pending[room_name] = recordings
+            while len(self.pending) > self.max_entries:
+                self.pending.popitem(last=False)
+            return None
+
+        (user_id, user_path, user_start), (agent_id, agent_path, agent_start) = recordings["user"], recordings["agent"]
+        base = min(user_start, agent_start)
+        return (
+            f"{user_id}+{agent_id}",
+            (user_path, None, user_start - base),
+            (agent_path, None, agent_start - base),
+        )
+
+
+def local_recording_path(location: Optional[str]) -> Optional[str]:
+    """Filesystem path of an egress file location, or None if it is not stored locally"""
+    if not location or "://" in location:
+        return None
+    path = location if os.path.isabs(location) else os.path.join(AUDIO_RECORDINGS_DIR, location)
+    return path if os.path.isfile(path) else None
+
+
+recording_analyzer = RecordingAnalyzer(AUDIO_ANALYSIS_WORKERS, AUDIO_ANALYSIS_MAX_PENDING, AUDIO_ANALYSIS_MAX_ROOMS)
+turn_tracker = TurnTakingTracker(AGENT_IDENTITY_PREFIX, AUDIO_ANALYSIS_MAX_ROOMS)
+
+
+@app.on_event("shutdown")
+async def stop_recording_analyzer():
+    """Abandon queued analyses and stop the worker processes"""
+    await recording_analyzer.shutdown()
+
+
+# Health Probes
+
+class ReadinessProbe:
+    """
+    Periodically evaluated readiness checks, served from cache
+
+    A background task re-runs the checks every `interval` seconds;
+    /health/ready only reads the cached verdict, so heavy probe traffic
+    costs a dict build. A verdict that has not been refreshed for several
+    intervals (a blocked or dead probe task) counts as not ready.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.checked_at = 0.0
+        self.ready = False
+        self.checks: Dict[str, Dict[str, Any]] = {}
+
+    def evaluate(self):
+        queue_depth = webhook_queue.depth()
+        backlog = queue_depth["pending"] + queue_depth["inflight"]
+        lane_fill = max(webhook_executor.depths(), default=0) / max(WEBHOOK_LANE_QUEUE_SIZE, 1)
+        loop_lag = loop_monitor.recent_max_lag()
+        signing_fill = signing_pool.waiting / max(signing_pool.max_queue, 1)
+
+        checks = {
+            "config": {"ok": bool(LIVEKIT_API_KEY and LIVEKIT_API_SECRET)},
+            "webhook_consumer": {"ok": _webhook_consumer is not None and not _webhook_consumer.done()},
+            "loop_lag": {"ok": loop_lag <= READINESS_MAX_LOOP_LAG, "value": round(loop_lag, 4), "threshold": READINESS_MAX_LOOP_LAG},
+            "webhook_backlog": {"ok": backlog <= READINESS_MAX_QUEUE_DEPTH, "value": backlog, "threshold": READINESS_MAX_QUEUE_DEPTH},
+            "lane_saturation": {"ok": lane_fill <= READINESS_MAX_LANE_FILL, "value": round(lane_fill, 3), "threshold": READINESS_MAX_LANE_FILL},
+            "signing_saturation": {"ok": signing_fill <= READINESS_MAX_LANE_FILL, "value": round(signing_fill, 3), "threshold": READINESS_MAX_LANE_FILL},
+        }
+        self.checks = checks
+        self.ready = all(check["ok"] for check in checks.values())
+        self.checked_at = time.time()
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                self.evaluate()
+            except Exception as e:
+                self.ready = False
+                log_event(logging.ERROR, "Readiness probe failed", error=str(e))
+
+    def verdict(self) -> Tuple[bool, Dict[str, Any]]:
+        age = time.time() - self.checked_at
+        fresh = age <= self.interval * 5
+        return self.ready and fresh, {"checked_at": self.checked_at, "stale": not fresh, "checks": self.checks}
+
+
+readiness_probe = ReadinessProbe(READINESS_PROBE_INTERVAL)
+_readiness_task: Optional[asyncio.Task] = None
+
+
+@app.on_event("startup")
+async def start_readiness_probe():
+    """Evaluate readiness once, then keep the cached verdict fresh"""
+    global _readiness_task
+    readiness_probe.evaluate()
+    _readiness_task = asyncio.create_task(readiness_probe.run())
+
+
+@app.on_event("shutdown")
+async def stop_readiness_probe():
+    """Stop refreshing the readiness verdict"""
+    if _readiness_task is not None:
+        _readiness_task.cancel()
+
+
+# Event Loop Monitor
+
+def coroutine_stack(coro) -> List[str]:
+    """Await chain of a suspended coroutine, outermost frame first"""
+    lines = []
+    while coro is not None:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None)
+        if frame is not None:
+            lines.append(f"{frame.f_code.co_filename}:{frame.f_lineno} in {frame.f_code.co_name}")
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None)
+    return lines
+
+
+class LoopMonitor:
+    """
+    Detects event-loop stalls and slow requests, with stacks
+
+    A ticker task on the loop wakes every `interval` seconds, records how
+    late it was scheduled, and refreshes a heartbeat. A watchdog thread
+    checks the heartbeat; when the loop has not ticked for longer than
+    `blocked_threshold` it grabs the loop thread's current Python stack,
+    which points at the code blocking it (e.g. a synchronous to_jwt() or a
+    big json.loads). The ticker also looks at in-flight requests and
+    captures the await chain of any that run past `slow_request_threshold`.
+    Reports are kept in bounded deques.
+    """
+
+    def __init__(self, interval: float, blocked_threshold: float, slow_request_threshold: float, max_reports: int):
+        self.interval = interval
+        self.blocked_threshold = blocked_threshold
+        self.slow_request_threshold = slow_request_threshold
+        self.lag = 0.0
+        self.max_lag = 0.0
+        self.heartbeat = time.perf_counter()
+        self.blocked_events: deque = deque(maxlen=max_reports)
+        self.slow_requests: deque = deque(maxlen=max_reports)
+        self._recent_lags: deque = deque(maxlen=max(1, int(5 / interval)))
+        self._requests: Dict[int, List[Any]] = {}
+        self._next_request_id = 0
+        self._loop_thread_id: Optional[int] = None
+        self._stopped = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+
+    def request_started(self, scope: Dict[str, Any]) -> int:
+        self._next_request_id += 1
+        self._requests[self._next_request_id] = [asyncio.current_task(), scope, time.perf_counter(), False]
+        return self._next_request_id
+
+    def request_finished(self, request_id: Optional[int]):
+        self._requests.pop(request_id, None)
+
+    def recent_max_lag(self) -> float:
+        return max(self._recent_lags, default=0.0)
+
+    async def run(self):
+        self._loop_thread_id = threading.get_ident()
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.perf_counter()
+            self.heartbeat = now
+            self.lag = max(0.0, now - expected)
+            self.max_lag = max(self.max_lag, self.lag)
+            self._recent_lags.append(self.lag)
+            metrics.observe("event_loop_lag_seconds", self.lag)
+            self._check_requests(now)
+
+    def _check_requests(self, now: float):
+        for entry in list(self._requests.values()):
+            task, scope, started, reported = entry
+            if reported or now - started < self.slow_request_threshold:
+                continue
+            entry[3] = True
+            route = getattr(scope.get("route"), "path", scope.get("path", ""))
+            self.slow_requests.append({
+                "at": time.time(),
+                "route": route,
+                "method": scope.get("method"),
+                "running_for_s": round(now - started, 3),
+                "stack": coroutine_stack(task.get_coro()) if task is not None else [],
+            })
+            metrics.inc("slow_requests_total", (("route", route),))
+
+    def _watch(self, stopped: threading.Event):
+        reported_heartbeat = None
+        while not stopped.wait(self.interval):
+            heartbeat = self.heartbeat
+            blocked_for = time.perf_counter() - heartbeat - self.interval
+            if blocked_for < self.blocked_threshold or heartbeat == reported_heartbeat:
+                continue
+            reported_heartbeat = heartbeat
+            frame = sys._current_frames().get(self._loop_thread_id)
+            self.blocked_events.append({
+                "at": time.time(),
+                "blocked_for_s": round(blocked_for, 3),
+                "stack": traceback.format_stack(frame) if frame is not None else [],
+            })
+            metrics.inc("event_loop_blocked_total")
+
+    def start(self) -> asyncio.Task:
+        task = asyncio.create_task(self.run())
+        # A fresh stop flag per start, so the monitor works again in a later lifespan
+        self._stopped = threading.Event()
+        self.heartbeat = time.perf_counter()
+        self._watchdog = threading.Thread(target=self._watch, args=(self._stopped,), name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+        return task
+
+    def stop(self):
+        self._stopped.set()
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "lag_s": round(self.lag, 4),
+            "max_lag_s": round(self.max_lag, 4),
+            "recent_max_lag_s": round(self.recent_max_lag(), 4),
+            "inflight_requests": len(self._requests),
+            "blocked": list(self.blocked_events),
+            "slow_requests": list(self.slow_requests),
+        }
+
+
+loop_monitor = LoopMonitor(
+    LOOP_MONITOR_INTERVAL, LOOP_BLOCKED_THRESHOLD, SLOW_REQUEST_THRESHOLD, LOOP_MONITOR_MAX_REPORTS
+)
+_loop_monitor_task: Optional[asyncio.Task] = None
+
+
+@app.on_event("startup")
+async def start_loop_monitor():
+    """Start the loop lag ticker and the blocked-loop watchdog"""
+    global _loop_monitor_task
+    _loop_monitor_task = loop_monitor.start()
+
+
+@app.on_event("shutdown")
+async def stop_loop_monitor():
+    """Stop the ticker and watchdog"""
+    loop_monitor.stop()
+    if _loop_monitor_task is not None:
+        _loop_monitor_task.cancel()
+
+
+@app.on_event("shutdown")
+async def flush_logs():
+    """Write out whatever is still queued in the log pipeline"""
+    # Flush only: the writer thread must outlive this lifespan, and
+    # logging.shutdown() closes the handler at interpreter exit
+    await asyncio.to_thread(log_handler.flush)
+
+
+# Dashboard Auth
+
+def dashboard_token_valid(authorization: Optional[str], access_token: Optional[str]) -> bool:
+    """
+    Check a dashboard token from `Authorization: Bearer` or, for EventSource
+    and browser WebSocket clients that cannot set headers, `?access_token=`
+    """
+    presented = access_token or ""
+    if not presented and authorization and authorization[:7].lower() == "bearer ":
+        presented = authorization[7:].strip()
+    return bool(DASHBOARD_TOKEN and presented) and hmac.compare_digest(presented.encode(), DASHBOARD_TOKEN.encode())
+
+
+async def require_dashboard_token(authorization: Optional[str] = Header(None), access_token: Optional[str] = None):
+    """Dependency for dashboard routes: 404 while DASHBOARD_TOKEN is unset, 401 without a valid token"""
+    if not DASHBOARD_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not dashboard_token_valid(authorization, access_token):
+        raise HTTPException(status_code=401, detail="Invalid dashboard token", headers={"WWW-Authenticate": "Bearer"})
+
+
 # Routes
 
 @app.get("/")
@@ -77,6 +2709,22 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/health/live")
+async def liveness_check():
+    """Liveness probe: the process is up and its event loop is serving requests"""
+    return {"status": "alive"}
+
+
+@app.get("/health/ready")
+async def readiness_check():
+    """Readiness probe: config, event-loop lag, webhook backlog and lane saturation"""
+    ready, details = readiness_probe.verdict()
+    return FastJSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ready" if ready else "not_ready", **details},
+    )
+
+
 @app.post("/api/token", response_model=TokenResponse)
 async def generate_token(request: TokenRequest):
     """
@@ -91,32 +2739,284 @@ async def generate_token(request: TokenRequest):
                 detail="LiveKit credentials not configured. Set LIVEKIT_API_KEY and LIVEKIT_API_SECRET environment variables."
             )
 
-        # Create access token
-        token = api.AccessToken(LIVEKIT_API_KEY, LIVEKIT_API_SECRET)
-        token.identity = request.participant_name
-        token.name = request.participant_name
-
-        if request.metadata:
-            token.metadata = request.metadata
-
-        # Grant permissions
-        token.add_grant(
-            api.VideoGrants(
-                room_join=True,
-                room=request.room_name,
-                can_publish=True,
-                can_subscribe=True,
-                can_publish_data=True,
-            )
+        jwt_token = await get_or_create_token(request.room_name, request.participant_name, request.metadata)
+
+        return model_response(TokenResponse(token=jwt_token, url=LIVEKIT_URL))
+
+    except SigningPoolSaturated as e:
+        raise signing_unavailable(e)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to generate token: {str(e)}")
+
+
+def batch_item_error(error: ValidationError) -> str:
+    """First validation error of a batch entry, as `field: message`"""
+    detail = error.errors()[0]
+    location = ".".join(str(part) for part in detail["loc"])
+    return f"{location}: {detail['msg']}" if location else detail["msg"]
+
+
+async def read_batch_body(request: Request) -> bytearray:
+    """Read a batch body chunk by chunk, rejecting with 413 past TOKEN_BATCH_MAX_BODY_BYTES"""
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > TOKEN_BATCH_MAX_BODY_BYTES:
+        raise HTTPException(status_code=413, detail=f"Batch body exceeds {TOKEN_BATCH_MAX_BODY_BYTES} bytes")
+
+    body = bytearray()
+    async for chunk in request.stream():
+        if len(body) + len(chunk) > TOKEN_BATCH_MAX_BODY_BYTES:
+            raise HTTPException(status_code=413, detail=f"Batch body exceeds {TOKEN_BATCH_MAX_BODY_BYTES} bytes")
+        body += chunk
+    return body
+
+
+@app.post(
+    "/api/tokens:batch",
+    response_model=BatchTokenResponse,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": BatchTokenRequest.model_json_schema()}},
+        }
+    },
+)
+async def generate_tokens_batch(http_request: Request):
+    """
+    Generate LiveKit access tokens for many participants in one request
+
+    Results are returned in request order. A malformed entry or a failure
+    to sign one is reported in that entry's `error` field and does not fail
+    the batch, including an entry whose participant is over its rate
+    limit. The body is read under TOKEN_BATCH_MAX_BODY_BYTES before it is
+    decoded.
+    """
+    if not LIVEKIT_API_KEY or not LIVEKIT_API_SECRET:
+        raise HTTPException(
+            status_code=500,
+            detail="LiveKit credentials not configured. Set LIVEKIT_API_KEY and LIVEKIT_API_SECRET environment variables."
         )
 
-        # Generate JWT token
-        jwt_token = token.to_jwt()
+    body = await read_batch_body(http_request)
+    try:
+        request = BatchTokenRequest.model_validate_json(body)
+    except ValidationError as e:
+        errors = e.errors(include_url=False, include_input=False)
+        raise RequestValidationError([{**error, "loc": ("body", *error["loc"])} for error in errors])
+
+    # Identical entries within one batch are signed (and rate limited) only once
+    keys: List[Optional[Tuple]] = []
+    invalid: Dict[int, str] = {}
+    tokens: Dict[Tuple, str] = {}
+    misses: Dict[Tuple, TokenRequest] = {}
+    errors: Dict[Tuple, str] = {}
+
+    for index, entry in enumerate(request.requests):
+        try:
+            item = TokenRequest.model_validate(entry)
+        except ValidationError as e:
+            keys.append(None)
+            invalid[index] = f"Invalid request: {batch_item_error(e)}"
+            continue
+        cache_key = TokenCache.make_key(
+            item.room_name, item.participant_name, item.metadata, DEFAULT_GRANTS
+        )
+        keys.append(cache_key)
+        if cache_key in tokens or cache_key in misses or cache_key in errors:
+            continue
+        if RATE_LIMIT_ENABLED and not participant_limiter.allow(item.participant_name)[0]:
+            metrics.inc("rate_limited_total", (("scope", "participant"),))
+            errors[cache_key] = "Rate limit exceeded"
+            continue
+        jwt_token = token_cache.get(cache_key)
+        if jwt_token is None:
+            misses[cache_key] = item
+        else:
+            tokens[cache_key] = jwt_token
+
+    # All misses are signed in one pool job
+    if misses:
+        try:
+            signed = await signing_pool.run(create_access_tokens, list(misses.values()))
+        except SigningPoolSaturated as e:
+            raise signing_unavailable(e)
+
+        for cache_key, outcome in zip(misses, signed):
+            if isinstance(outcome, Exception):
+                errors[cache_key] = f"Failed to generate token: {str(outcome)}"
+            else:
+                jwt_token, expires_at = outcome
+                token_cache.put(cache_key, jwt_token, expires_at)
+                tokens[cache_key] = jwt_token
+
+    results = [
+        BatchTokenResult(error=invalid[index]) if cache_key is None
+        else BatchTokenResult(token=tokens.get(cache_key), error=errors.get(cache_key))
+        for index, cache_key in enumerate(keys)
+    ]
+
+    return model_response(BatchTokenResponse(url=LIVEKIT_URL, results=results))
+
+
+@app.post("/api/onboarding/session", response_model=OnboardingSessionResponse)
+async def create_onboarding_session(request: OnboardingSessionRequest):
+    """
+    Allocate an onboarding room for a user and return a token for it
+
+    Replaces asking /api/token for the shared "onboarding" room.
+    """
+    try:
+        if not LIVEKIT_API_KEY or not LIVEKIT_API_SECRET:
+            raise HTTPException(
+                status_code=500,
+                detail="LiveKit credentials not configured. Set LIVEKIT_API_KEY and LIVEKIT_API_SECRET environment variables."
+            )
 
-        return TokenResponse(token=jwt_token, url=LIVEKIT_URL)
+        room_name = onboarding_allocator.allocate(request.user_id)
+        metadata = request.metadata or json.dumps({"type": "onboarding"})
+        jwt_token = await get_or_create_token(room_name, request.user_id, metadata)
 
+        return model_response(OnboardingSessionResponse(room_name=room_name, token=jwt_token, url=LIVEKIT_URL))
+
+    except SigningPoolSaturated as e:
+        raise signing_unavailable(e)
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to generate token: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to create onboarding session: {str(e)}")
+
+
+@app.get("/api/onboarding/stats")
+async def onboarding_stats():
+    """Occupancy of the onboarding room allocator"""
+    return onboarding_allocator.stats()
+
+
+@app.get("/api/stats/sessions")
+async def session_stats(window: str = "hour", kind: Optional[str] = None, limit: Optional[int] = None):
+    """
+    Session-duration quantiles (seconds) per tumbling window
+
+    `window` is "hour" or "day"; `kind` narrows to "onboarding" or "other"
+    rooms; `limit` keeps only the latest windows. `total` merges the
+    returned windows.
+    """
+    if window not in SessionAnalytics.GRANULARITIES:
+        raise HTTPException(status_code=400, detail="window must be one of: hour, day")
+    if kind not in (None, "onboarding", "other"):
+        raise HTTPException(status_code=400, detail="kind must be one of: onboarding, other")
+    return session_analytics.report(window, kind, limit)
+
+
+@app.get("/api/rooms", dependencies=[Depends(require_dashboard_token)])
+async def list_rooms():
+    """Live rooms known from webhook events"""
+    return {"rooms": [room.summary() for room in room_index.rooms.values()]}
+
+
+@app.get("/api/rooms/{room_name}", dependencies=[Depends(require_dashboard_token)])
+async def get_room(room_name: str):
+    """Participants and published tracks of a live room"""
+    room = room_index.rooms.get(room_name)
+    if room is None:
+        raise HTTPException(status_code=404, detail=f"Room not found: {room_name}")
+    return room.to_dict()
+
+
+@app.get("/api/rooms/{room_name}/audio", dependencies=[Depends(require_dashboard_token)])
+async def get_room_audio(room_name: str):
+    """Audio metrics of a room's finished recordings, keyed by egress ID"""
+    recordings = recording_analyzer.get(room_name)
+    if recordings is None:
+        raise HTTPException(status_code=404, detail=f"No analyzed recordings for room: {room_name}")
+    return {"room_name": room_name, "recordings": recordings}
+
+
+@app.get("/api/rooms/{room_name}/turns", dependencies=[Depends(require_dashboard_token)])
+async def get_room_turns(room_name: str):
+    """Agent response latency per analyzed session of a room"""
+    recordings = recording_analyzer.get(room_name) or {}
+    sessions = {key: analyses["turns"] for key, analyses in recordings.items() if "turns" in analyses}
+    if not sessions:
+        raise HTTPException(status_code=404, detail=f"No turn-taking analysis for room: {room_name}")
+    return {"room_name": room_name, "sessions": sessions}
+
+
+@app.get("/api/recordings/analysis")
+async def recording_analysis_stats():
+    """Pending, completed, failed and rejected recording analyses"""
+    return {
+        "enabled": AUDIO_ANALYSIS_ENABLED,
+        "numpy": audio_analysis.available(),
+        **recording_analyzer.stats(),
+    }
+
+
+@app.get("/api/logging/stats")
+async def logging_stats():
+    """Records written, dropped on overflow and sampled out by the log pipeline"""
+    return {**log_handler.stats(), "sampled_out": log_sampler.sampled_out}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Prometheus scrape endpoint"""
+    return metrics.render()
+
+
+metrics.gauge(
+    "webhook_queue_events", "Events in the durable webhook queue by status",
+    lambda: [((("status", status),), count) for status, count in webhook_queue.depth().items()],
+)
+metrics.gauge(
+    "webhook_lane_depth", "Events buffered in each webhook execution lane",
+    lambda: [((("lane", str(i)),), depth) for i, depth in enumerate(webhook_executor.depths())],
+)
+metrics.gauge(
+    "webhook_duplicates_suppressed", "Redelivered webhooks dropped by the dedup index",
+    lambda: [((), webhook_dedup.duplicates)],
+)
+metrics.gauge(
+    "token_cache_lookups", "Signed token cache lookups by result",
+    lambda: [((("result", "hit"),), token_cache.hits), ((("result", "miss"),), token_cache.misses)],
+)
+metrics.gauge("token_cache_size", "Tokens held in the signed token cache", lambda: [((), len(token_cache))])
+metrics.gauge(
+    "signing_pool", "Token signing pool state",
+    lambda: [((("state", key),), value) for key, value in signing_pool.stats().items()] if signing_pool is not None else [],
+)
+metrics.gauge("live_rooms", "Rooms currently live according to webhook events", lambda: [((), len(room_index.rooms))])
+metrics.gauge(
+    "event_stream_subscribers", "Dashboards attached to /api/events/stream",
+    lambda: [((), len(event_broadcaster.subscribers))],
+)
+metrics.gauge(
+    "log_records", "Log pipeline records by outcome",
+    lambda: [
+        ((("outcome", "written"),), log_handler.written),
+        ((("outcome", "dropped"),), log_handler.dropped),
+        ((("outcome", "sampled_out"),), log_sampler.sampled_out),
+    ],
+)
+
+
+@app.get("/debug/loop", dependencies=[Depends(require_dashboard_token)])
+async def loop_monitor_report():
+    """Event-loop lag plus recent blocked-loop and slow-request reports with stacks"""
+    return loop_monitor.report()
+
+
+@app.get("/api/token/signing")
+async def signing_pool_stats():
+    """Size, backlog and rejections of the token signing pool"""
+    return signing_pool.stats()
+
+
+@app.get("/api/token/cache")
+async def token_cache_stats():
+    """Hit/miss counters for the signed token cache"""
+    return token_cache.stats()
 
 
 @app.post("/api/webhooks/livekit")
@@ -134,57 +3034,540 @@ async def livekit_webhook(
     - participant_left: When someone leaves
     - track_published: When audio/video is published
     - recording_finished: When a recording completes
+
+    Verified events are persisted to the local webhook queue and acknowledged
+    immediately; handlers run in the background consumer.
     """
     try:
-        # Get raw body for signature verification
-        body = await request.body()
+        verify = WEBHOOK_AUTH_SCHEME != "none"
+        if verify and not authorization:
+            raise HTTPException(status_code=401, detail="Missing authorization header")
 
-        # Verify webhook signature if secret is configured
-        if WEBHOOK_SECRET:
-            if not authorization:
-                raise HTTPException(status_code=401, detail="Missing authorization header")
+        # Stream the body through the digest, enforcing the size limit as it arrives
+        body, digest = await read_webhook_body(request)
 
-            if not verify_webhook_signature(body, authorization):
-                raise HTTPException(status_code=401, detail="Invalid webhook signature")
+        if verify and not webhook_digest_matches(digest, authorization):
+            raise HTTPException(status_code=401, detail="Invalid webhook signature")
 
-        # Parse webhook payload
-        payload = json.loads(body)
-        event_type = payload.get("event")
+        # Drop redeliveries before parsing the payload
+        dedup_key = WebhookDeduplicator.event_key(body)
+        if webhook_dedup.is_duplicate(dedup_key):
+            return {"status": "ok", "duplicate": True}
 
-        # Handle different event types
-        if event_type == "room_started":
-            await handle_room_started(payload)
-        elif event_type == "room_finished":
-            await handle_room_finished(payload)
-        elif event_type == "participant_joined":
-            await handle_participant_joined(payload)
-        elif event_type == "participant_left":
-            await handle_participant_left(payload)
-        elif event_type == "track_published":
-            await handle_track_published(payload)
-        elif event_type == "track_unpublished":
-            await handle_track_unpublished(payload)
-        elif event_type == "recording_finished":
-            await handle_recording_finished(payload)
-        else:
-            print(f"Unhandled event type: {event_type}")
+        # Only the event type is read here; bodies that cannot be peeked are
+        # decoded in full, so malformed JSON is still rejected with 400
+        event_type = WebhookEventView(body).event
+
+        # Persist and acknowledge; the queue consumer runs the handlers
+        webhook_queue.enqueue(body)
+        webhook_dedup.add(dedup_key)
 
         return {"status": "ok", "event": event_type}
 
-    except json.JSONDecodeError:
+    except ValueError:
         raise HTTPException(status_code=400, detail="Invalid JSON payload")
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"Error handling webhook: {str(e)}")
+        log_event(logging.ERROR, "Error handling webhook", error=str(e))
         raise HTTPException(status_code=500, detail=f"Webhook processing failed: {str(e)}")
 
 
+@app.get("/api/webhooks/queue")
+async def webhook_queue_stats():
+    """Number of pending, in-flight and dead events, plus per-lane backlog"""
+    return {**webhook_queue.depth(), "lanes": webhook_executor.depths()}
+
+
+@app.get("/api/webhooks/dedup")
+async def webhook_dedup_stats():
+    """Size of the dedup index and number of suppressed redeliveries"""
+    return webhook_dedup.stats()
+
+
+@app.get("/api/events/log")
+async def event_log_stats():
+    """Segments, sequence numbers and last snapshot of the event log"""
+    if event_log is None:
+        return {"enabled": False, "error": event_log_error}
+    return {"enabled": True, **event_log.stats()}
+
+
+def stream_filters(room: Optional[str], event: Optional[str], on_overflow: str) -> Tuple[set, set]:
+    if on_overflow not in ("drop", "coalesce"):
+        raise HTTPException(status_code=400, detail="on_overflow must be one of: drop, coalesce")
+    rooms = {name for name in (room or "").split(",") if name}
+    events = {name for name in (event or "").split(",") if name}
+    return rooms, events
+
+
+@app.get("/api/events/stream", dependencies=[Depends(require_dashboard_token)])
+async def event_stream(room: Optional[str] = None, event: Optional[str] = None, on_overflow: str = "drop"):
+    """
+    Server-Sent Events feed of processed webhook events
+
+    `room` and `event` take comma-separated names to filter on. Each SSE
+    message carries the LiveKit event type as its `event` and the webhook
+    body as its `data`.
+    """
+    rooms, events = stream_filters(room, event, on_overflow)
+    subscriber = event_broadcaster.subscribe(rooms, events, on_overflow)
+    if subscriber is None:
+        raise HTTPException(status_code=503, detail="Too many event stream subscribers")
+
+    async def frames():
+        try:
+            yield b": connected\n\n"
+            while True:
+                control, batch = await subscriber.pull(EVENT_STREAM_KEEPALIVE)
+                if not control and not batch:
+                    yield b": keepalive\n\n"
+                    continue
+                yield b"".join([*map(sse_message, control), *(frame.sse for frame in batch)])
+        finally:
+            event_broadcaster.unsubscribe(subscriber)
+
+    return StreamingResponse(
+        frames(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.websocket("/api/events/stream")
+async def event_stream_websocket(
+    websocket: WebSocket, room: Optional[str] = None, event: Optional[str] = None, on_overflow: str = "drop",
+    authorization: Optional[str] = Header(None), access_token: Optional[str] = None,
+):
+    """WebSocket variant of /api/events/stream: one text message per event (the webhook body)"""
+    if not dashboard_token_valid(authorization, access_token):
+        await websocket.close(code=1008, reason="Invalid dashboard token")
+        return
+    try:
+        rooms, events = stream_filters(room, event, on_overflow)
+    except HTTPException as e:
+        await websocket.close(code=1008, reason=e.detail)
+        return
+    subscriber = event_broadcaster.subscribe(rooms, events, on_overflow)
+    if subscriber is None:
+        await websocket.close(code=1013, reason="Too many event stream subscribers")
+        return
+    await websocket.accept()
+
+    async def pump():
+        while True:
+            control, batch = await subscriber.pull(EVENT_STREAM_KEEPALIVE)
+            for message in control:
+                await websocket.send_text(json_dumps(message).decode())
+            for frame in batch:
+                await websocket.send_text(frame.text)
+
+    async def watch_disconnect():
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+
+    tasks = [asyncio.create_task(pump()), asyncio.create_task(watch_disconnect())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        event_broadcaster.unsubscribe(subscriber)
+
+
+@app.get("/api/events/stream/stats", dependencies=[Depends(require_dashboard_token)])
+async def event_stream_stats():
+    """Attached stream subscribers, events published and frames dropped"""
+    return event_broadcaster.stats()
+
+
+# Webhook Event View
+
+_MISSING = object()
+
+_EVENT_TYPE_PATTERN = re.compile(rb'\A\s*\{\s*"event"\s*:\s*"([^"\\]*)"')
+
+# Scalar members that may precede the field being peeked at; anything
+# nested or containing escapes makes the peek fall back to a full decode
+_SCALAR_VALUE = rb'"[^"\\]*"|[-+.\deE]+|true|false|null'
+_SCALAR_MEMBERS = rb'(?:\s*"[^"\\]*"\s*:\s*(?:' + _SCALAR_VALUE + rb')\s*,)*?'
+_ROOM_NAME_PATTERN = re.compile(rb'"room"\s*:\s*\{' + _SCALAR_MEMBERS + rb'\s*"name"\s*:\s*"([^"\\]*)"')
+_EGRESS_ROOM_PATTERN = re.compile(rb'"egressInfo"\s*:\s*\{' + _SCALAR_MEMBERS + rb'\s*"roomName"\s*:\s*"([^"\\]*)"')
+# createdAt only occurs at the top level of a LiveKit webhook event
+_CREATED_AT_PATTERN = re.compile(rb'"createdAt"\s*:\s*"?(\d+)"?')
+
+
+@functools.lru_cache(maxsize=None)
+def _member_patterns(member: str, key: str) -> Tuple[Any, Any]:
+    """
+    Patterns for `"member": {..., "key": <scalar>}` and for `key` used as a
+    member name anywhere in the body; when the latter finds nothing the key
+    is absent (protobuf JSON leaves out default values such as muted=false)
+    """
+    name = rb'"' + re.escape(key.encode()) + rb'"\s*:'
+    field = re.compile(rb'"' + re.escape(member.encode()) + rb'"\s*:\s*\{' + _SCALAR_MEMBERS + rb'\s*' + name + rb'\s*(' + _SCALAR_VALUE + rb')')
+    return field, re.compile(name)
+
+
+class WebhookEventView(Mapping):
+    """
+    Read-only payload of one webhook event, decoded on demand
+
+    The route and the queue consumer only need the event type and the room
+    name, which are picked out of the raw body with anchored regexes (LiveKit
+    writes `event` first and `room.name` right after `room.sid`). Scalar
+    fields of `participant` and `track` are peeked the same way through
+    `peek`, which is all the room index and the track handlers read. The
+    body is decoded in full the first time anything else is read, and at
+    most once per event. Unhandled event types are never decoded.
+    """
+
+    __slots__ = ("body", "decode_error", "_event", "_routing_key", "_payload")
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.decode_error: Optional[str] = None
+        self._event: Any = _MISSING
+        self._routing_key: Optional[str] = None
+        self._payload: Optional[Dict[str, Any]] = None
+
+    @property
+    def event(self) -> Optional[str]:
+        if self._event is _MISSING:
+            match = _EVENT_TYPE_PATTERN.match(self.body) if self._payload is None else None
+            self._event = match.group(1).decode() if match else self.payload.get("event")
+        return self._event
+
+    @property
+    def routing_key(self) -> str:
+        if self._routing_key is None:
+            match = None
+            if self._payload is None:
+                match = _ROOM_NAME_PATTERN.search(self.body) or _EGRESS_ROOM_PATTERN.search(self.body)
+            if match:
+                self._routing_key = match.group(1).decode()
+            else:
+                try:
+                    self._routing_key = webhook_routing_key(self.payload)
+                except ValueError:
+                    self._routing_key = ""  # Undecodable; process_webhook_event parks it
+        return self._routing_key
+
+    @property
+    def parsed(self) -> bool:
+        return self._payload is not None
+
+    @property
+    def payload(self) -> Dict[str, Any]:
+        if self._payload is None:
+            try:
+                payload = json_loads(self.body)
+                if not isinstance(payload, dict):
+                    raise ValueError("Webhook payload is not a JSON object")
+            except ValueError as e:
+                self.decode_error = str(e)
+                raise
+            self._payload = payload
+            metrics.inc("webhook_payload_parses_total", (("event", str(payload.get("event"))),))
+        return self._payload
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key == "event" and self._payload is None:
+            event = self.event
+            return default if event is None else event
+        if key == "createdAt" and self._payload is None:
+            match = _CREATED_AT_PATTERN.search(self.body)
+            if match:
+                return match.group(1).decode()
+        return self.payload.get(key, default)
+
+    def peek(self, member: str, key: str, default: Any = None) -> Any:
+        """
+        payload[member][key] for a scalar, read from the raw body when the
+        members before it are scalars too (LiveKit writes `sid`, `identity`,
+        `type` and `name` ahead of nested lists); falls back to the payload
+        """
+        if self._payload is None:
+            field, anywhere = _member_patterns(member, key)
+            match = field.search(self.body)
+            if match:
+                token = match.group(1)
+                return token[1:-1].decode() if token[:1] == b'"' else json_loads(token)
+            if not anywhere.search(self.body):
+                return default
+        return (self.payload.get(member) or {}).get(key, default)
+
+    def __getitem__(self, key: str) -> Any:
+        if key == "event" and self._payload is None and self.event is not None:
+            return self._event
+        return self.payload[key]
+
+    def __contains__(self, key: object) -> bool:
+        if key == "event" and self._payload is None and self.event is not None:
+            return True
+        return key in self.payload
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.payload)
+
+    def __len__(self) -> int:
+        return len(self.payload)
+
+
+def payload_field(payload: Mapping[str, Any], member: str, key: str, default: Any = None) -> Any:
+    """payload[member][key], peeked from the raw body when the payload is a WebhookEventView"""
+    if isinstance(payload, WebhookEventView):
+        return payload.peek(member, key, default)
+    return (payload.get(member) or {}).get(key, default)
+
+
+# Webhook Dispatch
+
+WebhookHandler = Callable[[Mapping[str, Any]], Awaitable[None]]
+
+
+class HandlerStats:
+    """Call count and latency of one registered webhook handler"""
+
+    __slots__ = ("calls", "errors", "timeouts", "total_ms", "max_ms")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, elapsed_ms: float):
+        self.calls += 1
+        self.total_ms += elapsed_ms
+        if elapsed_ms > self.max_ms:
+            self.max_ms = elapsed_ms
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "avg_ms": round(self.total_ms / self.calls, 3) if self.calls else 0.0,
+            "max_ms": round(self.max_ms, 3),
+        }
+
+
+class WebhookDispatcher:
+    """
+    Registry mapping LiveKit event names to handler coroutines
+
+    Handlers subscribe with the `on` decorator; an event may have any number
+    of subscribers, run in registration order, each under its own timeout.
+    If any subscriber fails the error is raised after all of them have run,
+    so the queue consumer retries the event. Handlers that succeed are added
+    to the caller's `done` set and skipped when the same event is retried,
+    so a retry re-runs only the failed ones. (An event redelivered after a
+    crash still runs every handler again.)
+    """
+
+    def __init__(self, default_timeout: float):
+        self.default_timeout = default_timeout
+        self._handlers: Dict[str, List[Tuple[WebhookHandler, float, HandlerStats]]] = {}
+
+    def on(self, event_type: str, timeout: Optional[float] = None):
+        def decorator(handler: WebhookHandler) -> WebhookHandler:
+            self._handlers.setdefault(event_type, []).append(
+                (handler, timeout or self.default_timeout, HandlerStats())
+            )
+            return handler
+        return decorator
+
+    async def dispatch(self, payload: Mapping[str, Any], done: Optional[set] = None):
+        event_type = payload.get("event")
+        handlers = self._handlers.get(event_type)
+        if not handlers:
+            log_event(logging.INFO, "Unhandled event type", event=event_type)
+            return
+
+        errors = []
+        for handler, timeout, stats in handlers:
+            if done is not None and handler in done:
+                continue
+            started = time.perf_counter()
+            try:
+                await asyncio.wait_for(handler(payload), timeout=timeout)
+                if done is not None:
+                    done.add(handler)
+            except asyncio.TimeoutError:
+                stats.timeouts += 1
+                metrics.inc("webhook_handler_failures_total", (("event", event_type), ("reason", "timeout")))
+                errors.append(f"{handler.__name__} timed out after {timeout}s")
+            except Exception as e:
+                stats.errors += 1
+                metrics.inc("webhook_handler_failures_total", (("event", event_type), ("reason", "error")))
+                errors.append(f"{handler.__name__}: {str(e)}")
+            finally:
+                elapsed = time.perf_counter() - started
+                stats.record(elapsed * 1000)
+                metrics.observe(
+                    "webhook_handler_duration_seconds", elapsed,
+                    (("event", event_type), ("handler", handler.__name__)),
+                )
+
+        if errors:
+            raise RuntimeError("; ".join(errors))
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            event_type: {handler.__name__: stats.to_dict() for handler, _, stats in handlers}
+            for event_type, handlers in self._handlers.items()
+        }
+
+
+webhook_dispatcher = WebhookDispatcher(WEBHOOK_HANDLER_TIMEOUT)
+
+
+@app.get("/api/webhooks/handlers")
+async def webhook_handler_stats():
+    """Per-handler call counts and latency, grouped by event type"""
+    return webhook_dispatcher.stats()
+
+
+# Webhook Queue Consumer
+
+class KeyedExecutor:
+    """
+    Runs jobs on a fixed set of asyncio lanes, sharded by key
+
+    Jobs with the same key always land on the same lane and run one at a
+    time in submission order; different keys run in parallel across lanes.
+    Each lane has a bounded queue, so `submit` waits when a lane is full.
+    """
+
+    def __init__(self, lanes: int, queue_size: int):
+        self._queues: List[asyncio.Queue] = [asyncio.Queue(maxsize=queue_size) for _ in range(lanes)]
+        self._workers: List[asyncio.Task] = []
+
+    def start(self):
+        self._workers = [asyncio.create_task(self._run(queue)) for queue in self._queues]
+
+    async def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def submit(self, key: str, job: Callable[[], Awaitable[None]]):
+        await self._queues[hash(key) % len(self._queues)].put(job)
+
+    def depths(self) -> List[int]:
+        return [queue.qsize() for queue in self._queues]
+
+    @staticmethod
+    async def _run(queue: asyncio.Queue):
+        while True:
+            job = await queue.get()
+            try:
+                await job()
+            except Exception as e:
+                log_event(logging.ERROR, "Error in webhook lane", error=str(e))
+            finally:
+                queue.task_done()
+
+
+def webhook_routing_key(payload: Mapping[str, Any]) -> str:
+    """Room an event belongs to; events for one room share a lane"""
+    room = payload.get("room") or {}
+    return room.get("name") or (payload.get("egressInfo") or {}).get("roomName") or ""
+
+
+async def process_webhook_event(event_id: int, payload: Mapping[str, Any], attempts: int):
+    """
+    Apply one queued event, retrying in place
+
+    Retrying inside the lane keeps later events for the same room waiting
+    behind this one, so per-room ordering holds across failures; only the
+    handlers that failed are run again. A body that does not decode will
+    never succeed and is parked straight away.
+    """
+    if getattr(payload, "decode_error", None):
+        webhook_queue.bury(event_id, attempts, payload.decode_error)
+        return
+    done: set = set()
+    while True:
+        attempts += 1
+        try:
+            await webhook_dispatcher.dispatch(payload, done)
+            webhook_queue.ack(event_id)
+            return
+        except Exception as e:
+            log_event(
+                logging.WARNING, "Error handling webhook event",
+                event_id=event_id, attempt=attempts, error=str(e),
+            )
+            if attempts >= WEBHOOK_MAX_ATTEMPTS or getattr(payload, "decode_error", None):
+                webhook_queue.bury(event_id, attempts, str(e))
+                return
+            await asyncio.sleep(WEBHOOK_RETRY_DELAY * (2 ** (attempts - 1)))
+
+
+async def drain_webhook_queue():
+    """Hand queued webhook events to the keyed executor, oldest first"""
+    while True:
+        batch = webhook_queue.fetch(WEBHOOK_QUEUE_BATCH_SIZE)
+        if not batch:
+            webhook_queue.wakeup.clear()
+            await webhook_queue.wakeup.wait()
+            continue
+
+        for event_id, body, attempts in batch:
+            event = WebhookEventView(body)
+            record_event(event)
+            await webhook_executor.submit(
+                event.routing_key,
+                functools.partial(process_webhook_event, event_id, event, attempts),
+            )
+
+        if event_log is not None:
+            try:
+                event_log.flush()
+            except OSError as e:
+                disable_event_log("Error flushing event log", e)
+            else:
+                if event_log.snapshot_due():
+                    await snapshot_event_log()
+
+
+def record_event(event: WebhookEventView):
+    """
+    Append an event to the event log and apply it to the room index
+
+    Runs in queue order on the single drain loop, so the index always equals
+    the snapshot plus the log up to the last appended record. The decoded
+    payload is cached on the view and shared with the handlers.
+    """
+    if event_log is not None:
+        try:
+            event_log.append(event.body)
+        except OSError as e:
+            disable_event_log("Error appending to event log", e)
+    try:
+        if event.event in RoomIndex.EVENTS:
+            room_index.apply(event)
+    except ValueError:
+        pass  # Undecodable; process_webhook_event parks it
+    except Exception as e:
+        # A payload of an unexpected shape must not stop the drain loop
+        log_event(logging.ERROR, "Error applying event to room index", event=event.event, error=repr(e))
+    event_broadcaster.publish(event)
+
+
 # Webhook Event Handlers
 
-async def handle_room_started(payload: Dict[str, Any]):
+@webhook_dispatcher.on("room_started")
+async def handle_room_started(payload: Mapping[str, Any]):
     """Handle room started event"""
     room = payload.get("room", {})
     room_name = room.get("name")
-    print(f"Room started: {room_name}")
+    log_event(logging.INFO, "Room started", event="room_started", room=room_name)
 
     # Add your custom logic here:
     # - Log room creation
@@ -193,13 +3576,18 @@ async def handle_room_started(payload: Dict[str, Any]):
     # - Send notifications
 
 
-async def handle_room_finished(payload: Dict[str, Any]):
+@webhook_dispatcher.on("room_finished")
+async def handle_room_finished(payload: Mapping[str, Any]):
     """Handle room finished event"""
     room = payload.get("room", {})
     room_name = room.get("name")
-    duration = room.get("duration", 0)
+    ended_at = event_timestamp(payload)
+    duration = session_duration(payload, ended_at)
+    if duration is not None:
+        session_analytics.record(room_name, duration, ended_at, payload.get("id"))
+    onboarding_allocator.room_finished(room_name)
 
-    print(f"Room finished: {room_name}, Duration: {duration}s")
+    log_event(logging.INFO, "Room finished", event="room_finished", room=room_name, duration=duration)
 
     # Add your custom logic here:
     # - Save session data
@@ -208,7 +3596,8 @@ async def handle_room_finished(payload: Dict[str, Any]):
     # - Clean up resources
 
 
-async def handle_participant_joined(payload: Dict[str, Any]):
+@webhook_dispatcher.on("participant_joined")
+async def handle_participant_joined(payload: Mapping[str, Any]):
     """Handle participant joined event"""
     room = payload.get("room", {})
     participant = payload.get("participant", {})
@@ -216,8 +3605,12 @@ async def handle_participant_joined(payload: Dict[str, Any]):
     room_name = room.get("name")
     participant_identity = participant.get("identity")
     participant_name = participant.get("name")
+    turn_tracker.participant_joined(payload)
 
-    print(f"Participant joined: {participant_name} ({participant_identity}) in room {room_name}")
+    log_event(
+        logging.INFO, "Participant joined", event="participant_joined",
+        room=room_name, identity=participant_identity, name=participant_name,
+    )
 
     # Add your custom logic here:
     # - Trigger voice agent greeting
@@ -226,15 +3619,17 @@ async def handle_participant_joined(payload: Dict[str, Any]):
     # - Send welcome message
 
 
-async def handle_participant_left(payload: Dict[str, Any]):
+@webhook_dispatcher.on("participant_left")
+async def handle_participant_left(payload: Mapping[str, Any]):
     """Handle participant left event"""
     room = payload.get("room", {})
     participant = payload.get("participant", {})
 
     room_name = room.get("name")
     participant_identity = participant.get("identity")
+    onboarding_allocator.participant_left(room_name, participant_identity)
 
-    print(f"Participant left: {participant_identity} from room {room_name}")
+    log_event(logging.INFO, "Participant left", event="participant_left", room=room_name, identity=participant_identity)
 
     # Add your custom logic here:
     # - Save session completion
@@ -242,15 +3637,14 @@ async def handle_participant_left(payload: Dict[str, Any]):
     # - Clean up user data
 
 
-async def handle_track_published(payload: Dict[str, Any]):
+@webhook_dispatcher.on("track_published")
+async def handle_track_published(payload: Mapping[str, Any]):
     """Handle track published event (audio/video started)"""
-    participant = payload.get("participant", {})
-    track = payload.get("track", {})
+    participant_identity = payload_field(payload, "participant", "identity")
+    track_type = payload_field(payload, "track", "type")
+    turn_tracker.track_published(payload)
 
-    participant_identity = participant.get("identity")
-    track_type = track.get("type")
-
-    print(f"Track published: {track_type} from {participant_identity}")
+    log_event(logging.INFO, "Track published", event="track_published", track_type=track_type, identity=participant_identity)
 
     # Add your custom logic here:
     # - Enable voice agent listening
@@ -258,24 +3652,42 @@ async def handle_track_published(payload: Dict[str, Any]):
     # - Record audio
 
 
-async def handle_track_unpublished(payload: Dict[str, Any]):
+@webhook_dispatcher.on("track_unpublished")
+async def handle_track_unpublished(payload: Mapping[str, Any]):
     """Handle track unpublished event (audio/video stopped)"""
-    participant = payload.get("participant", {})
-    track = payload.get("track", {})
+    participant_identity = payload_field(payload, "participant", "identity")
+    track_type = payload_field(payload, "track", "type")
 
-    participant_identity = participant.get("identity")
-    track_type = track.get("type")
+    log_event(logging.INFO, "Track unpublished", event="track_unpublished", track_type=track_type, identity=participant_identity)
 
-    print(f"Track unpublished: {track_type} from {participant_identity}")
 
-
-async def handle_recording_finished(payload: Dict[str, Any]):
+@webhook_dispatcher.on("recording_finished")
+async def handle_recording_finished(payload: Mapping[str, Any]):
     """Handle recording finished event"""
     recording = payload.get("egressInfo", {})
     room_name = recording.get("roomName")
     file_path = recording.get("file", {}).get("location")
 
-    print(f"Recording finished for room: {room_name}, File: {file_path}")
+    log_event(logging.INFO, "Recording finished", event="recording_finished", room=room_name, file=file_path)
+
+    # Audio metrics and turn-taking latency are computed in worker processes;
+    # this only schedules them
+    local_path = local_recording_path(file_path)
+    if audio_analysis.available() and room_name and local_path:
+        recording_id = recording.get("egressId") or file_path
+        if AUDIO_ANALYSIS_ENABLED:
+            schedule_analysis(
+                room_name, recording_id, "audio", audio_analysis.analyze_recording,
+                local_path, AUDIO_FRAME_MS, AUDIO_SILENCE_DBFS, AUDIO_CHUNK_SECONDS,
+            )
+        session = turn_tracker.recording_finished(room_name, recording_id, recording, local_path)
+        if TURN_ANALYSIS_ENABLED and session is not None:
+            session_id, user, agent = session
+            schedule_analysis(
+                room_name, session_id, "turns", audio_analysis.analyze_turn_taking,
+                user, agent, AUDIO_FRAME_MS, VAD_THRESHOLD_DBFS, VAD_NOISE_MARGIN_DB,
+                VAD_MIN_SPEECH_MS, VAD_MIN_SILENCE_MS, AUDIO_CHUNK_SECONDS,
+            )
 
     # Add your custom logic here:
     # - Process recording
@@ -286,25 +3698,122 @@ async def handle_recording_finished(payload: Dict[str, Any]):
 
 # Helper Functions
 
+async def get_or_create_token(room_name: str, participant_name: str, metadata: Optional[str] = None) -> str:
+    """
+    Return a cached token with enough TTL left, or sign and cache a new one
+
+    Signing runs on the signing pool; raises SigningPoolSaturated when the
+    pool cannot take more work.
+    """
+    cache_key = TokenCache.make_key(room_name, participant_name, metadata, DEFAULT_GRANTS)
+    jwt_token = token_cache.get(cache_key)
+
+    if jwt_token is None:
+        jwt_token, expires_at = await signing_pool.run(create_access_token, room_name, participant_name, metadata)
+        token_cache.put(cache_key, jwt_token, expires_at)
+
+    return jwt_token
+
+
+def create_access_tokens(requests: List[TokenRequest]) -> List[Any]:
+    """Sign several tokens in one go; each entry is (jwt, expires_at) or the exception raised"""
+    outcomes: List[Any] = []
+    for item in requests:
+        try:
+            outcomes.append(create_access_token(item.room_name, item.participant_name, item.metadata))
+        except Exception as e:
+            outcomes.append(e)
+    return outcomes
+
+
+def create_access_token(room_name: str, participant_name: str, metadata: Optional[str] = None) -> Tuple[str, float]:
+    """
+    Sign a LiveKit access token for a participant
+
+    Returns the JWT and its expiry as a unix timestamp. Uses the in-tree
+    fast signer when TOKEN_SIGNER=fast.
+    """
+    started = time.perf_counter()
+    issued_at = int(time.time())
+
+    if TOKEN_SIGNER == "fast":
+        jwt_token = get_fast_signer().sign(
+            room_name, participant_name, metadata, TOKEN_TTL_SECONDS, now=issued_at
+        )
+    else:
+        # Create access token
+        token = (
+            api.AccessToken(LIVEKIT_API_KEY, LIVEKIT_API_SECRET)
+            .with_identity(participant_name)
+            .with_name(participant_name)
+            .with_ttl(timedelta(seconds=TOKEN_TTL_SECONDS))
+            .with_metadata(metadata or "")
+            # Grant permissions
+            .with_grants(api.VideoGrants(room=room_name, **DEFAULT_GRANTS))
+        )
+
+        # Generate JWT token
+        jwt_token = token.to_jwt()
+
+    metrics.observe("token_sign_duration_seconds", time.perf_counter() - started, (("signer", TOKEN_SIGNER),))
+    return jwt_token, issued_at + TOKEN_TTL_SECONDS
+
+
+_webhook_mac = hmac.new(WEBHOOK_SECRET.encode(), digestmod=hashlib.sha256)
+
+
+async def read_webhook_body(request: Request) -> Tuple[bytearray, Any]:
+    """
+    Read a webhook body chunk by chunk, hashing it as it arrives
+
+    The digest is an HMAC-SHA256 for the "hmac" scheme and a plain SHA-256
+    for the "livekit" scheme. Rejects with 413 as soon as the declared or
+    received size exceeds WEBHOOK_MAX_BODY_BYTES. Returns the body (one
+    buffer, reused for dedup, parsing and the queue) and the digest.
+    """
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > WEBHOOK_MAX_BODY_BYTES:
+        raise HTTPException(status_code=413, detail=f"Webhook body exceeds {WEBHOOK_MAX_BODY_BYTES} bytes")
+
+    digest = _webhook_mac.copy() if WEBHOOK_AUTH_SCHEME == "hmac" else hashlib.sha256()
+    body = bytearray()
+    async for chunk in request.stream():
+        if len(body) + len(chunk) > WEBHOOK_MAX_BODY_BYTES:
+            raise HTTPException(status_code=413, detail=f"Webhook body exceeds {WEBHOOK_MAX_BODY_BYTES} bytes")
+        body += chunk
+        digest.update(chunk)
+
+    return body, digest
+
+
+def webhook_digest_matches(digest: Any, auth_header: str) -> bool:
+    """Check a streamed body digest against the Authorization header for the configured scheme"""
+    if WEBHOOK_AUTH_SCHEME == "hmac":
+        return webhook_signature_matches(digest.hexdigest(), auth_header)
+    return get_webhook_token_verifier().verify(auth_header, base64.b64encode(digest.digest()).decode())
+
+
+def webhook_signature_matches(expected_signature: str, auth_header: str) -> bool:
+    """Compare a computed signature with the "sha256=<signature>" header"""
+    received_signature = auth_header.replace("sha256=", "")
+    return hmac.compare_digest(expected_signature, received_signature)
+
+
 def verify_webhook_signature(body: bytes, auth_header: str) -> bool:
     """
-    Verify webhook signature from LiveKit
+    Verify a legacy "sha256=<hex>" webhook signature
 
-    LiveKit signs webhooks with HMAC-SHA256
+    Used by the "hmac" scheme: an HMAC-SHA256 of the body keyed with
+    LIVEKIT_WEBHOOK_SECRET
     """
     try:
-        expected_signature = hmac.new(
-            WEBHOOK_SECRET.encode(),
-            body,
-            hashlib.sha256
-        ).hexdigest()
+        mac = _webhook_mac.copy()
+        mac.update(body)
 
         # Auth header format: "sha256=<signature>"
-        received_signature = auth_header.replace("sha256=", "")
-
-        return hmac.compare_digest(expected_signature, received_signature)
+        return webhook_signature_matches(mac.hexdigest(), auth_header)
     except Exception as e:
-        print(f"Error verifying signature: {e}")
+        log_event(logging.ERROR, "Error verifying signature", error=str(e))
         return False
 
 
@@ -0,0 +1,14 @@
+import os
+import sys
+import tempfile
+
+# The app reads its configuration at import time, so point every on-disk
+# store at a scratch directory before any test imports main
+_state_dir = tempfile.mkdtemp(prefix="travai-tests-")
+os.environ.setdefault("LIVEKIT_API_KEY", "APItestkey")
+os.environ.setdefault("LIVEKIT_API_SECRET", "test-secret-that-is-long-enough-for-hs256")
+os.environ.setdefault("WEBHOOK_QUEUE_PATH", os.path.join(_state_dir, "webhook_queue.db"))
+os.environ.setdefault("EVENT_LOG_DIR", os.path.join(_state_dir, "event_log"))
+os.environ.setdefault("AUDIO_ANALYSIS_WORKERS", "1")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
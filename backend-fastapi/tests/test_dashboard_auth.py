@@ -0,0 +1,32 @@
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+import main
+
+DASHBOARD_ROUTES = ["/api/rooms", "/api/rooms/x", "/api/rooms/x/audio", "/api/rooms/x/turns", "/debug/loop", "/api/events/stream/stats"]
+
+
+def test_dashboard_routes_are_disabled_without_a_token(monkeypatch):
+    monkeypatch.setattr(main, "DASHBOARD_TOKEN", "")
+    with TestClient(main.app) as client:
+        for path in DASHBOARD_ROUTES + ["/api/events/stream"]:
+            assert client.get(path, headers={"Authorization": "Bearer anything"}).status_code == 404, path
+        with pytest.raises(WebSocketDisconnect):
+            with client.websocket_connect("/api/events/stream?access_token=anything") as ws:
+                ws.receive_text()
+
+
+def test_dashboard_routes_require_the_token(monkeypatch):
+    monkeypatch.setattr(main, "DASHBOARD_TOKEN", "s3cret")
+    with TestClient(main.app) as client:
+        for path in DASHBOARD_ROUTES:
+            assert client.get(path).status_code == 401, path
+            assert client.get(path, headers={"Authorization": "Bearer wrong"}).status_code == 401, path
+        assert client.get("/api/rooms", headers={"Authorization": "Bearer s3cret"}).status_code == 200
+        assert client.get("/api/events/stream/stats?access_token=s3cret").status_code == 200
+        with pytest.raises(WebSocketDisconnect):
+            with client.websocket_connect("/api/events/stream") as ws:
+                ws.receive_text()
+        with client.websocket_connect("/api/events/stream?access_token=s3cret"):
+            pass
@@ -0,0 +1,110 @@
+import json
+import os
+
+from fastapi.testclient import TestClient
+
+import main
+from test_webhooks import post_webhook, wait_for_queue
+
+
+def room_started(name: str) -> bytes:
+    return json.dumps({
+        "event": "room_started",
+        "room": {"sid": f"RM_{name}", "name": name, "creationTime": "1730462400"},
+        "id": f"EV_{name}",
+        "createdAt": "1730462400",
+    }).encode()
+
+
+def open_log(directory, snapshot_every: int = 1000):
+    log = main.EventLog(str(directory), segment_bytes=1 << 20, snapshot_every=snapshot_every)
+    index = main.RoomIndex()
+    log.recover(index.restore, lambda line: index.apply(main.WebhookEventView(line)))
+    return log, index
+
+
+def append(log, index, body: bytes):
+    log.append(body)
+    index.apply(main.WebhookEventView(body))
+
+
+def test_recovery_loads_snapshot_and_replays_only_the_tail(tmp_path):
+    log, index = open_log(tmp_path)
+    for name in ("a", "b", "c"):
+        append(log, index, room_started(name))
+    log.write_snapshot(log.begin_snapshot(), index.snapshot())
+    for name in ("d", "e"):
+        append(log, index, room_started(name))
+    log.close()
+
+    log, index = open_log(tmp_path)
+    assert log.snapshot_seq == 3
+    assert log.replayed == 2
+    assert log.next_seq == 6
+    assert sorted(index.rooms) == ["a", "b", "c", "d", "e"]
+    log.close()
+
+
+def test_torn_last_record_is_dropped(tmp_path):
+    log, index = open_log(tmp_path)
+    append(log, index, room_started("a"))
+    log.close()
+    (_, segment), = log._segments()
+    with open(segment, "ab") as f:
+        f.write(room_started("torn")[:20])
+
+    log, index = open_log(tmp_path)
+    assert sorted(index.rooms) == ["a"]
+    assert log.next_seq == 2
+    with open(segment, "rb") as f:
+        assert f.read() == room_started("a") + b"\n"
+    log.close()
+
+
+def test_snapshot_compacts_covered_segments_and_older_snapshots(tmp_path):
+    log, index = open_log(tmp_path)
+    append(log, index, room_started("a"))
+    log.write_snapshot(log.begin_snapshot(), index.snapshot())
+    append(log, index, room_started("b"))
+    log.write_snapshot(log.begin_snapshot(), index.snapshot())
+
+    assert [seq for seq, _ in log._snapshots()] == [2]
+    # Only the open segment, which starts after the snapshot, is kept
+    assert [seq for seq, _ in log._segments()] == [3]
+    log.close()
+
+
+def test_corrupt_snapshot_disables_the_log_without_stopping_the_consumer(tmp_path, monkeypatch):
+    directory = tmp_path / "event_log"
+    os.makedirs(directory)
+    (directory / f"snapshot-{5:016d}.json").write_bytes(b'{"seq": 5, "state": [{"sid"')
+    monkeypatch.setattr(main, "EVENT_LOG_DIR", str(directory))
+
+    with TestClient(main.app) as client:
+        status = client.get("/api/events/log").json()
+        assert status["enabled"] is False
+        assert "Error recovering event log" in status["error"]
+
+        assert post_webhook(client, room_started("after-corrupt")).status_code == 200
+        depth = wait_for_queue(client)
+        assert depth["pending"] == 0 and depth["inflight"] == 0
+        assert not main._webhook_consumer.done()
+        assert "after-corrupt" in main.room_index.rooms
+
+    assert (directory / f"snapshot-{5:016d}.json").exists()
+
+
+def test_append_failure_disables_the_log_without_stopping_the_consumer(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "EVENT_LOG_DIR", str(tmp_path / "event_log"))
+
+    def fail(body):
+        raise OSError(28, "No space left on device")
+
+    with TestClient(main.app) as client:
+        monkeypatch.setattr(main.event_log, "append", fail)
+        assert post_webhook(client, room_started("disk-full")).status_code == 200
+        depth = wait_for_queue(client)
+        assert depth["pending"] == 0 and depth["inflight"] == 0
+        assert not main._webhook_consumer.done()
+        assert main.event_log is None
+        assert "disk-full" in main.room_index.rooms
@@ -0,0 +1,67 @@
+import asyncio
+import json
+
+import main
+
+
+def livekit_body(event: str, **members) -> bytes:
+    """Body laid out the way LiveKit serializes it: proto field order, int64s as strings"""
+    return json.dumps({
+        "event": event,
+        "room": {"sid": "RM_1", "name": "onboarding-1", "emptyTimeout": 300, "creationTime": "1730462400"},
+        **members,
+        "id": f"EV_{event}",
+        "createdAt": "1730462460",
+    }).encode()
+
+
+USER = {
+    "sid": "PA_user",
+    "identity": "user_1",
+    "state": "ACTIVE",
+    "tracks": [{"sid": "TR_user", "type": "AUDIO", "layers": [{"quality": "HIGH"}]}],
+    "metadata": "{\"plan\": \"pro\"}",
+    "joinedAt": "1730462401",
+    "name": "José",
+    "permission": {"canSubscribe": True},
+    "kind": "STANDARD",
+}
+TRACK = {"sid": "TR_user", "type": "AUDIO", "name": "mic", "source": "MICROPHONE", "layers": [{"quality": "HIGH"}]}
+
+
+def test_track_events_are_applied_without_a_full_decode():
+    index = main.RoomIndex()
+    joined = main.WebhookEventView(livekit_body("participant_joined", participant=USER))
+    index.apply(joined)
+    asyncio.run(main.handle_participant_joined(joined))
+
+    published = main.WebhookEventView(livekit_body("track_published", participant=USER, track=TRACK))
+    index.apply(published)
+    asyncio.run(main.handle_track_published(published))
+    assert not published.parsed
+
+    participant = index.rooms["onboarding-1"].participants["PA_user"]
+    assert participant.name == "José"
+    track = participant.tracks["TR_user"].to_dict()
+    assert track == {
+        "sid": "TR_user", "type": "AUDIO", "source": "MICROPHONE", "name": "mic",
+        "muted": False, "published_at": 1730462460.0,
+    }
+
+    unpublished = main.WebhookEventView(livekit_body("track_unpublished", participant=USER, track=TRACK))
+    index.apply(unpublished)
+    asyncio.run(main.handle_track_unpublished(unpublished))
+    assert not unpublished.parsed
+    assert participant.tracks == {}
+
+
+def test_peek_falls_back_to_the_payload():
+    view = main.WebhookEventView(livekit_body("track_published", participant=USER, track=TRACK))
+    # Behind the nested tracks list, so only the decoded payload has it
+    assert view.peek("participant", "kind") == "STANDARD"
+    assert view.parsed
+
+    view = main.WebhookEventView(livekit_body("track_published", participant=USER, track={"sid": "TR_x", "type": "AUDIO"}))
+    assert view.peek("track", "muted", False) is False
+    assert view.peek("track", "source", "") == ""
+    assert not view.parsed
@@ -0,0 +1,125 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from test_webhook_dispatcher import RecordingQueue
+from test_webhooks import post_webhook, wait_for_queue
+
+
+def keys_on_different_lanes(lanes: int):
+    first = "room-0"
+    for i in range(1, 100):
+        other = f"room-{i}"
+        if hash(other) % lanes != hash(first) % lanes:
+            return first, other
+    raise AssertionError("no keys on different lanes")
+
+
+def test_same_key_runs_in_order_and_other_keys_in_parallel():
+    log = []
+
+    def job(key, n, delay):
+        async def run():
+            log.append(("start", key, n))
+            await asyncio.sleep(delay)
+            log.append(("end", key, n))
+        return run
+
+    async def scenario():
+        executor = main.KeyedExecutor(lanes=2, queue_size=10)
+        executor.start()
+        a, b = keys_on_different_lanes(2)
+        await executor.submit(a, job(a, 1, 0.05))
+        await executor.submit(a, job(a, 2, 0.0))
+        await executor.submit(b, job(b, 1, 0.0))
+        await asyncio.sleep(0.2)
+        await executor.stop()
+        return a, b
+
+    a, b = asyncio.run(scenario())
+    assert [entry for entry in log if entry[1] == a] == [("start", a, 1), ("end", a, 1), ("start", a, 2), ("end", a, 2)]
+    # The other room did not wait behind the slow job
+    assert log.index(("end", b, 1)) < log.index(("end", a, 1))
+
+
+def test_retry_in_place_holds_back_later_events_for_the_room(monkeypatch):
+    dispatcher = main.WebhookDispatcher(default_timeout=1.0)
+    monkeypatch.setattr(main, "webhook_dispatcher", dispatcher)
+    monkeypatch.setattr(main, "webhook_queue", RecordingQueue())
+    monkeypatch.setattr(main, "WEBHOOK_RETRY_DELAY", 0.01)
+    handled = []
+    failures = {"EV_1": 2}
+
+    @dispatcher.on("room_started")
+    async def flaky(payload):
+        if failures.get(payload["id"], 0):
+            failures[payload["id"]] -= 1
+            raise RuntimeError("not yet")
+        handled.append(payload["id"])
+
+    async def scenario():
+        executor = main.KeyedExecutor(lanes=4, queue_size=10)
+        executor.start()
+        for n, event_id in enumerate(("EV_1", "EV_2", "EV_3"), start=1):
+            payload = {"event": "room_started", "id": event_id, "room": {"name": "retry-room"}}
+            await executor.submit("retry-room", lambda n=n, payload=payload: main.process_webhook_event(n, payload, 0))
+        while len(handled) < 3:
+            await asyncio.sleep(0.01)
+        await executor.stop()
+
+    asyncio.run(asyncio.wait_for(scenario(), 5))
+    assert handled == ["EV_1", "EV_2", "EV_3"]
+    assert main.webhook_queue.acked == [1, 2, 3]
+
+
+def test_full_lane_leaves_events_pending_in_sqlite(monkeypatch):
+    monkeypatch.setattr(main, "WEBHOOK_LANES", 1)
+    monkeypatch.setattr(main, "WEBHOOK_LANE_QUEUE_SIZE", 1)
+    monkeypatch.setattr(main, "WEBHOOK_QUEUE_BATCH_SIZE", 1)
+    dispatcher = main.WebhookDispatcher(default_timeout=10.0)
+    monkeypatch.setattr(main, "webhook_dispatcher", dispatcher)
+    release = threading.Event()
+    handled = []
+
+    @dispatcher.on("room_started")
+    async def blocked(payload):
+        while not release.is_set():
+            await asyncio.sleep(0.01)
+        handled.append(payload["id"])
+
+    bodies = [
+        json.dumps({"event": "room_started", "id": f"EV_lane_{i}", "room": {"sid": "RM_lane", "name": "lane-room"}}).encode()
+        for i in range(5)
+    ]
+    with TestClient(main.app) as client:
+        for body in bodies:
+            assert post_webhook(client, body).status_code == 200
+
+        # One running, one queued on the lane, one held by the blocked drain loop
+        deadline = time.time() + 5
+        while client.get("/api/webhooks/queue").json()["pending"] > 2 and time.time() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.1)
+        depth = client.get("/api/webhooks/queue").json()
+        assert depth["pending"] == 2 and depth["inflight"] == 3
+        assert main.webhook_executor.depths() == [1]
+
+        release.set()
+        depth = wait_for_queue(client)
+        assert depth["pending"] == 0 and depth["inflight"] == 0
+
+    assert handled == [f"EV_lane_{i}" for i in range(5)]
+
+
+@pytest.mark.parametrize("payload, key", [
+    ({"room": {"name": "r1"}}, "r1"),
+    ({"egressInfo": {"roomName": "r2"}}, "r2"),
+    ({"event": "unknown"}, ""),
+])
+def test_routing_key(payload, key):
+    assert main.webhook_routing_key(payload) == key
@@ -0,0 +1,93 @@
+import io
+import json
+import logging
+import threading
+
+from fastapi.testclient import TestClient
+
+import main
+
+
+def record(msg: str, level: int = logging.INFO, **fields) -> logging.LogRecord:
+    entry = logging.LogRecord("travai", level, __file__, 1, msg, None, None)
+    entry.fields = fields
+    return entry
+
+
+class RecordingStream(io.StringIO):
+    def __init__(self):
+        super().__init__()
+        self.batches = []
+
+    def write(self, text: str) -> int:
+        self.batches.append(text.count("\n"))
+        return super().write(text)
+
+
+def make_handler(stream, queue_size: int = 100, batch_size: int = 10) -> main.BatchingQueueHandler:
+    handler = main.BatchingQueueHandler(stream, queue_size, batch_size)
+    handler.setFormatter(main.JsonLineFormatter())
+    return handler
+
+
+def test_formatter_merges_fields_into_one_json_line():
+    line = main.JsonLineFormatter().format(record("Room started", room="r1", event="room_started"))
+    entry = json.loads(line)
+    assert "\n" not in line
+    assert entry["msg"] == "Room started" and entry["level"] == "INFO"
+    assert entry["room"] == "r1" and entry["event"] == "room_started"
+
+
+def test_sampler_keeps_one_in_n_and_never_samples_warnings():
+    sampler = main.EventSampler(main.EventSampler.parse_rates("track_published=0.25, other=0"))
+    kept = [sampler.filter(record("x", event="track_published")) for _ in range(8)]
+    assert kept == [True, False, False, False, True, False, False, False]
+    assert not sampler.filter(record("x", event="other"))
+    assert sampler.filter(record("x", logging.WARNING, event="other"))
+    assert sampler.filter(record("x", event="room_started"))
+    assert sampler.sampled_out == 7
+
+
+def test_handler_writes_batches_and_flush_waits_for_them():
+    stream = RecordingStream()
+    handler = make_handler(stream, batch_size=10)
+    try:
+        for i in range(25):
+            handler.emit(record(f"line {i}"))
+        handler.flush()
+        lines = stream.getvalue().splitlines()
+        assert [json.loads(line)["msg"] for line in lines] == [f"line {i}" for i in range(25)]
+        assert max(stream.batches) <= 10 and handler.written == 25
+    finally:
+        handler.close()
+
+
+def test_handler_drops_instead_of_blocking_when_full():
+    writing, release = threading.Event(), threading.Event()
+
+    class StuckStream(io.StringIO):
+        def write(self, text):
+            writing.set()
+            release.wait(5)
+            return super().write(text)
+
+    handler = make_handler(StuckStream(), queue_size=2)
+    try:
+        handler.emit(record("taken by the writer"))
+        assert writing.wait(5)
+        for i in range(5):
+            handler.emit(record(f"queued {i}"))
+        assert handler.dropped == 3
+    finally:
+        release.set()
+        handler.close()
+
+
+def test_logging_keeps_working_after_a_lifespan_ends():
+    for _ in range(2):
+        with TestClient(main.app):
+            pass
+    written = main.log_handler.written
+    main.log_event(logging.WARNING, "After shutdown")
+    main.log_handler.flush()
+    assert main.log_handler.written == written + 1
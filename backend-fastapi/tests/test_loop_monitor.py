@@ -0,0 +1,66 @@
+import asyncio
+import time
+
+import main
+
+
+def blocked_total() -> float:
+    return main.metrics._counters["event_loop_blocked_total"].get((), 0)
+
+
+def block_the_loop_for(seconds: float):
+    time.sleep(seconds)
+
+
+def run_blocking_session(monitor: main.LoopMonitor):
+    async def session():
+        task = monitor.start()
+        await asyncio.sleep(0.1)
+        block_the_loop_for(0.3)
+        await asyncio.sleep(0.1)
+        monitor.stop()
+        task.cancel()
+
+    asyncio.run(session())
+
+
+def test_blocked_loop_is_reported_with_the_blocking_stack_in_every_run():
+    monitor = main.LoopMonitor(interval=0.02, blocked_threshold=0.1, slow_request_threshold=10, max_reports=10)
+    before = blocked_total()
+
+    run_blocking_session(monitor)
+    run_blocking_session(monitor)
+
+    assert len(monitor.blocked_events) == 2
+    for event in monitor.blocked_events:
+        assert event["blocked_for_s"] >= 0.1
+        assert any("block_the_loop_for" in line for line in event["stack"])
+    assert blocked_total() == before + 2
+
+
+def test_slow_request_is_reported_once_with_its_await_chain():
+    monitor = main.LoopMonitor(interval=0.02, blocked_threshold=10, slow_request_threshold=0.1, max_reports=10)
+
+    async def slow_handler():
+        await asyncio.sleep(0.3)
+
+    async def request():
+        request_id = monitor.request_started({"path": "/api/slow", "method": "POST"})
+        try:
+            await slow_handler()
+        finally:
+            monitor.request_finished(request_id)
+
+    async def session():
+        task = monitor.start()
+        await request()
+        monitor.stop()
+        task.cancel()
+
+    asyncio.run(session())
+
+    (report,) = monitor.slow_requests
+    assert report["route"] == "/api/slow" and report["method"] == "POST"
+    assert report["running_for_s"] >= 0.1
+    assert any("slow_handler" in line for line in report["stack"])
+    assert monitor.report()["inflight_requests"] == 0
@@ -0,0 +1,56 @@
+from fastapi.testclient import TestClient
+
+import main
+
+
+def registry() -> main.MetricsRegistry:
+    registry = main.MetricsRegistry()
+    registry.counter("jobs_total", "Jobs by result")
+    registry.histogram("job_seconds", "Job latency")
+    registry.gauge("queue_depth", "Queued jobs", lambda: [((("queue", "a"),), 3)])
+    registry.gauge("broken", "Gauge whose callback fails", lambda: 1 / 0)
+    return registry
+
+
+def test_counters_and_gauges_render_in_text_format():
+    metrics = registry()
+    metrics.inc("jobs_total", (("result", "ok"),))
+    metrics.inc("jobs_total", (("result", "ok"),), 2)
+    metrics.inc("jobs_total", (("result", 'say "hi"\n\\'),))
+
+    lines = metrics.render().splitlines()
+    assert lines[:2] == ["# HELP jobs_total Jobs by result", "# TYPE jobs_total counter"]
+    assert 'jobs_total{result="ok"} 3' in lines
+    assert 'jobs_total{result="say \\"hi\\"\\n\\\\"} 1' in lines
+    assert "# TYPE queue_depth gauge" in lines and 'queue_depth{queue="a"} 3' in lines
+    # A failing gauge callback renders no samples instead of failing the scrape
+    assert lines[lines.index("# TYPE broken gauge") + 1:] == []
+
+
+def test_histogram_buckets_are_cumulative_and_upper_inclusive():
+    metrics = registry()
+    for value in (0.001, 0.001, 0.003, 20.0):
+        metrics.observe("job_seconds", value)
+
+    lines = metrics.render().splitlines()
+    buckets = [line for line in lines if line.startswith("job_seconds_bucket")]
+    assert len(buckets) == len(main.LATENCY_BUCKETS) + 1
+    assert 'job_seconds_bucket{le="0.0005"} 0' in buckets
+    assert 'job_seconds_bucket{le="0.001"} 2' in buckets
+    assert 'job_seconds_bucket{le="0.005"} 3' in buckets
+    assert 'job_seconds_bucket{le="10.0"} 3' in buckets
+    assert buckets[-1] == 'job_seconds_bucket{le="+Inf"} 4'
+    counts = [int(line.rsplit(" ", 1)[1]) for line in buckets]
+    assert counts == sorted(counts)
+    assert "job_seconds_count 4" in lines
+    assert any(line.startswith("job_seconds_sum 20.005") for line in lines)
+
+
+def test_metrics_endpoint_serves_the_registry():
+    with TestClient(main.app) as client:
+        client.get("/health")
+        response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'http_requests_total{route="/health",method="GET",status="200"}' in response.text
+    assert "# TYPE http_request_duration_seconds histogram" in response.text
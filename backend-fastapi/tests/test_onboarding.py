@@ -0,0 +1,19 @@
+import main
+
+
+def test_room_is_recycled_only_after_it_finishes():
+    allocator = main.OnboardingRoomAllocator("onboarding", capacity=1, pool_size=10)
+    first = allocator.allocate("alice")
+    assert allocator.allocate("alice") == first
+
+    allocator.participant_left(first, "alice")
+    second = allocator.allocate("bob")
+    assert second != first
+    # Alice's room is still live, so asking again gets her a fresh room
+    third = allocator.allocate("alice")
+    assert third not in (first, second)
+
+    allocator.room_finished(first)
+    assert allocator.allocate("carol") == first
+    assert allocator.allocate("alice") == third
+    assert allocator.stats()["rooms_reused"] == 1
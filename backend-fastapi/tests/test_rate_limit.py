@@ -0,0 +1,75 @@
+import sqlite3
+
+from fastapi.testclient import TestClient
+
+import main
+
+
+def test_shared_limiter_fails_open_while_another_worker_holds_the_lock(tmp_path):
+    path = str(tmp_path / "ratelimit.db")
+    limiter = main.SqliteTokenBucketLimiter(path, "ip", rate=1, burst=1, timeout=0.01)
+    assert limiter.allow("1.2.3.4") == (True, 0.0)
+    assert not limiter.allow("1.2.3.4")[0]
+
+    other_worker = sqlite3.connect(path, isolation_level=None)
+    other_worker.execute("BEGIN IMMEDIATE")
+    try:
+        assert limiter.allow("1.2.3.4") == (True, 0.0)
+        assert limiter.failed_open == 1
+    finally:
+        other_worker.execute("ROLLBACK")
+        other_worker.close()
+    assert not limiter.allow("1.2.3.4")[0]
+
+
+def test_oversized_token_request_is_rejected_before_buffering():
+    with TestClient(main.app) as client:
+        body = b'{"room_name":"r","participant_name":"p","metadata":"' + b"x" * main.RATE_LIMIT_MAX_BODY_BYTES + b'"}'
+        response = client.post("/api/token", content=body, headers={"Content-Type": "application/json"})
+        assert response.status_code == 413
+
+
+def test_batch_entries_are_charged_to_their_participants():
+    burst = int(main.RATE_LIMIT_PARTICIPANT_BURST)
+    entries = [{"room_name": f"room-{i}", "participant_name": "batch-hog"} for i in range(burst + 3)]
+    entries.append({"room_name": "room-0", "participant_name": "batch-other"})
+    with TestClient(main.app) as client:
+        results = client.post("/api/tokens:batch", json={"requests": entries}).json()["results"]
+
+    assert all(r["token"] for r in results[:burst])
+    assert [r["error"] for r in results[burst:-1]] == ["Rate limit exceeded"] * 3
+    assert results[-1]["token"]
+
+
+def test_rejections_pass_through_metrics_and_cors():
+    def rejected_count() -> float:
+        labels = (("route", "/api/token"), ("method", "POST"), ("status", "429"))
+        return main.metrics._counters["http_requests_total"].get(labels, 0)
+
+    before = rejected_count()
+    request = {"room_name": "cors-room", "participant_name": "cors-hog"}
+    with TestClient(main.app) as client:
+        statuses = [
+            client.post("/api/token", json=request, headers={"Origin": "https://app.example"})
+            for _ in range(int(main.RATE_LIMIT_PARTICIPANT_BURST) + 2)
+        ]
+
+    rejected = [response for response in statuses if response.status_code == 429]
+    assert len(rejected) == 2
+    assert all(response.headers["access-control-allow-origin"] for response in rejected)
+    assert rejected_count() == before + 2
+
+
+def test_participant_bucket_is_the_identity_that_gets_signed():
+    burst = int(main.RATE_LIMIT_PARTICIPANT_BURST)
+    headers = {"Content-Type": "application/json"}
+    with TestClient(main.app) as client:
+        duplicate = b'{"room_name":"r","participant_name":"decoy","participant_name":"victim"}'
+        assert client.post("/api/token", content=duplicate, headers=headers).status_code == 400
+
+        for _ in range(burst):
+            assert client.post("/api/token", json={"room_name": "r", "participant_name": "victim"}).status_code == 200
+        escaped_value = b'{"room_name":"r","participant_name":"vict\\u0069m"}'
+        escaped_key = b'{"room_name":"r","participant\\u005fname":"victim"}'
+        assert client.post("/api/token", content=escaped_value, headers=headers).status_code == 429
+        assert client.post("/api/token", content=escaped_key, headers=headers).status_code == 429
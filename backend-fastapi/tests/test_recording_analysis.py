@@ -0,0 +1,39 @@
+import asyncio
+import wave
+
+import pytest
+
+import audio_analysis
+import main
+
+np = pytest.importorskip("numpy")
+
+
+def write_wav(path, samples, sample_rate=16000):
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(samples.astype("<i2").tobytes())
+
+
+def test_analysis_runs_in_spawned_workers(tmp_path):
+    tone = (np.sin(np.arange(16000) * 2 * np.pi * 440 / 16000) * 8000).astype(np.int16)
+    path = tmp_path / "tone.wav"
+    write_wav(path, np.concatenate([tone, np.zeros(16000, dtype=np.int16)]))
+
+    async def analyze():
+        analyzer = main.RecordingAnalyzer(workers=1, max_pending=4, max_rooms=10)
+        try:
+            assert analyzer.submit("room", "EG_1", "audio", audio_analysis.analyze_recording, str(path))
+            await asyncio.gather(*analyzer._tasks)
+            assert analyzer._executor._mp_context.get_start_method() == "spawn"
+            return analyzer.get("room")["EG_1"]
+        finally:
+            await analyzer.shutdown()
+
+    results = asyncio.run(analyze())
+    audio = results["audio"]
+    assert audio["status"] == "ok"
+    assert audio["duration_s"] == 2.0
+    assert 0.45 <= audio["silence_ratio"] <= 0.55
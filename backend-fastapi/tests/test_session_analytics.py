@@ -0,0 +1,28 @@
+import asyncio
+
+import main
+
+
+def room_finished(event_id: str, created_at: int, duration: int) -> dict:
+    return {
+        "event": "room_finished",
+        "id": event_id,
+        "createdAt": str(created_at),
+        "room": {"sid": "RM_1", "name": "onboarding-abc", "duration": duration},
+    }
+
+
+def test_sessions_are_bucketed_by_created_at_and_counted_once(monkeypatch):
+    analytics = main.SessionAnalytics(0.01, hours=48, days=30, onboarding_prefix="onboarding", max_event_ids=100)
+    monkeypatch.setattr(main, "session_analytics", analytics)
+
+    # Finished at 2024-11-01 10:15 UTC, processed (and redelivered) much later
+    event = room_finished("EV_1", 1730456100, 300)
+    asyncio.run(main.handle_room_finished(event))
+    asyncio.run(main.handle_room_finished(event))
+    asyncio.run(main.handle_room_finished(room_finished("EV_2", 1730456200, 600)))
+
+    report = analytics.report("hour", kind="onboarding")
+    assert [row["start"] for row in report["windows"]] == ["2024-11-01T10:00:00Z"]
+    assert report["total"]["count"] == 2
+    assert analytics.duplicates == 1
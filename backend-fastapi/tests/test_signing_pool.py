@@ -0,0 +1,58 @@
+import threading
+
+from fastapi.testclient import TestClient
+
+import main
+
+
+def token_request(name: str) -> dict:
+    return {"room_name": "pool-room", "participant_name": name}
+
+
+def test_each_lifespan_gets_a_working_pool():
+    for run in range(2):
+        with TestClient(main.app) as client:
+            assert client.post("/api/token", json=token_request(f"lifespan-{run}")).status_code == 200
+
+
+def test_full_queue_answers_503_with_retry_after(monkeypatch):
+    monkeypatch.setattr(main, "SIGNING_POOL_MIN_WORKERS", 1)
+    monkeypatch.setattr(main, "SIGNING_POOL_MAX_WORKERS", 1)
+    monkeypatch.setattr(main, "SIGNING_POOL_MAX_QUEUE", 0)
+    signing, release = threading.Event(), threading.Event()
+    sign = main.create_access_token
+
+    def blocking_sign(*args):
+        signing.set()
+        release.wait(5)
+        return sign(*args)
+
+    monkeypatch.setattr(main, "create_access_token", blocking_sign)
+    with TestClient(main.app) as client:
+        first = {}
+        worker = threading.Thread(target=lambda: first.update(response=client.post("/api/token", json=token_request("busy-1"))))
+        worker.start()
+        assert signing.wait(5)
+
+        rejected = client.post("/api/token", json=token_request("busy-2"))
+        release.set()
+        worker.join(5)
+
+        assert rejected.status_code == 503
+        assert rejected.headers["Retry-After"] == str(main.SIGNING_RETRY_AFTER)
+        assert first["response"].status_code == 200
+        assert client.get("/api/token/signing").json()["rejected"] == 1
+
+
+def test_limit_grows_under_queueing_and_shrinks_when_idle():
+    pool = main.AdaptiveSigningPool(1, 4, 10, target_wait=0.01)
+    try:
+        for _ in range(20):
+            pool._adapt(0.1)
+        assert pool.limit == 4
+
+        for _ in range(100):
+            pool._adapt(0.0)
+        assert pool.limit == 1
+    finally:
+        pool.shutdown()
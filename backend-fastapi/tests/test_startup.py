@@ -0,0 +1,9 @@
+from fastapi.testclient import TestClient
+
+import main
+
+
+def test_app_starts_and_serves_health():
+    with TestClient(main.app) as client:
+        assert client.get("/health").json() == {"status": "healthy"}
+        assert client.get("/health/live").status_code == 200
@@ -0,0 +1,60 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+
+def test_malformed_entry_fails_only_itself():
+    body = {"requests": [
+        {"room_name": "batch-room", "participant_name": "ana"},
+        {"room_name": "batch-room"},
+        "not an object",
+        {"room_name": "batch-room", "participant_name": "ana"},
+    ]}
+    with TestClient(main.app) as client:
+        response = client.post("/api/tokens:batch", json=body)
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [bool(r["token"]) for r in results] == [True, False, False, True]
+    assert results[0]["token"] == results[3]["token"]
+    assert results[1]["error"] == "Invalid request: participant_name: Field required"
+    assert results[2]["error"].startswith("Invalid request: ")
+
+
+def test_batch_over_token_batch_max_is_rejected_with_422(monkeypatch):
+    signed = []
+    monkeypatch.setattr(main, "create_access_tokens", lambda items: signed.append(items) or [])
+    body = {"requests": [{"room_name": "r", "participant_name": "p"}] * (main.TOKEN_BATCH_MAX + 1)}
+    with TestClient(main.app) as client:
+        response = client.post("/api/tokens:batch", json=body)
+
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["type"] == "too_long"
+    assert response.json()["detail"][0]["loc"] == ["body", "requests"]
+    assert not signed
+
+
+def test_malformed_json_is_rejected_with_422():
+    with TestClient(main.app) as client:
+        response = client.post("/api/tokens:batch", content=b'{"requests": [', headers={"Content-Type": "application/json"})
+    assert response.status_code == 422
+
+
+@pytest.mark.parametrize("chunked", [False, True])
+def test_body_over_the_byte_cap_is_rejected_before_decoding(monkeypatch, chunked):
+    monkeypatch.setattr(main, "TOKEN_BATCH_MAX_BODY_BYTES", 1024)
+    decoded = []
+    validate = main.BatchTokenRequest.model_validate_json
+    monkeypatch.setattr(main.BatchTokenRequest, "model_validate_json", lambda body: decoded.append(body) or validate(body))
+    body = json.dumps({"requests": [{"room_name": "r", "participant_name": f"p{i}"} for i in range(100)]}).encode()
+    # A generator body is sent chunked, without Content-Length
+    content = iter([body[:512], body[512:]]) if chunked else body
+
+    with TestClient(main.app) as client:
+        response = client.post("/api/tokens:batch", content=content, headers={"Content-Type": "application/json"})
+
+    assert response.status_code == 413
+    assert not decoded
@@ -0,0 +1,62 @@
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from livekit import api
+
+import main
+
+
+def key(participant: str, metadata=None):
+    return main.TokenCache.make_key("cache-room", participant, metadata, main.DEFAULT_GRANTS)
+
+
+def test_hit_returns_the_cached_token():
+    cache = main.TokenCache(max_size=10, min_ttl=600)
+    assert cache.get(key("a")) is None
+    cache.put(key("a"), "jwt-a", time.time() + 3600)
+    assert cache.get(key("a")) == "jwt-a"
+    assert cache.get(key("a", '{"plan":"pro"}')) is None
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_entry_with_less_than_min_ttl_left_is_dropped():
+    cache = main.TokenCache(max_size=10, min_ttl=600)
+    cache.put(key("a"), "jwt-a", time.time() + 599)
+    assert cache.get(key("a")) is None
+    assert len(cache) == 0 and cache.evictions == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = main.TokenCache(max_size=2, min_ttl=0)
+    expires_at = time.time() + 3600
+    cache.put(key("a"), "jwt-a", expires_at)
+    cache.put(key("b"), "jwt-b", expires_at)
+    assert cache.get(key("a")) == "jwt-a"
+    cache.put(key("c"), "jwt-c", expires_at)
+
+    assert cache.get(key("b")) is None
+    assert cache.get(key("a")) == "jwt-a" and cache.get(key("c")) == "jwt-c"
+    assert cache.evictions == 1
+
+
+def test_zero_size_disables_the_cache():
+    cache = main.TokenCache(max_size=0, min_ttl=0)
+    cache.put(key("a"), "jwt-a", time.time() + 3600)
+    assert len(cache) == 0
+
+
+@pytest.mark.parametrize("signer", ["sdk", "fast"])
+def test_token_route_signs_once_and_then_serves_from_cache(monkeypatch, signer):
+    monkeypatch.setattr(main, "TOKEN_SIGNER", signer)
+    monkeypatch.setattr(main, "token_cache", main.TokenCache(10, 600))
+    request = {"room_name": "cache-room", "participant_name": f"cached-{signer}", "metadata": '{"a":1}'}
+    with TestClient(main.app) as client:
+        first = client.post("/api/token", json=request)
+        second = client.post("/api/token", json=request)
+
+    assert first.status_code == 200 and second.status_code == 200
+    assert first.json()["token"] == second.json()["token"]
+    assert (main.token_cache.hits, main.token_cache.misses) == (1, 1)
+    claims = api.TokenVerifier(main.LIVEKIT_API_KEY, main.LIVEKIT_API_SECRET).verify(first.json()["token"])
+    assert claims.identity == f"cached-{signer}" and claims.video.room == "cache-room"
@@ -0,0 +1,53 @@
+import datetime
+import types
+
+import pytest
+from livekit import api
+from livekit.api import access_token
+
+import main
+
+ISSUED_AT = 1730462400
+
+
+@pytest.fixture
+def frozen_sdk_clock(monkeypatch):
+    class FrozenDatetime(datetime.datetime):
+        @classmethod
+        def utcnow(cls):
+            return cls.utcfromtimestamp(ISSUED_AT)
+
+    monkeypatch.setattr(access_token, "datetime", types.SimpleNamespace(datetime=FrozenDatetime, timedelta=datetime.timedelta))
+
+
+def sdk_token(room_name: str, participant_name: str, metadata: str, ttl: int) -> str:
+    return (
+        api.AccessToken(main.LIVEKIT_API_KEY, main.LIVEKIT_API_SECRET)
+        .with_identity(participant_name)
+        .with_name(participant_name)
+        .with_ttl(datetime.timedelta(seconds=ttl))
+        .with_metadata(metadata)
+        .with_grants(api.VideoGrants(room=room_name, **main.DEFAULT_GRANTS))
+        .to_jwt()
+    )
+
+
+@pytest.mark.parametrize("room_name, participant_name, metadata", [
+    ("onboarding-1a2b", "user_42", ""),
+    ("room", "agent-7", '{"plan":"pro","locale":"en"}'),
+    ("sala-ñ", "José", '{"nome":"São Paulo"}'),
+])
+def test_fast_signer_matches_sdk_byte_for_byte(frozen_sdk_clock, room_name, participant_name, metadata):
+    signer = main.FastTokenSigner(main.LIVEKIT_API_KEY, main.LIVEKIT_API_SECRET)
+    fast = signer.sign(room_name, participant_name, metadata or None, 3600, now=ISSUED_AT)
+    assert fast == sdk_token(room_name, participant_name, metadata, 3600)
+
+
+def test_sdk_signer_path_signs(monkeypatch):
+    monkeypatch.setattr(main, "TOKEN_SIGNER", "sdk")
+    jwt_token, expires_at = main.create_access_token("room", "user_1", '{"a":1}')
+    claims = api.TokenVerifier(main.LIVEKIT_API_KEY, main.LIVEKIT_API_SECRET).verify(jwt_token)
+    assert claims.identity == "user_1"
+    assert claims.name == "user_1"
+    assert claims.metadata == '{"a":1}'
+    assert claims.video.room == "room" and claims.video.room_join
@@ -0,0 +1,126 @@
+import wave
+
+import pytest
+
+import audio_analysis
+import main
+
+np = pytest.importorskip("numpy")
+
+FRAME_MS = 20.0
+VAD = dict(frame_ms=FRAME_MS, threshold_dbfs=-45.0, noise_margin_db=10.0, min_speech_ms=120.0, min_silence_ms=400.0)
+SAMPLE_RATE = 16000
+
+
+def levels(*bursts, frames: int = 200):
+    """Quiet track (-80 dBFS) with loud (-20 dBFS) frames at the given [start, end) frame ranges"""
+    track = np.full(frames, -80.0, dtype=np.float32)
+    for start, end in bursts:
+        track[start:end] = -20.0
+    return track
+
+
+def segments(track):
+    starts, ends = audio_analysis.speech_segments(track, **VAD)
+    return [(round(float(s), 3), round(float(e), 3)) for s, e in zip(starts, ends)]
+
+
+def test_pause_shorter_than_min_silence_is_bridged():
+    # 400 ms is 20 frames
+    assert segments(levels((10, 30), (49, 70))) == [(0.2, 1.4)]
+
+
+def test_pause_of_exactly_min_silence_splits_the_turn():
+    assert segments(levels((10, 30), (50, 70))) == [(0.2, 0.6), (1.0, 1.4)]
+
+
+def test_bursts_shorter_than_min_speech_are_dropped():
+    # 120 ms is 6 frames
+    assert segments(levels((10, 15), (60, 66))) == [(1.2, 1.32)]
+
+
+def test_short_bursts_joined_by_a_short_pause_are_kept():
+    assert segments(levels((10, 14), (16, 20))) == [(0.2, 0.4)]
+
+
+def test_silent_track_has_no_speech():
+    assert segments(levels()) == []
+
+
+def test_answered_unanswered_and_overlapped_turns():
+    user_starts, user_ends = np.array([0.0, 3.0, 6.0]), np.array([1.0, 4.0, 7.0])
+    # Answers turn 1 after 0.5 s, barges into turn 3, then answers it after 0.3 s
+    agent_starts, agent_ends = np.array([1.5, 6.5, 7.3]), np.array([2.5, 6.8, 8.0])
+
+    turns = audio_analysis.response_latencies(user_starts, user_ends, agent_starts, agent_ends)
+
+    assert np.allclose(turns["latencies"], [0.5, 0.3])
+    assert np.allclose(turns["turn_ends"], [1.0, 7.0])
+    assert turns["unanswered"] == 1
+    assert turns["overlaps"] == 1
+
+
+def tone(seconds: float):
+    t = np.arange(int(SAMPLE_RATE * seconds))
+    return (np.sin(t * 2 * np.pi * 300 / SAMPLE_RATE) * 8000).astype(np.int16)
+
+
+def track(total_s: float, *spans):
+    samples = np.zeros(int(SAMPLE_RATE * total_s), dtype=np.int16)
+    for start, end in spans:
+        chunk = tone(end - start)
+        samples[int(start * SAMPLE_RATE):int(start * SAMPLE_RATE) + len(chunk)] = chunk
+    return samples
+
+
+def write_wav(path, channels):
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(len(channels))
+        wav.setsampwidth(2)
+        wav.setframerate(SAMPLE_RATE)
+        wav.writeframes(np.stack(channels, axis=1).astype("<i2").tobytes())
+    return str(path)
+
+
+def test_per_track_recordings_match_the_dual_channel_recording(tmp_path):
+    user = track(10, (1.0, 2.0), (5.0, 6.0))
+    agent = track(10, (2.6, 3.6), (6.4, 7.4))
+    # Agent on the left, user on the right, as DUAL_CHANNEL_AGENT records them
+    composite = write_wav(tmp_path / "composite.wav", [agent, user])
+    # The agent's track egress started 2 s after the user's
+    user_file = write_wav(tmp_path / "user.wav", [user])
+    agent_file = write_wav(tmp_path / "agent.wav", [agent[2 * SAMPLE_RATE:]])
+
+    tracker = main.TurnTakingTracker("agent", max_entries=10)
+    assert tracker.recording_finished("r", "EG_mix", {"roomComposite": {"audioMixing": "DUAL_CHANNEL_AGENT"}}, composite) == (
+        "EG_mix", (composite, 1, 0.0), (composite, 0, 0.0)
+    )
+    dual = audio_analysis.analyze_turn_taking((composite, 1, 0.0), (composite, 0, 0.0), **VAD)
+
+    tracker.track_roles.update({"TR_user": "user", "TR_agent": "agent"})
+    started = 1_730_462_400 * 10 ** 9
+    assert tracker.recording_finished("r", "EG_u", {"track": {"trackId": "TR_user"}, "startedAt": str(started)}, user_file) is None
+    key, user_source, agent_source = tracker.recording_finished(
+        "r", "EG_a", {"track": {"trackId": "TR_agent"}, "startedAt": str(started + 2 * 10 ** 9)}, agent_file
+    )
+    assert key == "EG_u+EG_a"
+    assert user_source == (user_file, None, 0.0) and agent_source == (agent_file, None, 2.0)
+    per_track = audio_analysis.analyze_turn_taking(user_source, agent_source, **VAD)
+
+    assert dual["turns"] == 2 and dual["unanswered"] == 0 and dual["overlaps"] == 0
+    assert dual["mean_ms"] == pytest.approx(500, abs=FRAME_MS)
+    assert per_track == dual
+
+
+def test_track_roles_come_from_participant_kind_or_identity():
+    tracker = main.TurnTakingTracker("agent", max_entries=10)
+    for sid, participant in (
+        ("PA_bot", {"sid": "PA_bot", "identity": "helper", "kind": "AGENT"}),
+        ("PA_named", {"sid": "PA_named", "identity": "agent-42"}),
+        ("PA_user", {"sid": "PA_user", "identity": "user_1", "kind": "STANDARD"}),
+    ):
+        tracker.participant_joined({"participant": participant})
+        tracker.track_published({"participant": {"sid": sid}, "track": {"sid": f"TR_{sid}", "type": "AUDIO"}})
+    tracker.track_published({"participant": {"sid": "PA_user"}, "track": {"sid": "TR_video", "type": "VIDEO"}})
+
+    assert dict(tracker.track_roles) == {"TR_PA_bot": "agent", "TR_PA_named": "agent", "TR_PA_user": "user"}
@@ -0,0 +1,31 @@
+import sqlite3
+
+import main
+
+
+def persisted_keys(path) -> set:
+    conn = sqlite3.connect(path)
+    try:
+        return {row[0] for row in conn.execute("SELECT key FROM webhook_dedup")}
+    finally:
+        conn.close()
+
+
+def test_persisted_keys_are_deleted_as_they_age_out(tmp_path, monkeypatch):
+    path = str(tmp_path / "dedup.db")
+    clock = [1000.0]
+    monkeypatch.setattr(main.time, "time", lambda: clock[0])
+    dedup = main.WebhookDeduplicator(ttl=60, max_size=3, path=path)
+    try:
+        for i in range(5):
+            dedup.add(f"EV_{i}")
+        # Capped at max_size
+        assert persisted_keys(path) == {"EV_2", "EV_3", "EV_4"}
+
+        clock[0] += 120
+        dedup.add("EV_5")
+        # The rest expired by ttl
+        assert persisted_keys(path) == {"EV_5"}
+        assert dedup.is_duplicate("EV_5") and not dedup.is_duplicate("EV_4")
+    finally:
+        dedup.close()
@@ -0,0 +1,103 @@
+import asyncio
+
+import pytest
+
+import main
+
+
+class RecordingQueue:
+    def __init__(self):
+        self.acked, self.buried = [], []
+
+    def ack(self, event_id):
+        self.acked.append(event_id)
+
+    def bury(self, event_id, attempts, error):
+        self.buried.append((event_id, attempts, error))
+
+
+@pytest.fixture
+def dispatcher(monkeypatch):
+    dispatcher = main.WebhookDispatcher(default_timeout=1.0)
+    monkeypatch.setattr(main, "webhook_dispatcher", dispatcher)
+    monkeypatch.setattr(main, "WEBHOOK_RETRY_DELAY", 0)
+    return dispatcher
+
+
+def failures(reason: str) -> float:
+    return main.metrics._counters["webhook_handler_failures_total"].get((("event", "test_event"), ("reason", reason)), 0)
+
+
+def test_handlers_run_in_registration_order(dispatcher):
+    calls = []
+
+    @dispatcher.on("test_event")
+    async def first(payload):
+        calls.append("first")
+
+    @dispatcher.on("test_event")
+    async def second(payload):
+        calls.append("second")
+
+    asyncio.run(dispatcher.dispatch({"event": "test_event"}))
+    assert calls == ["first", "second"]
+
+
+def test_timeout_and_error_are_counted_after_every_handler_ran(dispatcher):
+    calls = []
+
+    @dispatcher.on("test_event", timeout=0.01)
+    async def slow(payload):
+        await asyncio.sleep(1)
+
+    @dispatcher.on("test_event")
+    async def broken(payload):
+        raise ValueError("boom")
+
+    @dispatcher.on("test_event")
+    async def fine(payload):
+        calls.append("fine")
+
+    timeouts, errors = failures("timeout"), failures("error")
+    with pytest.raises(RuntimeError) as raised:
+        asyncio.run(dispatcher.dispatch({"event": "test_event"}))
+
+    assert "slow timed out after 0.01s" in str(raised.value) and "broken: boom" in str(raised.value)
+    assert calls == ["fine"]
+    assert failures("timeout") == timeouts + 1 and failures("error") == errors + 1
+    stats = dispatcher.stats()["test_event"]
+    assert stats["slow"]["timeouts"] == 1 and stats["broken"]["errors"] == 1 and stats["fine"]["calls"] == 1
+
+
+def test_retry_runs_only_the_handlers_that_failed(dispatcher, monkeypatch):
+    queue = RecordingQueue()
+    monkeypatch.setattr(main, "webhook_queue", queue)
+    calls = {"side_effect": 0, "flaky": 0}
+
+    @dispatcher.on("test_event")
+    async def side_effect(payload):
+        calls["side_effect"] += 1
+
+    @dispatcher.on("test_event")
+    async def flaky(payload):
+        calls["flaky"] += 1
+        if calls["flaky"] < 3:
+            raise RuntimeError("not yet")
+
+    asyncio.run(main.process_webhook_event(7, {"event": "test_event"}, 0))
+    assert calls == {"side_effect": 1, "flaky": 3}
+    assert queue.acked == [7] and not queue.buried
+
+
+def test_event_is_buried_after_max_attempts(dispatcher, monkeypatch):
+    queue = RecordingQueue()
+    monkeypatch.setattr(main, "webhook_queue", queue)
+    monkeypatch.setattr(main, "WEBHOOK_MAX_ATTEMPTS", 2)
+
+    @dispatcher.on("test_event")
+    async def always_fails(payload):
+        raise RuntimeError("down")
+
+    asyncio.run(main.process_webhook_event(8, {"event": "test_event"}, 0))
+    assert not queue.acked
+    assert queue.buried == [(8, 2, "always_fails: down")]
@@ -0,0 +1,76 @@
+import base64
+import hashlib
+import hmac
+import json
+
+import pytest
+
+import main
+
+KEY, SECRET, NOW = "APIverifier", "verifier-secret", 1_730_462_400.0
+BODY_SHA = base64.b64encode(hashlib.sha256(b"{}").digest()).decode()
+
+
+def token(secret: str = SECRET, alg: str = "HS256", **claims) -> str:
+    claims = {"iss": KEY, "nbf": int(NOW), "exp": int(NOW) + 300, "sha256": BODY_SHA, **claims}
+    header = main._b64url(json.dumps({"alg": alg, "typ": "JWT"}).encode())
+    payload = main._b64url(json.dumps(claims).encode())
+    signature = hmac.new(secret.encode(), f"{header}.{payload}".encode(), hashlib.sha256).digest()
+    return f"{header}.{payload}.{main._b64url(signature)}"
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [NOW]
+    monkeypatch.setattr(main.time, "time", lambda: now[0])
+    return now
+
+
+def verifier(leeway: int = 60) -> main.WebhookTokenVerifier:
+    return main.WebhookTokenVerifier(KEY, SECRET, leeway=leeway, cache_size=2)
+
+
+def test_valid_token_and_body_hash(clock):
+    assert verifier().verify(token(), BODY_SHA)
+    assert verifier().verify("Bearer " + token(), BODY_SHA)
+    assert not verifier().verify(token(), base64.b64encode(hashlib.sha256(b"[]").digest()).decode())
+
+
+@pytest.mark.parametrize("claims, ok", [
+    ({"exp": int(NOW) - 30}, True),
+    ({"exp": int(NOW) - 61}, False),
+    ({"nbf": int(NOW) + 30}, True),
+    ({"nbf": int(NOW) + 61}, False),
+    ({"iss": "APIsomeoneelse"}, False),
+])
+def test_expiry_and_not_before_leeway_and_issuer(clock, claims, ok):
+    assert verifier(leeway=60).verify(token(**claims), BODY_SHA) is ok
+
+
+def test_wrong_secret_alg_or_shape_is_rejected(clock):
+    assert not verifier().verify(token(secret="other-secret"), BODY_SHA)
+    assert not verifier().verify(token(alg="none"), BODY_SHA)
+    assert not verifier().verify("not-a-jwt", BODY_SHA)
+    assert not verifier().verify("a.b.c", BODY_SHA)
+
+
+def test_verified_token_is_cached_until_it_expires(clock, monkeypatch):
+    check = verifier(leeway=0)
+    jwt_token = token()
+    assert check.verify(jwt_token, BODY_SHA)
+
+    monkeypatch.setattr(check, "_decode", lambda token, now: pytest.fail("cached token decoded again"))
+    assert check.verify(jwt_token, BODY_SHA)
+    assert check.cache_hits == 1
+
+    clock[0] = NOW + 301
+    assert not check.verify(jwt_token, BODY_SHA)
+    assert jwt_token not in check._verified
+
+
+def test_cache_is_capped(clock):
+    check = verifier()
+    tokens = [token(jti=str(i)) for i in range(3)]
+    for jwt_token in tokens:
+        assert check.verify(jwt_token, BODY_SHA)
+    assert list(check._verified) == tokens[1:]
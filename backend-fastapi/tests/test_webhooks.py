@@ -0,0 +1,106 @@
+import base64
+import hashlib
+import hmac
+import json
+import sqlite3
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+
+def sign_webhook(body: bytes) -> str:
+    now = int(time.time())
+    claims = {
+        "iss": main.LIVEKIT_API_KEY,
+        "nbf": now,
+        "exp": now + 300,
+        "sha256": base64.b64encode(hashlib.sha256(body).digest()).decode(),
+    }
+    header = main._b64url(json.dumps({"alg": "HS256", "typ": "JWT"}).encode())
+    payload = main._b64url(json.dumps(claims, separators=(",", ":")).encode())
+    signature = hmac.new(main.LIVEKIT_API_SECRET.encode(), f"{header}.{payload}".encode(), hashlib.sha256).digest()
+    return f"{header}.{payload}.{main._b64url(signature)}"
+
+
+def post_webhook(client: TestClient, body: bytes):
+    return client.post("/api/webhooks/livekit", content=body, headers={"Authorization": sign_webhook(body)})
+
+
+def wait_for_queue(client: TestClient, timeout: float = 5.0) -> dict:
+    deadline = time.time() + timeout
+    while True:
+        depth = client.get("/api/webhooks/queue").json()
+        if depth["pending"] + depth["inflight"] == 0 or time.time() > deadline:
+            return depth
+        time.sleep(0.02)
+
+
+def test_truncated_body_is_parked_and_consumer_keeps_running():
+    truncated = b'{"event":"room_started","room":{"sid":"RM_trunc","y":{},"name":"trunc-room"'
+    valid = json.dumps({"event": "room_started", "id": "EV_after", "room": {"sid": "RM_ok", "name": "after-room"}}).encode()
+
+    with TestClient(main.app) as client:
+        dead_before = client.get("/api/webhooks/queue").json()["dead"]
+        assert post_webhook(client, truncated).status_code == 200
+        assert post_webhook(client, valid).status_code == 200
+
+        depth = wait_for_queue(client)
+        assert depth["pending"] == 0 and depth["inflight"] == 0
+        assert depth["dead"] == dead_before + 1
+        assert not main._webhook_consumer.done()
+
+        main.readiness_probe.evaluate()
+        assert main.readiness_probe.checks["webhook_consumer"]["ok"]
+
+
+def test_readiness_fails_when_consumer_has_stopped():
+    with TestClient(main.app) as client:
+        consumer = main._webhook_consumer
+        client.portal.call(consumer.cancel)
+        while not consumer.done():
+            time.sleep(0.01)
+        main.readiness_probe.evaluate()
+        assert not main.readiness_probe.checks["webhook_consumer"]["ok"]
+        assert not main.readiness_probe.ready
+
+
+def test_shutdown_tears_down_after_the_consumer_failed(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "EVENT_LOG_DIR", str(tmp_path / "event_log"))
+    first = json.dumps({"event": "room_started", "id": "EV_before_crash", "room": {"sid": "RM_c", "name": "crash-room"}}).encode()
+    second = json.dumps({"event": "room_started", "id": "EV_crash", "room": {"sid": "RM_c", "name": "crash-room"}}).encode()
+
+    with TestClient(main.app) as client:
+        post_webhook(client, first)
+        wait_for_queue(client)
+
+        def fail(limit):
+            raise RuntimeError("queue store broken")
+
+        monkeypatch.setattr(main.webhook_queue, "fetch", fail)
+        post_webhook(client, second)
+        consumer = main._webhook_consumer
+        while not consumer.done():
+            time.sleep(0.01)
+        assert isinstance(consumer.exception(), RuntimeError)
+
+    with pytest.raises(sqlite3.ProgrammingError):
+        main.webhook_queue._conn.execute("SELECT 1")
+    assert main.event_log._segment is None
+    assert [seq for seq, _ in main.event_log._snapshots()] == [1]
+
+
+def test_chunked_body_over_the_limit_is_rejected_while_streaming(monkeypatch):
+    monkeypatch.setattr(main, "WEBHOOK_MAX_BODY_BYTES", 1024)
+    def chunks():
+        for _ in range(8):
+            yield b" " * 256
+
+    with TestClient(main.app) as client:
+        depth = client.get("/api/webhooks/queue").json()
+        # A generator body is sent chunked, without Content-Length
+        response = client.post("/api/webhooks/livekit", content=chunks(), headers={"Authorization": "unused"})
+        assert response.status_code == 413
+        assert client.get("/api/webhooks/queue").json() == depth
@@ -26,6 +26,12 @@ export interface TokenResponse {
   url: string;
 }
 
+export interface OnboardingSessionResponse {
+  room_name: string;
+  token: string;
+  url: string;
+}
+
 export class TokenService {
   private backendUrl: string;
 
@@ -80,15 +86,40 @@ export class TokenService {
     }
   }
 
+  /**
+   * Request an onboarding session from the FastAPI backend
+   *
+   * The backend allocates a room for this user and returns a token for it
+   * in the same response.
+   */
+  async requestOnboardingSession(userId: string): Promise<OnboardingSessionResponse> {
+    const response = await fetch(`${this.backendUrl}/api/onboarding/session`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+      body: JSON.stringify({
+        user_id: userId,
+        metadata: JSON.stringify({ type: 'onboarding' }),
+      }),
+    });
+
+    if (!response.ok) {
+      const errorData = await response.json().catch(() => ({}));
+      throw new Error(
+        errorData.detail || `HTTP ${response.status}: ${response.statusText}`
+      );
+    }
+
+    return response.json();
+  }
+
   /**
    * Request a token for the onboarding voice agent session
    */
   async requestOnboardingToken(userId: string): Promise<string> {
-    return this.requestToken({
-      room_name: 'onboarding',
-      participant_name: userId,
-      metadata: JSON.stringify({ type: 'onboarding' }),
-    });
+    const session = await this.requestOnboardingSession(userId);
+    return session.token;
   }
 
   /**